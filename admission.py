@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Controle de admissão para os endpoints de geração de PIX.
+Limita quantas gerações rodam ao mesmo tempo, mantém uma fila limitada
+com prioridade (payload antes de imagem) e rejeita rápido quando a fila enche.
+"""
+
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+
+# Prioridades (menor valor = atendido primeiro)
+PRIORIDADE_PAYLOAD = 0
+PRIORIDADE_IMAGEM = 1
+
+
+class SobrecargaError(Exception):
+    """Requisição descartada pelo controle de admissão"""
+
+    def __init__(self, mensagem, status=503, retry_after=1):
+        super().__init__(mensagem)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _Espera():
+    """Requisição aguardando uma vaga na fila"""
+
+    __slots__ = ('evento', 'liberada', 'descartada')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.liberada = False
+        self.descartada = False
+
+
+class AdmissionController():
+    def __init__(self, max_concorrencia=4, max_fila=16, timeout_fila=2.0, retry_after=1):
+        """
+        Args:
+            max_concorrencia: Gerações executando simultaneamente
+            max_fila: Requisições aguardando vaga (além das em execução)
+            timeout_fila: Tempo máximo de espera na fila, em segundos
+            retry_after: Valor sugerido no cabeçalho Retry-After, em segundos
+        """
+        self.max_concorrencia = max(1, int(max_concorrencia))
+        self.max_fila = max(0, int(max_fila))
+        self.timeout_fila = float(timeout_fila)
+        self.retry_after = int(retry_after)
+
+        self._lock = threading.Lock()
+        self._ativos = 0
+        self._fila = []
+        self._seq = itertools.count()
+
+        # Contadores para o health check
+        self.admitidos = 0
+        self.rejeitados = 0
+        self.expirados = 0
+
+    def adquirir(self, prioridade=PRIORIDADE_IMAGEM):
+        """Obtém uma vaga de execução ou levanta SobrecargaError"""
+        with self._lock:
+            if self._ativos < self.max_concorrencia and not self._fila:
+                self._ativos += 1
+                self.admitidos += 1
+                return
+
+            if len(self._fila) >= self.max_fila:
+                # Fila cheia: um pedido só de payload ainda pode tomar o lugar
+                # do último pedido de imagem que está aguardando
+                pior = max(self._fila) if self._fila else None
+                if pior is None or pior[0] <= prioridade:
+                    self.rejeitados += 1
+                    raise SobrecargaError("Servidor sobrecarregado, tente novamente",
+                                          status=429, retry_after=self.retry_after)
+                self._fila.remove(pior)
+                heapq.heapify(self._fila)
+                pior[2].descartada = True
+                pior[2].evento.set()
+
+            espera = _Espera()
+            entrada = (prioridade, next(self._seq), espera)
+            heapq.heappush(self._fila, entrada)
+
+        espera.evento.wait(self.timeout_fila)
+
+        with self._lock:
+            if espera.liberada:
+                self.admitidos += 1
+                return
+            if espera.descartada:
+                self.rejeitados += 1
+                raise SobrecargaError("Servidor sobrecarregado, tente novamente",
+                                      status=429, retry_after=self.retry_after)
+            # Desiste da fila sem ter recebido a vaga
+            self._fila.remove(entrada)
+            heapq.heapify(self._fila)
+            self.expirados += 1
+
+        raise SobrecargaError("Tempo de espera na fila esgotado",
+                              status=503, retry_after=self.retry_after)
+
+    def liberar(self):
+        """Devolve a vaga, repassando-a diretamente ao próximo da fila"""
+        with self._lock:
+            if self._fila:
+                _, _, espera = heapq.heappop(self._fila)
+                espera.liberada = True
+                espera.evento.set()
+                return
+            self._ativos -= 1
+
+    @contextmanager
+    def vaga(self, prioridade=PRIORIDADE_IMAGEM):
+        """Context manager: adquire e libera uma vaga de execução"""
+        self.adquirir(prioridade)
+        try:
+            yield
+        finally:
+            self.liberar()
+
+    def estatisticas(self):
+        """Retorna o estado atual do controle de admissão"""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concorrencia,
+                "max_queue": self.max_fila,
+                "active": self._ativos,
+                "queued": len(self._fila),
+                "admitted": self.admitidos,
+                "rejected": self.rejeitados,
+                "timed_out": self.expirados,
+            }
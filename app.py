@@ -4,19 +4,35 @@
 API Flask para geração de QR Code PIX
 """
 
+import time
+_INICIO_IMPORTACAO = time.perf_counter()
+
 import os
 import json
 import base64
-from io import BytesIO
+import secrets
 from datetime import datetime
-from flask import Flask, request, render_template, jsonify, send_file, make_response
+from flask import Flask, request, render_template, jsonify, send_file, make_response, url_for, abort
 from flask_cors import CORS
 
 # No início do arquivo, após os outros imports
 from datetime import datetime, timedelta
 
 # Importar o gerador de payload PIX
-from payload_generator import Payload
+from payload_generator import Payload, crc16_ccitt, normalizar_location, normalizar_texto, normalizar_txid
+from pix_decoder import decodificar_brcode
+from admission import AdmissionController, SobrecargaError, PRIORIDADE_PAYLOAD, PRIORIDADE_IMAGEM
+from idempotency import IdempotencyStore, ConflitoIdempotenciaError, impressao_digital
+from pix_cache import TTLCache
+from catalog import PreaquecedorCatalogo
+from static_assets import AssetsEstaticos, pagina_em_cache, paginas_cache
+from pix_registry import ChargeRegistry
+from pix_schema import SCHEMA_GERACAO, SCHEMA_GERACAO_DINAMICA, SCHEMA_VALIDACAO, ErroValidacao
+from pix_json import ProvedorJSONRapido
+from pix_memory import RastreadorMemoria
+from render_engine import MotorRenderizacao
+from pix_batcher import AgrupadorRequisicoes
+from pix_keys import classificar_chave, validar_chaves
 
 # Inicializar Flask
 app = Flask(__name__)
@@ -26,21 +42,339 @@ CORS(app)  # Habilitar CORS para requisições de outros domínios
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'chave-secreta-padrao-pix-api')
 
+# Serialização JSON: orjson quando disponível (auto), ou forçado com orjson/stdlib
+app.config['PIX_JSON_ENCODER'] = os.environ.get('PIX_JSON_ENCODER', 'auto').lower()
+app.json = ProvedorJSONRapido(app, app.config['PIX_JSON_ENCODER'])
+
+# Diagnóstico de memória: tracemalloc por etapa e /api/v1/debug/memory (custo extra de CPU)
+app.config['PIX_MEMORY_TRACE'] = os.environ.get('PIX_MEMORY_TRACE', 'False').lower() == 'true'
+app.config['PIX_MEMORY_TRACE_FRAMES'] = int(os.environ.get('PIX_MEMORY_TRACE_FRAMES', 10))
+
+memoria = RastreadorMemoria(app.config['PIX_MEMORY_TRACE'], app.config['PIX_MEMORY_TRACE_FRAMES'])
+
+# Estáticos com URL versionada, cache longo e variantes .br/.gz (python static_assets.py)
+static_assets = AssetsEstaticos(app)
+
+# Endereço público (ex.: https://pix.exemplo.com) dos links absolutos das páginas; vazio usa
+# links relativos. Nunca vem do cabeçalho Host, porque as páginas são cacheadas por caminho
+app.config['PIX_PUBLIC_URL'] = os.environ.get('PIX_PUBLIC_URL', '').rstrip('/')
+
+@app.context_processor
+def _contexto_url_base():
+    return {"url_base": app.config['PIX_PUBLIC_URL']}
+
 # Diretório para salvar QR Codes (opcional)
 QR_CODE_DIR = os.path.join(os.path.dirname(__file__), 'qrcodes')
 os.makedirs(QR_CODE_DIR, exist_ok=True)
 
+# Controle de admissão: limite de gerações simultâneas e fila com prioridade
+app.config['PIX_MAX_CONCURRENCY'] = int(os.environ.get('PIX_MAX_CONCURRENCY', 4))
+app.config['PIX_MAX_QUEUE'] = int(os.environ.get('PIX_MAX_QUEUE', 16))
+app.config['PIX_QUEUE_TIMEOUT'] = float(os.environ.get('PIX_QUEUE_TIMEOUT', 2.0))
+app.config['PIX_RETRY_AFTER'] = int(os.environ.get('PIX_RETRY_AFTER', 1))
+
+admission = AdmissionController(
+    max_concorrencia=app.config['PIX_MAX_CONCURRENCY'],
+    max_fila=app.config['PIX_MAX_QUEUE'],
+    timeout_fila=app.config['PIX_QUEUE_TIMEOUT'],
+    retry_after=app.config['PIX_RETRY_AFTER'],
+)
+
+# Idempotência: respostas concluídas são reenviadas em retentativas do cliente
+app.config['PIX_IDEMPOTENCY_TTL'] = float(os.environ.get('PIX_IDEMPOTENCY_TTL', 86400))
+app.config['PIX_IDEMPOTENCY_MAX_ENTRIES'] = int(os.environ.get('PIX_IDEMPOTENCY_MAX_ENTRIES', 4096))
+app.config['PIX_IDEMPOTENCY_AUTO_KEY'] = os.environ.get('PIX_IDEMPOTENCY_AUTO_KEY', 'True').lower() == 'true'
+
+app.config['PIX_IDEMPOTENCY_MAX_BYTES'] = int(os.environ.get('PIX_IDEMPOTENCY_MAX_BYTES', 32 * 1024 * 1024))
+
+idempotency = IdempotencyStore(
+    max_entradas=app.config['PIX_IDEMPOTENCY_MAX_ENTRIES'],
+    ttl=app.config['PIX_IDEMPOTENCY_TTL'],
+    max_bytes=app.config['PIX_IDEMPOTENCY_MAX_BYTES'],
+)
+
+# Cache de renderização: (payload, PNG ou saídas pedidas) por cobrança, compartilhado pela API,
+# pelo formulário web e pelo pré-aquecimento do catálogo
+app.config['PIX_RENDER_CACHE_SIZE'] = int(os.environ.get('PIX_RENDER_CACHE_SIZE', 4096))
+app.config['PIX_RENDER_CACHE_TTL'] = float(os.environ.get('PIX_RENDER_CACHE_TTL', 86400))
+
+app.config['PIX_RENDER_CACHE_MAX_BYTES'] = int(os.environ.get('PIX_RENDER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+def _tamanho_render(entrada):
+    """Bytes aproximados de uma entrada do cache: payload + PNG ou saídas renderizadas"""
+    payload, imagens = entrada
+    if imagens is None:
+        return len(payload)
+    if isinstance(imagens, bytes):
+        return len(payload) + len(imagens)
+    return len(payload) + sum(len(saida["data"]) for saida in imagens)
+
+render_cache = TTLCache(
+    max_entradas=app.config['PIX_RENDER_CACHE_SIZE'],
+    ttl=app.config['PIX_RENDER_CACHE_TTL'],
+    max_bytes=app.config['PIX_RENDER_CACHE_MAX_BYTES'],
+    tamanho=_tamanho_render,
+)
+
+# Motor de renderização: PNGs gerados por um pool de processos persistentes (0 = no próprio worker).
+# Cada worker do gunicorn sobe o seu pool na primeira renderização.
+app.config['PIX_RENDER_PROCESSES'] = int(os.environ.get('PIX_RENDER_PROCESSES', 0))
+
+motor_render = MotorRenderizacao(app.config['PIX_RENDER_PROCESSES']) if app.config['PIX_RENDER_PROCESSES'] > 0 else None
+
+def _chave_render(nome, chavepix, valor, cidade, txid, location=None):
+    """Chave do cache de renderização (valor normalizado com 2 casas)"""
+    if location:
+        # Código dinâmico não leva chave, valor nem txid: uma imagem por location
+        return ('location', location, nome, cidade)
+    try:
+        valor = f"{float(valor.replace(',', '.')):.2f}"
+    except ValueError:
+        pass
+    return (nome, chavepix, valor, cidade, txid)
+
+def _renderizar_cobranca(nome, chavepix, valor, cidade, txid, com_imagem, location):
+    """(payload, png_bytes) gerados no próprio processo, sem cache nem controle de admissão"""
+    payload_gen = Payload(
+        nome=nome,
+        chavepix=chavepix,
+        valor=valor,
+        cidade=cidade,
+        txtId=txid,
+        diretorio='',
+        location=location
+    )
+    with memoria.etapa('payload'):
+        payload = payload_gen.gerarPayload(gerar_qrcode=False)
+    
+    png_bytes = None
+    if com_imagem:
+        with memoria.etapa('qrcode'):
+            payload_gen.get_qrcode_image()
+        with memoria.etapa('png'):
+            # A imagem PIL é descartada assim que os bytes são codificados
+            png_bytes = payload_gen.gerarPng()
+    return payload, png_bytes
+
+def gerar_pix_cacheado(nome, chavepix, valor, cidade, txid, com_imagem=True, prioridade=None, location=None):
+    """
+    Retorna (payload, png_bytes) para uma cobrança, usando o cache de renderização.
+    Em caso de falta no cache, a geração passa pelo controle de admissão com a
+    `prioridade` informada (None = sem controle, para tarefas internas).
+    png_bytes é None quando com_imagem=False.
+    """
+    chave = _chave_render(nome, chavepix, valor, cidade, txid, location)
+    em_cache = render_cache.get(chave)
+    if em_cache is not None and (em_cache[1] is not None or not com_imagem):
+        return em_cache[0], (em_cache[1] if com_imagem else None)
+    
+    if prioridade is not None:
+        admission.adquirir(prioridade)
+    try:
+        if com_imagem and motor_render is not None:
+            with memoria.etapa('engine'):
+                payload, png_bytes = motor_render.renderizar((nome, chavepix, valor, cidade, txid, location))
+        else:
+            payload, png_bytes = _renderizar_cobranca(nome, chavepix, valor, cidade, txid, com_imagem, location)
+    finally:
+        if prioridade is not None:
+            admission.liberar()
+    
+    render_cache.set(chave, (payload, png_bytes))
+    return payload, png_bytes
+
+def gerar_lote_cacheado(cobrancas, prioridade=None):
+    """
+    Versão em lote de gerar_pix_cacheado para
+    [(nome, chavepix, valor, cidade, txid, com_imagem, location), ...]: uma única vaga
+    do controle de admissão para todas as faltas no cache e, com o motor de
+    renderização ativo, todas as imagens enviadas aos processos de uma vez.
+    Retorna [(payload, png_bytes) ou a exceção da cobrança] na mesma ordem.
+    """
+    resultados = [None] * len(cobrancas)
+    chaves = [None] * len(cobrancas)
+    faltas = []
+    for i, (nome, chavepix, valor, cidade, txid, com_imagem, location) in enumerate(cobrancas):
+        chaves[i] = _chave_render(nome, chavepix, valor, cidade, txid, location)
+        em_cache = render_cache.get(chaves[i])
+        if em_cache is not None and (em_cache[1] is not None or not com_imagem):
+            resultados[i] = (em_cache[0], em_cache[1] if com_imagem else None)
+        else:
+            faltas.append(i)
+    if not faltas:
+        return resultados
+    
+    if prioridade is not None:
+        admission.adquirir(prioridade)
+    try:
+        no_motor = [i for i in faltas if cobrancas[i][5]] if motor_render is not None else []
+        if no_motor:
+            with memoria.etapa('engine'):
+                renderizadas = motor_render.renderizar_lote(
+                    [cobrancas[i][:5] + (cobrancas[i][6],) for i in no_motor])
+                for i, (payload, png_bytes, erro) in zip(no_motor, renderizadas):
+                    resultados[i] = ValueError(erro) if erro is not None else (payload, png_bytes)
+        
+        for i in faltas:
+            if resultados[i] is None:
+                try:
+                    resultados[i] = _renderizar_cobranca(*cobrancas[i])
+                except Exception as e:
+                    resultados[i] = e
+    finally:
+        if prioridade is not None:
+            admission.liberar()
+    
+    for i in faltas:
+        if not isinstance(resultados[i], Exception):
+            render_cache.set(chaves[i], resultados[i])
+    return resultados
+
+# Micro-batching: requisições simultâneas de /api/v1/pix/generate (sem "outputs")
+# esperam até PIX_MICROBATCH_WINDOW_MS e são geradas juntas por gerar_lote_cacheado
+app.config['PIX_MICROBATCH'] = os.environ.get('PIX_MICROBATCH', 'False').lower() == 'true'
+app.config['PIX_MICROBATCH_WINDOW_MS'] = float(os.environ.get('PIX_MICROBATCH_WINDOW_MS', 2))
+app.config['PIX_MICROBATCH_MAX'] = int(os.environ.get('PIX_MICROBATCH_MAX', 32))
+
+microbatcher = None
+if app.config['PIX_MICROBATCH']:
+    microbatcher = AgrupadorRequisicoes(
+        gerar_lote_cacheado,
+        janela=app.config['PIX_MICROBATCH_WINDOW_MS'] / 1000,
+        max_lote=app.config['PIX_MICROBATCH_MAX'],
+    )
+
+def gerar_saidas_cacheadas(nome, chavepix, valor, cidade, txid, saidas, prioridade=None, location=None):
+    """
+    Retorna (payload, saídas renderizadas) para uma cobrança: todos os formatos e
+    tamanhos pedidos em `saidas` ((formato, tamanho), ...) derivam de uma única
+    codificação do QR Code.
+    """
+    chave = _chave_render(nome, chavepix, valor, cidade, txid, location) + (saidas,)
+    em_cache = render_cache.get(chave)
+    if em_cache is not None:
+        return em_cache
+    
+    if prioridade is not None:
+        admission.adquirir(prioridade)
+    try:
+        payload_gen = Payload(
+            nome=nome,
+            chavepix=chavepix,
+            valor=valor,
+            cidade=cidade,
+            txtId=txid,
+            diretorio='',
+            location=location
+        )
+        with memoria.etapa('payload'):
+            payload = payload_gen.gerarPayload(gerar_qrcode=False)
+        with memoria.etapa('outputs'):
+            resultado = (payload, payload_gen.gerarSaidas(saidas))
+            payload_gen.liberarImagem()
+    finally:
+        if prioridade is not None:
+            admission.liberar()
+    
+    render_cache.set(chave, resultado)
+    return resultado
+
+# Resultados do formulário web, sem gravar em disco: PNG mantido em memória por um
+# token aleatório e servido em /generate/result/<token>.png (memory), ou embutido
+# na página em base64 (inline; necessário com vários workers sem sessão fixa)
+app.config['PIX_RESULT_MODE'] = os.environ.get('PIX_RESULT_MODE', 'memory').lower()
+app.config['PIX_RESULT_TTL'] = float(os.environ.get('PIX_RESULT_TTL', 600))
+app.config['PIX_RESULT_MAX_ENTRIES'] = int(os.environ.get('PIX_RESULT_MAX_ENTRIES', 2048))
+app.config['PIX_RESULT_MAX_BYTES'] = int(os.environ.get('PIX_RESULT_MAX_BYTES', 32 * 1024 * 1024))
+
+result_store = TTLCache(
+    max_entradas=app.config['PIX_RESULT_MAX_ENTRIES'],
+    ttl=app.config['PIX_RESULT_TTL'],
+    max_bytes=app.config['PIX_RESULT_MAX_BYTES'],
+)
+
+# Registro das cobranças geradas (SQLite em modo WAL, gravação em lote)
+app.config['PIX_REGISTRY'] = os.environ.get('PIX_REGISTRY', 'True').lower() == 'true'
+app.config['PIX_REGISTRY_PATH'] = os.environ.get(
+    'PIX_REGISTRY_PATH', os.path.join(os.path.dirname(__file__), 'pix_registry.db'))
+
+registry = ChargeRegistry(app.config['PIX_REGISTRY_PATH']) if app.config['PIX_REGISTRY'] else None
+
+# Geração em lote: itens aceitos por POST /api/v1/pix/generate/batch
+app.config['PIX_BATCH_MAX_ITEMS'] = int(os.environ.get('PIX_BATCH_MAX_ITEMS', 100))
+
+# Chaves PIX: conferência opcional (CPF/CNPJ, telefone, e-mail, EVP) antes da geração
+# e limite de chaves por POST /api/v1/pix/keys/validate
+app.config['PIX_KEY_CHECK'] = os.environ.get('PIX_KEY_CHECK', 'False').lower() == 'true'
+app.config['PIX_KEYS_MAX_ITEMS'] = int(os.environ.get('PIX_KEYS_MAX_ITEMS', 10000))
+
+def registrar_cobranca(nome, chavepix, valor, cidade, txid, payload, image_location=None):
+    """Registra a cobrança gerada (assíncrono; falhas não afetam a resposta)"""
+    if registry is not None:
+        # Campos como estão no payload (txid '***' e sem valor no dinâmico; valor formatado,
+        # nome/cidade normalizados), para a consulta casar com o QR Code decodificado
+        txid_payload, valor_payload, chave_payload, nome_payload, cidade_payload, _, erro = decodificar_brcode(payload)
+        if not erro:
+            txid, valor, chavepix, nome, cidade = txid_payload, valor_payload, chave_payload, nome_payload, cidade_payload
+        registry.registrar(txid, chavepix, valor, nome, cidade, payload, image_location)
+
+# Pré-aquecimento do cache a partir de um catálogo de cobranças frequentes
+app.config['PIX_CATALOG'] = os.environ.get('PIX_CATALOG', '')
+
+catalog_warmer = None
+if app.config['PIX_CATALOG']:
+    catalog_warmer = PreaquecedorCatalogo(
+        app.config['PIX_CATALOG'],
+        lambda nome, chavepix, valor, cidade, txid: gerar_pix_cacheado(nome, chavepix, valor, cidade, txid)
+    )
+
+# Tempos de inicialização (reportados no health check)
+startup_info = {
+    "import_seconds": None,
+    "warmup_seconds": None,
+    "warmed": False
+}
+
+def warmup():
+    """
+    Pré-aquece o processo: carrega qrcode/PIL, gera um QR Code de exemplo
+    (preenchendo as tabelas internas do qrcode e o plugin PNG do PIL), exercita
+    o CRC16 e compila todos os templates Jinja.
+
+    Com gunicorn --preload (ver gunicorn.conf.py) roda uma vez no master, antes
+    do fork, e os workers herdam essas páginas por copy-on-write.
+    """
+    if startup_info["warmed"]:
+        return
+    inicio = time.perf_counter()
+    
+    crc16_ccitt(b'000201')
+    
+    payload_gen = Payload('Aquecimento', 'aquecimento@pix.com', '1.00', 'Sao Paulo', 'WARMUP')
+    payload_gen.gerarPayload()
+    payload_gen.gerarPng()
+    
+    for nome in app.jinja_env.list_templates():
+        app.jinja_env.get_template(nome)
+    
+    startup_info["warmup_seconds"] = round(time.perf_counter() - inicio, 4)
+    startup_info["warmed"] = True
+    app.logger.info(f"Warm-up concluído em {startup_info['warmup_seconds']}s")
+
 @app.route('/')
+@pagina_em_cache
 def index():
     """Página inicial da API"""
     return render_template('index.html')
 
 @app.route('/api/docs')
+@pagina_em_cache
 def api_docs():
     """Documentação da API"""
     return render_template('api_docs.html')
 
 @app.route('/generate', methods=['GET'])
+@pagina_em_cache
 def generate_form():
     """Formulário web para geração de PIX"""
     return render_template('generate.html')
@@ -61,46 +395,57 @@ def generate_pix_web():
         if not all([nome, chavepix, cidade]):
             return render_template('generate.html', 
                                  error="Nome, chave PIX e cidade são obrigatórios")
+        if app.config['PIX_KEY_CHECK']:
+            erro_chave = classificar_chave(chavepix)[2]
+            if erro_chave:
+                return render_template('generate.html', error=erro_chave)
         
-        # Gerar payload
-        payload_gen = Payload(
-            nome=nome,
-            chavepix=chavepix,
-            valor=valor,
-            cidade=cidade,
-            txtId=txid,
-            diretorio=''
-        )
-        
-        payload = payload_gen.gerarPayload()
-        qr_image = payload_gen.get_qrcode_image()
+        # Gerar payload e QR Code (ou reaproveitar do cache)
+        payload, png_bytes = gerar_pix_cacheado(nome, chavepix, valor, cidade, txid,
+                                                prioridade=PRIORIDADE_IMAGEM)
         
-        # Converter QR Code para base64 se necessário
+        # Imagem embutida na página (base64) ou servida da memória por um token
         qr_base64 = None
-        if return_base64:
-            buffered = BytesIO()
-            qr_image.save(buffered, format="PNG")
-            qr_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
+        qr_image = None
+        if not return_base64 and app.config['PIX_RESULT_MODE'] == 'memory':
+            token = secrets.token_urlsafe(16)
+            if result_store.set(token, png_bytes):
+                qr_image = url_for('generate_result_image', token=token)
+        if qr_image is None:
+            qr_base64 = base64.b64encode(png_bytes).decode('utf-8')
         
-        # Salvar em arquivo temporário para exibição
-        temp_filename = f"pix_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        temp_path = os.path.join(QR_CODE_DIR, temp_filename)
-        qr_image.save(temp_path)
+        registrar_cobranca(nome, chavepix, valor, cidade, txid, payload)
         
         # Renderizar resultado
         return render_template('result.html',
                              payload=payload,
-                             qr_image=f"/qrcodes/{temp_filename}",
+                             qr_image=qr_image,
                              qr_base64=qr_base64,
                              nome=nome,
                              valor=valor,
                              cidade=cidade)
     
+    except SobrecargaError as e:
+        response = make_response(render_template('generate.html', error=str(e)), e.status)
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
     except ValueError as e:
         return render_template('generate.html', error=f"Erro de valor: {str(e)}")
     except Exception as e:
         return render_template('generate.html', error=f"Erro ao gerar PIX: {str(e)}")
 
+@app.route('/generate/result/<token>.png', methods=['GET'])
+def generate_result_image(token):
+    """QR Code de um resultado do formulário web (mantido em memória por PIX_RESULT_TTL)"""
+    png_bytes = result_store.get(token)
+    if png_bytes is None:
+        abort(404)
+    
+    response = make_response(png_bytes)
+    response.mimetype = 'image/png'
+    response.headers['Cache-Control'] = f"private, max-age={int(app.config['PIX_RESULT_TTL'])}"
+    return response
+
 @app.route('/api/v1/pix/generate', methods=['POST'])
 def api_generate_pix():
     """
@@ -115,47 +460,123 @@ def api_generate_pix():
         "return_image": true,
         "image_format": "base64"  # ou "url"
     }
+    
+    Com "location" (URL do payload criada no PSP), gera o BR Code dinâmico:
+    chavepix/valor/txid não entram no código e a imagem é cacheada por location.
+    
+    Retentativas com o mesmo cabeçalho Idempotency-Key (ou, sem ele, com o
+    mesmo txid, recebedor e valor) recebem a resposta original sem nova geração.
     """
+    chave = _chave_idempotencia(request.get_json(silent=True))
+    if chave is None:
+        return _gerar_pix_api()
+    
     try:
-        # Verificar se é JSON
-        if not request.is_json:
-            return jsonify({
-                "success": False,
-                "error": "Content-Type deve ser application/json"
-            }), 400
-        
-        data = request.get_json()
-        
-        # Validar campos obrigatórios
-        required_fields = ['nome', 'chavepix', 'cidade']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                return jsonify({
-                    "success": False,
-                    "error": f"Campo '{field}' é obrigatório"
-                }), 400
+        status, corpo, headers, replay = idempotency.executar(
+            chave, impressao_digital(request.get_json(silent=True)),
+            lambda: _congelar_resposta(_gerar_pix_api()))
+    except ConflitoIdempotenciaError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 422
+    
+    response = app.response_class(corpo, status=status, headers=headers)
+    if replay:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _chave_idempotencia(data, indice=None):
+    """
+    Chave de idempotência de um corpo de geração (None se não aplicável).
+    `indice` é a posição do item no lote: o Idempotency-Key do lote vale item a item.
+    """
+    chave = request.headers.get('Idempotency-Key', '').strip()
+    if chave:
+        return f"key:{chave}" if indice is None else f"key:{chave}:{indice}"
+    
+    if not app.config['PIX_IDEMPOTENCY_AUTO_KEY']:
+        return None
+    
+    # Sem cabeçalho: cobranças com txid são identificadas pelo próprio corpo
+    if not isinstance(data, dict):
+        return None
+    txid = str(data.get('txid') or '').strip()
+    if not txid or txid == '***':
+        return None
+    return f"auto:{impressao_digital(data)}"
+
+def _congelar_resposta(rv):
+    """Converte o retorno de uma view em (status, corpo, headers) armazenáveis"""
+    response = app.make_response(rv)
+    headers = {'Content-Type': response.headers['Content-Type']}
+    if 'Retry-After' in response.headers:
+        headers['Retry-After'] = response.headers['Retry-After']
+    return response.status_code, response.get_data(), headers
+
+def _gerar_pix_api():
+    """Gera o PIX a partir do JSON da requisição atual"""
+    # Verificar se é JSON
+    if not request.is_json:
+        return jsonify({
+            "success": False,
+            "error": "Content-Type deve ser application/json"
+        }), 400
+    
+    return _resposta_json(*_gerar_pix(request.get_json(silent=True)))
+
+def _resposta_json(resposta, status, headers):
+    response = jsonify(resposta)
+    response.status_code = status
+    response.headers.update(headers)
+    return response
+
+def _gerar_pix(corpo, agrupar=True):
+    """
+    Gera o PIX de um corpo JSON já decodificado (pedido único ou item de lote).
+    Com `agrupar`, pedidos simples passam pelo micro-batching (se ativo).
+    Retorna (resposta, status, headers).
+    """
+    try:
+        # Tipos, tamanhos e formato do valor conferidos antes de qualquer geração
+        dinamico = isinstance(corpo, dict) and bool(corpo.get('location'))
+        data = (SCHEMA_GERACAO_DINAMICA if dinamico else SCHEMA_GERACAO).validar(corpo)
+        nome = data['nome']
+        chavepix = data['chavepix']
+        valor = data['valor']
+        cidade = data['cidade']
+        txid = data['txid']
+        return_image = data['return_image']
+        image_format = data['image_format']
+        location = normalizar_location(data['location']) if data['location'] else None
         
-        # Obter parâmetros
-        nome = data.get('nome', '').strip()
-        chavepix = data.get('chavepix', '').strip()
-        valor = data.get('valor', '0.00').strip()
-        cidade = data.get('cidade', '').strip()
-        txid = data.get('txid', '').strip()
-        return_image = data.get('return_image', False)
-        image_format = data.get('image_format', 'base64')
+        if app.config['PIX_KEY_CHECK'] and not location:
+            erro_chave = classificar_chave(chavepix)[2]
+            if erro_chave:
+                raise ErroValidacao('chavepix', erro_chave)
         
-        # Gerar payload PIX
-        payload_gen = Payload(
-            nome=nome,
-            chavepix=chavepix,
-            valor=valor,
-            cidade=cidade,
-            txtId=txid,
-            diretorio=''
-        )
+        # Pedidos só de payload passam à frente dos que pedem imagem
+        prioridade = PRIORIDADE_IMAGEM if return_image or data['outputs'] else PRIORIDADE_PAYLOAD
         
-        payload = payload_gen.gerarPayload()
-        qr_image = payload_gen.get_qrcode_image()
+        if data['outputs']:
+            # Todas as saídas (e o PNG padrão de qr_code) saem da mesma matriz
+            saidas = data['outputs']
+            if return_image and ('png', None) not in saidas:
+                saidas += (('png', None),)
+            payload, renderizadas = gerar_saidas_cacheadas(nome, chavepix, valor, cidade, txid,
+                                                           saidas, prioridade=prioridade,
+                                                           location=location)
+            png_bytes = renderizadas[saidas.index(('png', None))]["data"] if return_image else None
+            renderizadas = renderizadas[:len(data['outputs'])]
+        elif agrupar and microbatcher is not None:
+            payload, png_bytes = microbatcher.executar(
+                (nome, chavepix, valor, cidade, txid, bool(return_image), location), prioridade)
+        else:
+            # Gerar payload PIX (ou reaproveitar do cache)
+            payload, png_bytes = gerar_pix_cacheado(nome, chavepix, valor, cidade, txid,
+                                                    com_imagem=bool(return_image),
+                                                    prioridade=prioridade,
+                                                    location=location)
         
         # Preparar resposta
         response_data = {
@@ -170,14 +591,14 @@ def api_generate_pix():
                 "timestamp": datetime.now().isoformat()
             }
         }
+        if location:
+            response_data["data"]["location"] = location
         
         # Adicionar imagem se solicitado
         if return_image:
             if image_format == 'base64':
                 # Converter para base64
-                buffered = BytesIO()
-                qr_image.save(buffered, format="PNG")
-                qr_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
+                qr_base64 = base64.b64encode(png_bytes).decode('utf-8')
                 response_data["qr_code"] = {
                     "format": "base64",
                     "data": f"data:image/png;base64,{qr_base64}",
@@ -188,7 +609,8 @@ def api_generate_pix():
                 # Salvar arquivo e retornar URL
                 filename = f"pix_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{hash(payload) % 10000}.png"
                 filepath = os.path.join(QR_CODE_DIR, filename)
-                qr_image.save(filepath)
+                with open(filepath, 'wb') as f:
+                    f.write(png_bytes)
                 
                 # Construir URL (ajuste conforme sua configuração)
                 base_url = request.host_url.rstrip('/')
@@ -197,19 +619,149 @@ def api_generate_pix():
                     "url": f"{base_url}/api/v1/pix/download/{filename}"
                 }
         
-        return jsonify(response_data)
+        if data['outputs']:
+            response_data["outputs"] = [{
+                "format": saida["format"],
+                "size": saida["size"],
+                "mime_type": saida["mime_type"],
+                "data": f"data:{saida['mime_type']};base64,{base64.b64encode(saida['data']).decode('utf-8')}"
+            } for saida in renderizadas]
+        
+        image_location = None
+        if return_image and image_format == 'url':
+            image_location = f"/api/v1/pix/download/{filename}"
+        registrar_cobranca(nome, chavepix, valor, cidade, txid, payload, image_location)
+        
+        return response_data, 200, {}
+    
+    except SobrecargaError as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }, e.status, {'Retry-After': str(e.retry_after)}
+    
+    except ErroValidacao as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "field": e.campo
+        }, 400, {}
     
     except ValueError as e:
-        return jsonify({
+        return {
             "success": False,
             "error": f"Erro de validação: {str(e)}"
-        }), 400
+        }, 400, {}
     
     except Exception as e:
-        return jsonify({
+        return {
             "success": False,
             "error": f"Erro interno: {str(e)}"
-        }), 500
+        }, 500, {}
+
+@app.route('/api/v1/pix/generate/batch', methods=['POST'])
+def api_generate_pix_batch():
+    """
+    Gera várias cobranças em uma requisição (usado pelo pix_client.py para agrupar
+    chamadas concorrentes). Formato esperado (JSON):
+    {
+        "charges": [{...mesmo corpo de /api/v1/pix/generate...}, ...]
+    }
+    
+    Cada item é validado e gerado de forma independente: "results" traz, na mesma
+    ordem, a resposta que o item teria sozinho mais o seu "status". A idempotência
+    vale por item, com as mesmas chaves de /api/v1/pix/generate (o Idempotency-Key
+    do lote combinado com a posição do item); um item reenviado traz
+    "idempotent_replayed": true.
+    """
+    if not request.is_json:
+        return jsonify({
+            "success": False,
+            "error": "Content-Type deve ser application/json"
+        }), 400
+    
+    corpo = request.get_json(silent=True)
+    cobrancas = corpo.get('charges') if isinstance(corpo, dict) else None
+    if not isinstance(cobrancas, list) or not cobrancas:
+        return jsonify({
+            "success": False,
+            "error": "Campo 'charges' deve ser uma lista não vazia",
+            "field": "charges"
+        }), 400
+    if len(cobrancas) > app.config['PIX_BATCH_MAX_ITEMS']:
+        return jsonify({
+            "success": False,
+            "error": f"Campo 'charges' aceita no máximo {app.config['PIX_BATCH_MAX_ITEMS']} itens",
+            "field": "charges"
+        }), 400
+    
+    resultados = [_gerar_item_lote(cobranca, _chave_idempotencia(cobranca, indice))
+                  for indice, cobranca in enumerate(cobrancas)]
+    
+    return jsonify({
+        "success": True,
+        "count": len(resultados),
+        "results": resultados
+    })
+
+def _gerar_item_lote(cobranca, chave):
+    """Resposta de um item do lote (com "status"), passando pelo armazenamento de idempotência"""
+    if chave is None:
+        resposta, status, _ = _gerar_pix(cobranca, agrupar=False)
+        resposta["status"] = status
+        return resposta
+    
+    try:
+        status, corpo, _, replay = idempotency.executar(
+            chave, impressao_digital(cobranca),
+            lambda: _congelar_resposta(_resposta_json(*_gerar_pix(cobranca, agrupar=False))))
+    except ConflitoIdempotenciaError as e:
+        return {"success": False, "error": str(e), "status": 422}
+    
+    resposta = json.loads(corpo)
+    resposta["status"] = status
+    if replay:
+        resposta["idempotent_replayed"] = True
+    return resposta
+
+@app.route('/api/v1/pix/keys/validate', methods=['POST'])
+def api_validate_keys():
+    """
+    Classifica e valida uma lista de chaves PIX em uma passagem. Formato esperado (JSON):
+    {
+        "keys": ["12345678909", "+5511987654321", "loja@email.com", ...]
+    }
+    """
+    corpo = request.get_json(silent=True)
+    chaves = corpo.get('keys') if isinstance(corpo, dict) else None
+    if not isinstance(chaves, list) or not all(isinstance(chave, str) for chave in chaves):
+        return jsonify({
+            "success": False,
+            "error": "Campo 'keys' deve ser uma lista de textos",
+            "field": "keys"
+        }), 400
+    if len(chaves) > app.config['PIX_KEYS_MAX_ITEMS']:
+        return jsonify({
+            "success": False,
+            "error": f"Campo 'keys' aceita no máximo {app.config['PIX_KEYS_MAX_ITEMS']} itens",
+            "field": "keys"
+        }), 400
+    
+    resultados = validar_chaves(chaves)
+    validas = sum(1 for resultado in resultados if resultado[3])
+    return jsonify({
+        "success": True,
+        "count": len(resultados),
+        "valid": validas,
+        "invalid": len(resultados) - validas,
+        "results": [{
+            "key": chave,
+            "type": tipo or None,
+            "normalized": normalizada,
+            "valid": valida,
+            "error": erro or None
+        } for chave, tipo, normalizada, valida, erro in resultados]
+    })
 
 @app.route('/api/v1/pix/download/<filename>', methods=['GET'])
 def download_qrcode(filename):
@@ -241,32 +793,111 @@ def validate_payload():
                 "error": "Content-Type deve ser application/json"
             }), 400
         
-        data = request.get_json()
-        payload = data.get('payload', '')
+        payload = SCHEMA_VALIDACAO.validar(request.get_json(silent=True))['payload']
         
-        if not payload:
-            return jsonify({
-                "success": False,
-                "error": "Payload é obrigatório"
-            }), 400
-        
-        # Aqui você pode adicionar validações específicas
-        # Por enquanto, apenas verifica estrutura básica
-        is_valid = len(payload) > 50 and payload.startswith('000201')
+        # Decodifica o layout TLV e confere o CRC16
+        txid, valor, chave, nome, cidade, crc_valido, erro = decodificar_brcode(payload)
+        is_valid = payload.startswith('000201') and crc_valido and not erro
         
         return jsonify({
             "success": True,
             "valid": is_valid,
             "payload_length": len(payload),
-            "checksum_valid": True  # Implementar validação CRC16 se necessário
+            "checksum_valid": crc_valido,
+            "error": erro or None,
+            "data": {
+                "nome": nome,
+                "chavepix": chave,
+                "valor": valor,
+                "cidade": cidade,
+                "txid": txid
+            }
         })
     
+    except ErroValidacao as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "field": e.campo
+        }), 400
+
     except Exception as e:
         return jsonify({
             "success": False,
             "error": f"Erro na validação: {str(e)}"
         }), 500
 
+def _formatar_cobranca(registro):
+    """Converte um registro do banco para a resposta da API"""
+    registro = dict(registro)
+    registro["created_at"] = datetime.fromtimestamp(registro["created_at"]).isoformat()
+    if registro.get("image_location"):
+        registro["image_url"] = request.host_url.rstrip('/') + registro["image_location"]
+    return registro
+
+def _ler_data(parametro):
+    """Lê um parâmetro de data ISO 8601 da query string (epoch ou None)"""
+    texto = request.args.get(parametro)
+    if not texto:
+        return None
+    return datetime.fromisoformat(texto).timestamp()
+
+@app.route('/api/v1/pix/charges/<txid>', methods=['GET'])
+def get_charge(txid):
+    """
+    Consulta cobranças já geradas pelo txid (sem gerar novamente). O txid é
+    normalizado como no payload: "PED-1" encontra a cobrança gravada como "PED1".
+    """
+    if registry is None:
+        return jsonify({
+            "success": False,
+            "error": "Registro de cobranças desabilitado"
+        }), 404
+    
+    txid = normalizar_txid(txid)
+    cobrancas = registry.buscar_por_txid(txid)
+    if not cobrancas:
+        return jsonify({
+            "success": False,
+            "error": "Cobrança não encontrada"
+        }), 404
+    
+    return jsonify({
+        "success": True,
+        "txid": txid,
+        "charges": [_formatar_cobranca(c) for c in cobrancas]
+    })
+
+@app.route('/api/v1/pix', methods=['GET'])
+@app.route('/api/v1/pix/charges', methods=['GET'])
+def list_charges():
+    """
+    Lista cobranças geradas em um intervalo de tempo.
+    Parâmetros: since, until (ISO 8601) e limit (1 a 1000)
+    """
+    if registry is None:
+        return jsonify({
+            "success": False,
+            "error": "Registro de cobranças desabilitado"
+        }), 404
+    
+    try:
+        inicio = _ler_data('since')
+        fim = _ler_data('until')
+        limite = max(1, min(int(request.args.get('limit', 100)), 1000))
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": f"Parâmetro inválido: {str(e)}"
+        }), 400
+    
+    cobrancas = registry.buscar_por_periodo(inicio, fim, limite)
+    return jsonify({
+        "success": True,
+        "count": len(cobrancas),
+        "charges": [_formatar_cobranca(c) for c in cobrancas]
+    })
+
 @app.route('/api/v1/health', methods=['GET'])
 def health_check():
     """Endpoint de saúde da API"""
@@ -274,7 +905,57 @@ def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "service": "PIX QR Code Generator API",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        # Recursos opcionais anunciados aos clientes (pix_client.py)
+        "features": ["batch", "outputs", "location", "keys"],
+        "key_check": app.config['PIX_KEY_CHECK'],
+        "batch_max_items": app.config['PIX_BATCH_MAX_ITEMS'],
+        "startup": startup_info,
+        "admission": admission.estatisticas(),
+        "render_cache": render_cache.estatisticas(),
+        "result_store": result_store.estatisticas(),
+        "render_engine": motor_render.estatisticas() if motor_render else None,
+        "microbatch": microbatcher.estatisticas() if microbatcher else None,
+        "catalog": catalog_warmer.status if catalog_warmer else None,
+        "registry": registry.estatisticas() if registry else None,
+        "idempotency": idempotency.estatisticas()
+    })
+
+@app.route('/api/v1/debug/memory', methods=['GET'])
+def debug_memory():
+    """
+    Memória do worker: RSS, etapas rastreadas, principais locais de alocação
+    e tamanho dos caches. Disponível apenas com PIX_MEMORY_TRACE=true.
+    Parâmetros: limit (1 a 100, padrão 20) e group (lineno ou filename)
+    """
+    if not app.config['PIX_MEMORY_TRACE']:
+        return jsonify({
+            "success": False,
+            "error": "Diagnóstico de memória desabilitado (PIX_MEMORY_TRACE)"
+        }), 404
+    
+    try:
+        limite = max(1, min(int(request.args.get('limit', 20)), 100))
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": f"Parâmetro inválido: {str(e)}"
+        }), 400
+    
+    agrupar = 'filename' if request.args.get('group') == 'filename' else 'lineno'
+    return jsonify({
+        "success": True,
+        "pid": os.getpid(),
+        "memory": memoria.estatisticas(),
+        "top_allocations": memoria.top_alocacoes(limite, agrupar),
+        "caches": {
+            "render_cache": render_cache.estatisticas(),
+            "result_store": result_store.estatisticas(),
+            "idempotency": idempotency.estatisticas(),
+            "pages": paginas_cache.estatisticas(),
+            "normalizar_texto": normalizar_texto.cache_info()._asdict(),
+            "registry": registry.estatisticas() if registry else None
+        }
     })
 
 @app.route('/qrcodes/<filename>')
@@ -326,6 +1007,7 @@ def favicon():
 
 # Dentro da função create_app ou após a definição das rotas principais
 @app.route('/sitemap.xml')
+@pagina_em_cache
 def sitemap():
     try:
         """Gera o sitemap.xml dinamicamente[citation:1]"""
@@ -352,7 +1034,24 @@ def sitemap():
         app.logger.error(f"Erro ao gerar sitemap: {e}")
         return jsonify({"error": "Erro interno"}), 500
 
+startup_info["import_seconds"] = round(time.perf_counter() - _INICIO_IMPORTACAO, 4)
+
+# Fora do gunicorn (ex.: WSGI do PythonAnywhere), PIX_WARMUP=true aquece na importação.
+# Nenhuma thread é iniciada aqui: com preload_app o gunicorn importa o app no master
+# e um fork com a thread do catálogo em andamento herdaria locks ocupados.
+if os.environ.get('PIX_WARMUP', 'False').lower() == 'true':
+    warmup()
+    if catalog_warmer is not None:
+        catalog_warmer.executar()
+
 if __name__ == '__main__':
+    warmup()
+    
+    # Servidor de desenvolvimento: catálogo em segundo plano
+    # (no gunicorn, on_starting o aquece antes do fork)
+    if catalog_warmer is not None:
+        catalog_warmer.iniciar()
+    
     # Configurações do servidor
     host = os.environ.get('FLASK_HOST', '0.0.0.0')
     port = int(os.environ.get('FLASK_PORT', 5000))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do caminho validação + serialização JSON da API (via test_client,
+sem custo de socket), com o render cache já quente.
+
+Uso:
+    python benchmarks/bench_api.py [--n 5000]
+    PIX_JSON_ENCODER=stdlib python benchmarks/bench_api.py   # sem orjson
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('PIX_REGISTRY_PATH', os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+from app import app, registry
+
+VALIDO = {"nome": "Loja Exemplo", "chavepix": "loja@email.com", "valor": "150.50",
+          "cidade": "Sao Paulo"}
+
+
+def medir(cliente, n, metodo, url, corpo=None):
+    dados = json.dumps(corpo) if corpo is not None else None
+    chamar = getattr(cliente, metodo)
+    status = chamar(url, data=dados, content_type='application/json').status_code
+    inicio = time.perf_counter()
+    for _ in range(n):
+        chamar(url, data=dados, content_type='application/json')
+    return status, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=5000)
+    args = parser.parse_args()
+
+    # Sem chave automática de idempotência e sem gravar no registro a cada pedido
+    app.config['PIX_IDEMPOTENCY_AUTO_KEY'] = False
+    cliente = app.test_client()
+
+    payload = cliente.post('/api/v1/pix/generate', json=VALIDO).get_json()['payload']
+    for i in range(500):
+        registry.registrar(f"PED{i}", "loja@email.com", "10.00", "Loja Exemplo", "Sao Paulo", payload)
+    registry.flush()
+
+    casos = [
+        ("generate válido (cache quente)", 'post', '/api/v1/pix/generate', VALIDO),
+        ("generate valor inválido", 'post', '/api/v1/pix/generate', dict(VALIDO, valor="12,3x")),
+        ("generate nome com 10k caracteres", 'post', '/api/v1/pix/generate', dict(VALIDO, nome="A" * 10000)),
+        ("validate", 'post', '/api/v1/pix/validate', {"payload": payload}),
+        ("listagem de 500 cobranças", 'get', '/api/v1/pix?limit=500', None),
+    ]
+    for nome, metodo, url, corpo in casos:
+        n = args.n if metodo == 'post' else max(args.n // 20, 1)
+        status, decorrido = medir(cliente, n, metodo, url, corpo)
+        print(f"{nome:36s} [{status}] {n / decorrido:9.0f} req/s  {decorrido / n * 1e6:9.1f} us/req")
+
+
+if __name__ == '__main__':
+    main()
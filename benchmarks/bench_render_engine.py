@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Escalabilidade do motor de renderização: PNGs por segundo com 1..N processos,
+comparados à renderização no próprio processo (limitada a um núcleo pelo GIL).
+
+Uso:
+    python benchmarks/bench_render_engine.py [--n 2000] [--max-processos 8]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from payload_generator import Payload
+from render_engine import MotorRenderizacao
+
+
+def cobrancas(n):
+    return [("Loja Exemplo", f"cliente{i}@email.com", f"{i % 997 + 1}.{i % 100:02d}", "Sao Paulo", f"BENCH{i}")
+            for i in range(n)]
+
+
+def no_processo(lista):
+    for cobranca in lista:
+        payload_gen = Payload(*cobranca, diretorio='')
+        payload_gen.gerarPayload(gerar_qrcode=False)
+        payload_gen.gerarPng()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=2000, help="Cobranças por medição (padrão: 2000)")
+    parser.add_argument('--max-processos', type=int, default=os.cpu_count() or 1,
+                        help="Maior número de processos medido (padrão: nº de CPUs)")
+    args = parser.parse_args()
+
+    lista = cobrancas(args.n)
+    no_processo(lista[:50])
+    inicio = time.perf_counter()
+    no_processo(lista)
+    base = args.n / (time.perf_counter() - inicio)
+    print(f"CPUs: {os.cpu_count()}")
+    print(f"{'no processo':>14s}  {base:8.0f} PNG/s  1.00x")
+
+    for processos in range(1, args.max_processos + 1):
+        motor = MotorRenderizacao(processos=processos)
+        inicio = time.perf_counter()
+        motor.iniciar()
+        partida = time.perf_counter() - inicio
+        try:
+            inicio = time.perf_counter()
+            erros = sum(1 for _, _, erro in motor.renderizar_lote(lista) if erro is not None)
+            taxa = args.n / (time.perf_counter() - inicio)
+        finally:
+            motor.fechar()
+        print(f"{processos:>4d} processos  {taxa:8.0f} PNG/s  {taxa / base:4.2f}x"
+              f"  (partida {partida:.2f}s, erros {erros})")
+
+
+if __name__ == '__main__':
+    main()
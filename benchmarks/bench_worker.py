@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: worker sidecar (Unix socket) x endpoint /api/v1/pix/generate,
+ambos apenas para payload (sem imagem).
+
+Uso:
+    python benchmarks/bench_worker.py [--n 5000] [--pipeline 64]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('PIX_REGISTRY_PATH', os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+import pix_worker
+from app import app
+
+
+def cobranca(i):
+    return ("Loja Exemplo", f"cliente{i}@email.com", f"{i % 500 + 1}.00", "Sao Paulo", f"PED{i}")
+
+
+class _HandlerSilencioso(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def bench_http(n):
+    servidor = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_HandlerSilencioso)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    conn = http.client.HTTPConnection('127.0.0.1', servidor.server_port)
+    headers = {'Content-Type': 'application/json'}
+
+    inicio = time.perf_counter()
+    for i in range(n):
+        nome, chave, valor, cidade, txid = cobranca(i)
+        corpo = json.dumps({"nome": nome, "chavepix": chave, "valor": valor,
+                            "cidade": cidade, "txid": txid})
+        conn.request('POST', '/api/v1/pix/generate', corpo, headers)
+        conn.getresponse().read()
+    decorrido = time.perf_counter() - inicio
+
+    conn.close()
+    servidor.shutdown()
+    return decorrido
+
+
+def bench_worker(n, pipeline):
+    caminho = os.path.join(tempfile.mkdtemp(), 'pix.sock')
+    threading.Thread(target=pix_worker.servir_socket, args=(caminho,), daemon=True).start()
+    while not os.path.exists(caminho):
+        time.sleep(0.01)
+    cliente = pix_worker.WorkerClient(caminho)
+
+    inicio = time.perf_counter()
+    for base in range(0, n, pipeline):
+        cliente.enviar([cobranca(i) for i in range(base, min(base + pipeline, n))])
+    decorrido = time.perf_counter() - inicio
+
+    cliente.close()
+    return decorrido
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=5000)
+    parser.add_argument('--pipeline', type=int, default=64)
+    args = parser.parse_args()
+
+    # Desliga a chave automática de idempotência para medir a geração em si
+    app.config['PIX_IDEMPOTENCY_AUTO_KEY'] = False
+
+    resultados = [
+        ("HTTP /api/v1/pix/generate (keep-alive)", bench_http(args.n)),
+        ("worker, 1 pedido por vez", bench_worker(args.n, 1)),
+        (f"worker, pipeline de {args.pipeline}", bench_worker(args.n, args.pipeline)),
+    ]
+    for nome, decorrido in resultados:
+        print(f"{nome:42s} {args.n / decorrido:10.0f} req/s  "
+              f"{decorrido / args.n * 1e6:8.1f} us/req")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de longa duração da memória: gera muitas cobranças distintas (todas
+faltas no cache, com imagem) e verifica que o RSS para de crescer depois que
+os caches enchem. Sai com código 1 se o crescimento passar do limite.
+
+Uso:
+    python benchmarks/soak_memory.py [--n 20000] [--limite-mb 24] [--trace]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=20000, help="Gerações (padrão: 20000)")
+    parser.add_argument('--aquecimento', type=float, default=0.25,
+                        help="Fração inicial ignorada enquanto os caches enchem (padrão: 0.25)")
+    parser.add_argument('--limite-mb', type=float, default=24,
+                        help="Crescimento máximo do RSS após o aquecimento (padrão: 24 MB)")
+    parser.add_argument('--cache', type=int, default=512, help="PIX_RENDER_CACHE_SIZE do teste")
+    parser.add_argument('--trace', action='store_true', help="Liga o tracemalloc e mostra as etapas")
+    args = parser.parse_args()
+
+    # Configuração antes de importar o app
+    os.environ['PIX_RENDER_CACHE_SIZE'] = str(args.cache)
+    os.environ['PIX_IDEMPOTENCY_MAX_ENTRIES'] = str(args.cache)
+    os.environ.setdefault('PIX_REGISTRY_PATH', os.path.join(tempfile.mkdtemp(), 'soak.db'))
+    if args.trace:
+        os.environ['PIX_MEMORY_TRACE'] = 'true'
+
+    from app import app, memoria, registry
+    from pix_memory import rss_bytes
+
+    cliente = app.test_client()
+    inicio_medicao = int(args.n * args.aquecimento)
+    amostras = []
+    base = None
+    t0 = time.perf_counter()
+
+    for i in range(args.n):
+        resposta = cliente.post('/api/v1/pix/generate', json={
+            "nome": "Loja Exemplo", "chavepix": f"cliente{i}@email.com",
+            "valor": f"{i % 997 + 1}.{i % 100:02d}", "cidade": "Sao Paulo",
+            "txid": f"SOAK{i}", "return_image": True,
+        })
+        if resposta.status_code != 200:
+            print(f"Falha na geração {i}: {resposta.status_code} {resposta.get_data(as_text=True)[:200]}")
+            return 2
+
+        if i == inicio_medicao:
+            if registry is not None:
+                registry.flush()
+            base = rss_bytes()
+        if (i + 1) % max(1, args.n // 20) == 0:
+            amostras.append((i + 1, rss_bytes()))
+            print(f"{i + 1:8d} gerações  RSS {amostras[-1][1] / 2**20:8.1f} MB")
+
+    if registry is not None:
+        registry.flush()
+    final = rss_bytes()
+    crescimento = (final - base) / 2**20
+    decorrido = time.perf_counter() - t0
+
+    print(f"\n{args.n} gerações em {decorrido:.1f}s; RSS após aquecimento {base / 2**20:.1f} MB, "
+          f"final {final / 2**20:.1f} MB (crescimento {crescimento:+.1f} MB, limite {args.limite_mb} MB)")
+
+    if args.trace:
+        for nome, etapa in memoria.estatisticas()["stages"].items():
+            media = etapa["retained_bytes"] / max(1, etapa["calls"])
+            print(f"  etapa {nome:10s} {etapa['calls']:8d} chamadas  retido médio {media:10.1f} B")
+        for alocacao in memoria.top_alocacoes(10):
+            print(f"  {alocacao['size_bytes'] / 1024:10.1f} KB  {alocacao['count']:8d}  {alocacao['site']}")
+
+    if crescimento > args.limite_mb:
+        print("FALHA: RSS continuou crescendo após o aquecimento")
+        return 1
+    print("OK: RSS estável")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
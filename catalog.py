@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Catálogo de cobranças frequentes (recebedores e preços fixos) para pré-aquecer
+o cache de QR Codes na inicialização.
+
+Formato (JSON ou YAML):
+    {
+        "merchants": [
+            {
+                "nome": "Padaria Central",
+                "chavepix": "padaria@email.com",
+                "cidade": "Sao Paulo",
+                "valores": ["5.00", "10.00", "12.50"],
+                "txids": ["BALCAO"]          # opcional (padrão: sem txid)
+            }
+        ]
+    }
+"""
+
+import json
+import os
+import threading
+import time
+
+
+def carregar_catalogo(caminho):
+    """Lê o catálogo e retorna a lista de cobranças (nome, chavepix, valor, cidade, txid)"""
+    with open(caminho, encoding='utf-8') as f:
+        if caminho.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("PyYAML não instalado: use um catálogo JSON ou 'pip install pyyaml'")
+            dados = yaml.safe_load(f) or {}
+        else:
+            dados = json.load(f)
+
+    cobrancas = []
+    for perfil in dados.get('merchants', []):
+        nome = str(perfil['nome']).strip()
+        chavepix = str(perfil['chavepix']).strip()
+        cidade = str(perfil['cidade']).strip()
+        txids = perfil.get('txids') or ['']
+        for valor in perfil.get('valores') or ['0.00']:
+            for txid in txids:
+                cobrancas.append((nome, chavepix, str(valor).strip(), cidade, str(txid).strip()))
+    return cobrancas
+
+
+class PreaquecedorCatalogo():
+    """Renderiza as cobranças do catálogo em segundo plano, reportando o progresso"""
+
+    def __init__(self, caminho, gerar):
+        """
+        Args:
+            caminho: Arquivo do catálogo
+            gerar: Função (nome, chavepix, valor, cidade, txid) que gera e armazena no cache
+        """
+        self.caminho = caminho
+        self.gerar = gerar
+        self._lock = threading.Lock()
+        self._pid = None
+        self.status = {
+            "path": caminho,
+            "state": "idle",
+            "total": 0,
+            "done": 0,
+            "errors": 0,
+            "seconds": None,
+            "last_error": None
+        }
+
+    def iniciar(self):
+        """Inicia o pré-aquecimento (uma vez por processo; seguro após fork)"""
+        with self._lock:
+            if self._pid == os.getpid() or self.status["state"] == "done":
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._executar, name='preaquecimento-catalogo', daemon=True).start()
+
+    def executar(self):
+        """Pré-aquece na thread atual (ex.: no master do gunicorn, antes do fork e do gc.freeze)"""
+        with self._lock:
+            if self._pid == os.getpid() or self.status["state"] == "done":
+                return
+            self._pid = os.getpid()
+        self._executar()
+
+    def _executar(self):
+        inicio = time.perf_counter()
+        try:
+            cobrancas = carregar_catalogo(self.caminho)
+        except Exception as e:
+            self.status.update(state="error", last_error=str(e))
+            return
+
+        self.status.update(state="running", total=len(cobrancas), done=0, errors=0)
+        for cobranca in cobrancas:
+            try:
+                self.gerar(*cobranca)
+            except Exception as e:
+                self.status["errors"] += 1
+                self.status["last_error"] = str(e)
+            self.status["done"] += 1
+
+        self.status.update(state="done", seconds=round(time.perf_counter() - inicio, 3))
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Configuração do gunicorn para a API PIX.
+
+Uso:
+    gunicorn -c gunicorn.conf.py app:app
+
+O app é carregado e pré-aquecido uma única vez no processo master; os workers
+são criados por fork e compartilham as páginas já aquecidas (copy-on-write).
+"""
+
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Com vários workers, o token de um resultado do formulário pode ser pedido a outro
+# processo: a imagem vai embutida na página (definido antes da importação do app)
+if workers > 1:
+    os.environ.setdefault('PIX_RESULT_MODE', 'inline')
+
+# Importa o app no master, antes do fork
+preload_app = True
+
+
+def on_starting(server):
+    """Pré-aquece o app e o catálogo no master (com preload_app ele já está importado)"""
+    from app import warmup, startup_info, catalog_warmer
+
+    warmup()
+    server.log.info(f"App importado em {startup_info['import_seconds']}s, "
+                    f"warm-up em {startup_info['warmup_seconds']}s")
+
+    # Síncrono: nenhuma thread do master pode estar ativa (segurando locks) no fork,
+    # e o gc.freeze() abaixo deve ver o cache já completo
+    if catalog_warmer is not None:
+        catalog_warmer.executar()
+        server.log.info(f"Catálogo: {catalog_warmer.status}")
+
+    # Move os objetos do warm-up para a geração permanente do GC, evitando que
+    # as coletas nos workers toquem (e copiem) essas páginas
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Retoma no worker o pré-aquecimento do catálogo se ele falhou no master"""
+    from app import catalog_warmer
+
+    if catalog_warmer is not None:
+        catalog_warmer.iniciar()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suporte a chaves de idempotência para a API de geração de PIX.
+Guarda a resposta completa de cada requisição concluída e a reenvia, byte a byte,
+quando o cliente repete a chamada. Duplicatas simultâneas aguardam a primeira.
+"""
+
+import hashlib
+import json
+import threading
+
+from pix_cache import TTLCache
+
+# Recusas do controle de admissão: repassadas às duplicatas, que devem respeitar o Retry-After
+_STATUS_SOBRECARGA = frozenset((429, 503))
+
+
+class ConflitoIdempotenciaError(Exception):
+    """Mesma chave de idempotência usada com um corpo de requisição diferente"""
+
+
+class _EmAndamento():
+    """Requisição sendo processada; duplicatas aguardam o evento"""
+
+    __slots__ = ('evento', 'impressao', 'resultado', 'recusada')
+
+    def __init__(self, impressao):
+        self.evento = threading.Event()
+        self.impressao = impressao
+        self.resultado = None
+        self.recusada = False
+
+
+def impressao_digital(dados):
+    """Hash canônico do corpo da requisição"""
+    canonico = json.dumps(dados, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()
+
+
+class IdempotencyStore():
+    def __init__(self, max_entradas=4096, ttl=86400.0, timeout_espera=30.0, max_bytes=None):
+        """
+        Args:
+            max_entradas: Número máximo de respostas armazenadas
+            ttl: Tempo que uma resposta fica disponível para replay, em segundos
+            timeout_espera: Tempo máximo que uma duplicata aguarda a original
+            max_bytes: Total máximo de bytes dos corpos armazenados (None = sem limite)
+        """
+        self.respostas = TTLCache(max_entradas=max_entradas, ttl=ttl, max_bytes=max_bytes,
+                                  tamanho=lambda item: len(item[1][1]))
+        self.timeout_espera = float(timeout_espera)
+
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+
+        self.replays = 0
+        self.coalescidas = 0
+
+    def executar(self, chave, impressao, gerar):
+        """
+        Executa `gerar` uma única vez por chave.
+
+        `gerar` deve retornar uma tupla (status, corpo, headers). Retorna a mesma
+        tupla acrescida de um booleano indicando se foi um replay.
+        """
+        while True:
+            armazenada = self.respostas.get(chave)
+            if armazenada is not None:
+                if armazenada[0] != impressao:
+                    raise ConflitoIdempotenciaError(
+                        "Idempotency-Key já utilizada com outro corpo de requisição")
+                self.replays += 1
+                return armazenada[1] + (True,)
+
+            with self._lock:
+                pendente = self._em_andamento.get(chave)
+                if pendente is None:
+                    pendente = _EmAndamento(impressao)
+                    self._em_andamento[chave] = pendente
+                    lider = True
+                else:
+                    lider = False
+
+            if lider:
+                break
+
+            if pendente.impressao != impressao:
+                raise ConflitoIdempotenciaError(
+                    "Idempotency-Key já utilizada com outro corpo de requisição")
+
+            # Duplicata concorrente: aguarda a requisição original terminar
+            if pendente.evento.wait(self.timeout_espera) and pendente.resultado is not None:
+                if pendente.recusada:
+                    return pendente.resultado + (False,)
+                self.coalescidas += 1
+                return pendente.resultado + (True,)
+            # A original falhou (erro interno) ou demorou demais; tenta novamente
+
+        try:
+            resultado = gerar()
+            # Erros transitórios (sobrecarga, falhas internas) não são memorizados
+            status = resultado[0]
+            if status < 500 and status != 429:
+                self.respostas.set(chave, (impressao, resultado))
+                pendente.resultado = resultado
+            elif status in _STATUS_SOBRECARGA:
+                # As duplicatas recebem a mesma recusa, não um replay
+                pendente.resultado = resultado
+                pendente.recusada = True
+            return resultado + (False,)
+        finally:
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+            pendente.evento.set()
+
+    def estatisticas(self):
+        """Retorna contadores do armazenamento"""
+        dados = self.respostas.estatisticas()
+        dados.update({
+            "in_flight": len(self._em_andamento),
+            "replays": self.replays,
+            "coalesced": self.coalescidas,
+        })
+        return dados
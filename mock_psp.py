@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PSP simulado para testes locais do BR Code dinâmico.
+
+Imita o essencial da API Pix (cobrança imediata) e do endpoint de location:
+    PUT  /v2/cob/<txid>    cria a cobrança (txid informado)
+    POST /v2/cob           cria a cobrança (txid gerado)
+    GET  /v2/cob/<txid>    consulta a cobrança
+    GET  /qr/v2/<id>       payload da location, como JWS (application/jose)
+
+A resposta da criação traz "location" e "pixCopiaECola" (gerado com
+Payload.dinamico). O JWS é assinado com HMAC-SHA256 apenas para testes;
+PSPs reais assinam com chave assimétrica publicada via jku/x5u.
+
+Uso:
+    python mock_psp.py [--port 5001] [--nome "Loja Exemplo"] [--cidade "Sao Paulo"]
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import Flask, request, jsonify, abort
+
+from payload_generator import Payload
+
+
+def _b64url(dados):
+    return base64.urlsafe_b64encode(dados).rstrip(b'=').decode('ascii')
+
+
+def _b64url_decode(texto):
+    return base64.urlsafe_b64decode(texto + '=' * (-len(texto) % 4))
+
+
+def assinar_jws(conteudo, segredo):
+    """JWS compacto (HS256) com o conteúdo em JSON"""
+    cabecalho = _b64url(json.dumps({"alg": "HS256", "typ": "JWT", "kid": "mock-psp"}).encode('utf-8'))
+    corpo = _b64url(json.dumps(conteudo, ensure_ascii=False).encode('utf-8'))
+    assinatura = hmac.new(segredo, f"{cabecalho}.{corpo}".encode('ascii'), hashlib.sha256).digest()
+    return f"{cabecalho}.{corpo}.{_b64url(assinatura)}"
+
+
+def ler_jws(token, segredo=None):
+    """Conteúdo de um JWS; com `segredo`, confere a assinatura (ValueError se inválida)"""
+    cabecalho, corpo, assinatura = token.split('.')
+    if segredo is not None:
+        esperada = hmac.new(segredo, f"{cabecalho}.{corpo}".encode('ascii'), hashlib.sha256).digest()
+        if not hmac.compare_digest(esperada, _b64url_decode(assinatura)):
+            raise ValueError("Assinatura do JWS inválida")
+    return json.loads(_b64url_decode(corpo))
+
+
+def criar_app(nome='LOJA EXEMPLO', cidade='SAO PAULO', segredo=None):
+    """
+    Cria o app Flask do PSP simulado.
+
+    Args:
+        nome: Nome do recebedor usado nos BR Codes gerados
+        cidade: Cidade do recebedor
+        segredo: Chave HMAC dos JWS (aleatória se None; exposta em app.config)
+    """
+    app = Flask(__name__)
+    app.config['PSP_SEGREDO'] = segredo or os.urandom(32)
+
+    lock = threading.Lock()
+    cobrancas = {}   # txid -> cobrança
+    locations = {}   # id da location -> txid
+
+    def criar(txid):
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"title": "Requisição inválida", "detail": "Corpo JSON obrigatório"}), 400
+        try:
+            original = f"{float(str(data['valor']['original']).replace(',', '.')):.2f}"
+            chave = str(data['chave']).strip()
+            expiracao = int((data.get('calendario') or {}).get('expiracao', 3600))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return jsonify({"title": "Requisição inválida",
+                            "detail": "Campos 'valor.original' e 'chave' são obrigatórios"}), 400
+
+        # Location com tamanho fixo: host + /qr/v2/ + 32 caracteres hexadecimais
+        id_location = uuid.uuid4().hex
+        location = f"{request.host}/qr/v2/{id_location}"
+        agora = datetime.now(timezone.utc).isoformat()
+        cobranca = {
+            "txid": txid,
+            "revisao": 0,
+            "calendario": {
+                "criacao": agora,
+                "expiracao": expiracao
+            },
+            "status": "ATIVA",
+            "valor": {"original": original},
+            "chave": chave,
+            "solicitacaoPagador": data.get('solicitacaoPagador', ''),
+            "loc": {"id": id_location, "location": location, "tipoCob": "cob"},
+            "location": location,
+            "pixCopiaECola": Payload.dinamico(nome, cidade, location).gerarPayload(gerar_qrcode=False),
+        }
+        with lock:
+            if txid in cobrancas:
+                return jsonify({"title": "Cobrança já existe", "detail": f"txid {txid} em uso"}), 409
+            cobrancas[txid] = cobranca
+            locations[id_location] = txid
+        return jsonify(cobranca), 201
+
+    @app.route('/v2/cob/<txid>', methods=['PUT'])
+    def criar_cobranca(txid):
+        # A API Pix exige txid alfanumérico de 26 a 35 caracteres na cobrança imediata
+        if not (txid.isascii() and txid.isalnum() and 26 <= len(txid) <= 35):
+            return jsonify({"title": "txid inválido", "detail": "Use 26 a 35 caracteres alfanuméricos"}), 400
+        return criar(txid)
+
+    @app.route('/v2/cob', methods=['POST'])
+    def criar_cobranca_sem_txid():
+        return criar(uuid.uuid4().hex)
+
+    @app.route('/v2/cob/<txid>', methods=['GET'])
+    def consultar_cobranca(txid):
+        with lock:
+            cobranca = cobrancas.get(txid)
+        if cobranca is None:
+            return jsonify({"title": "Cobrança não encontrada"}), 404
+        return jsonify(cobranca)
+
+    @app.route('/qr/v2/<id_location>', methods=['GET'])
+    def payload_location(id_location):
+        """O que o app do pagador busca ao ler o QR Code dinâmico"""
+        with lock:
+            txid = locations.get(id_location)
+            cobranca = cobrancas.get(txid) if txid else None
+        if cobranca is None:
+            abort(404)
+
+        conteudo = {
+            "revisao": cobranca["revisao"],
+            "calendario": {
+                "criacao": cobranca["calendario"]["criacao"],
+                "apresentacao": datetime.now(timezone.utc).isoformat(),
+                "expiracao": cobranca["calendario"]["expiracao"]
+            },
+            "txid": cobranca["txid"],
+            "valor": cobranca["valor"],
+            "chave": cobranca["chave"],
+            "solicitacaoPagador": cobranca["solicitacaoPagador"],
+            "status": cobranca["status"],
+            "iat": int(time.time()),
+        }
+        response = app.response_class(assinar_jws(conteudo, app.config['PSP_SEGREDO']),
+                                      mimetype='application/jose')
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="PSP simulado (BR Code dinâmico)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--nome', default='LOJA EXEMPLO')
+    parser.add_argument('--cidade', default='SAO PAULO')
+    args = parser.parse_args()
+
+    criar_app(args.nome, args.cidade).run(host=args.host, port=args.port)
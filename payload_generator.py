@@ -1,78 +1,217 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Gerador de payload PIX para QR Code estático, seguindo o padrão do Banco Central do Brasil.
+Gerador de payload PIX para QR Code estático ou dinâmico, seguindo o padrão do Banco Central do Brasil.
 Inclui funções para normalização de texto, formatação de campos e cálculo do CRC16.
 """
 
 import crcmod
-import qrcode
 import os
+import unicodedata
+from functools import lru_cache
+from io import BytesIO
+from itertools import groupby
 
+# Função CRC16-CCITT do padrão EMV (poly 0x1021, init 0xFFFF), criada uma única vez
+crc16_ccitt = crcmod.mkCrcFun(poly=0x11021, initCrc=0xFFFF, rev=False, xorOut=0x0000)
+
+# Tamanhos máximos dos campos EMV do BR Code
+TAMANHO_MAXIMO_NOME = 25     # campo 59 (Merchant Name)
+TAMANHO_MAXIMO_CIDADE = 15   # campo 60 (Merchant City)
+TAMANHO_MAXIMO_TXID = 25     # campo 62, subcampo 05 (Reference Label)
+TAMANHO_MAXIMO_VALOR = 13    # campo 54 (Transaction Amount)
+TAMANHO_MAXIMO_CAMPO = 99    # qualquer campo TLV (tamanho com 2 dígitos)
+TAMANHO_MAXIMO_LOCATION = 77 # campo 26, subcampo 25 (URL do payload no PSP, sem https://)
+
+# Saídas derivadas da matriz do QR Code (formato -> MIME)
+FORMATOS_SAIDA = {'png': 'image/png', 'svg': 'image/svg+xml'}
+PIXELS_POR_MODULO = 10       # tamanho padrão: 10 px por módulo (como qrcode box_size=10)
+TAMANHO_MAXIMO_IMAGEM = 4096 # lado máximo (px) de uma saída
+
+
+@lru_cache(maxsize=2048)
+def normalizar_texto(texto, tamanho_maximo=None):
+    """
+    Remove acentos (NFKD + ASCII), converte para maiúsculas e trunca.
+    Nomes e cidades de recebedores se repetem muito, por isso o resultado é cacheado.
+    """
+    texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
+    texto = ' '.join(texto.upper().split())
+    # O corte pode cair logo após um espaço entre palavras
+    return texto[:tamanho_maximo].rstrip() if tamanho_maximo else texto
+
+
+def normalizar_txid(txid):
+    """Identificador da transação: apenas letras e números, até 25 caracteres ('***' se vazio)"""
+    txid = unicodedata.normalize('NFKD', txid).encode('ASCII', 'ignore').decode('ASCII')
+    txid = ''.join(c for c in txid if c.isalnum())[:TAMANHO_MAXIMO_TXID]
+    return txid or '***'
+
+
+def normalizar_location(location):
+    """URL de location do BR Code dinâmico: sem esquema (https://) e sem espaços"""
+    location = location.strip()
+    for esquema in ('https://', 'http://'):
+        if location.lower().startswith(esquema):
+            location = location[len(esquema):]
+    if not location or any(c.isspace() for c in location):
+        raise ValueError("Location inválida")
+    if len(location) > TAMANHO_MAXIMO_LOCATION:
+        raise ValueError(f"Location excede {TAMANHO_MAXIMO_LOCATION} caracteres")
+    return location
+
+
+def campo_emv(id_, valor):
+    """Monta um campo TLV (ID + tamanho em bytes com 2 dígitos + valor)"""
+    tamanho = len(valor.encode('utf-8'))
+    if tamanho > TAMANHO_MAXIMO_CAMPO:
+        raise ValueError(f"Campo {id_} excede {TAMANHO_MAXIMO_CAMPO} bytes")
+    return f'{id_}{tamanho:02}{valor}'
+
+
+def imagem_da_matriz(matriz, tamanho=None):
+    """
+    Imagem PIL (modo '1') da matriz de módulos, com a borda já incluída.
+    Os módulos têm sempre um número inteiro de pixels; a sobra de `tamanho`
+    vira margem branca em volta.
+    """
+    from PIL import Image
+
+    n = len(matriz)
+    escala = PIXELS_POR_MODULO if tamanho is None else tamanho // n
+    if escala < 1:
+        raise ValueError(f"Tamanho mínimo para este QR Code: {n} px")
+
+    img = Image.frombytes('L', (n, n), bytes(0 if modulo else 255 for linha in matriz for modulo in linha))
+    img = img.resize((n * escala, n * escala), Image.NEAREST).convert('1')
+    if tamanho is not None and tamanho != n * escala:
+        tela = Image.new('1', (tamanho, tamanho), 1)
+        deslocamento = (tamanho - n * escala) // 2
+        tela.paste(img, (deslocamento, deslocamento))
+        img = tela
+    return img
 
-class Payload():
-    def __init__(self, nome, chavepix, valor, cidade, txtId, diretorio=''):
-        
-        self.nome = nome
-        self.chavepix = chavepix
-        self.valor = valor.replace(',', '.')
-        self.cidade = cidade
-        self.txtId = txtId
-        self.diretorioQrCode = diretorio
 
-        self.nome_tam = len(self.nome)
-        self.chavepix_tam = len(self.chavepix)
-        self.valor_tam = len(self.valor)
-        self.cidade_tam = len(self.cidade)
-        self.txtId_tam = len(self.txtId)
+def svg_da_matriz(matriz, tamanho=None):
+    """SVG da matriz: um único path com os trechos escuros de cada linha"""
+    n = len(matriz)
+    trechos = []
+    for y, linha in enumerate(matriz):
+        x = 0
+        for escuro, grupo in groupby(linha):
+            largura = len(list(grupo))
+            if escuro:
+                trechos.append(f'M{x} {y}h{largura}v1h-{largura}z')
+            x += largura
+    lado = tamanho or n * PIXELS_POR_MODULO
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{lado}" height="{lado}" '
+            f'viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+            f'<rect width="{n}" height="{n}" fill="#fff"/>'
+            f'<path fill="#000" d="{"".join(trechos)}"/></svg>')
 
-        self.merchantAccount_tam = f'0014BR.GOV.BCB.PIX01{self.chavepix_tam:02}{self.chavepix}'
-        self.transactionAmount_tam = f'{self.valor_tam:02}{float(self.valor):.2f}'
 
-        self.addDataField_tam = f'05{self.txtId_tam:02}{self.txtId}'
+def renderizar_saida(matriz, formato, tamanho=None):
+    """Bytes de uma saída ('png' ou 'svg') a partir da matriz do QR Code"""
+    if formato not in FORMATOS_SAIDA:
+        raise ValueError(f"Formato de saída não suportado: {formato}")
+    if tamanho is not None and not 0 < tamanho <= TAMANHO_MAXIMO_IMAGEM:
+        raise ValueError(f"Tamanho de saída deve estar entre 1 e {TAMANHO_MAXIMO_IMAGEM} px")
 
-        self.nome_tam = f'{self.nome_tam:02}'
+    if formato == 'svg':
+        return svg_da_matriz(matriz, tamanho).encode('utf-8')
+    buffered = BytesIO()
+    imagem_da_matriz(matriz, tamanho).save(buffered, format='PNG', optimize=True)
+    return buffered.getvalue()
 
-        self.cidade_tam = f'{self.cidade_tam:02}'
 
-        self.payloadFormat = '000201'
-        self.merchantAccount = f'26{len(self.merchantAccount_tam):02}{self.merchantAccount_tam}'
-        self.merchantCategCode = '52040000'
-        self.transactionCurrency = '5303986'
-        self.transactionAmount = f'54{self.transactionAmount_tam}'
-        self.countryCode = '5802BR'
-        self.merchantName = f'59{self.nome_tam:02}{self.nome}'
-        self.merchantCity = f'60{self.cidade_tam:02}{self.cidade}'
-        self.addDataField = f'62{len(self.addDataField_tam):02}{self.addDataField_tam}'
+class Payload():
+    def __init__(self, nome, chavepix, valor, cidade, txtId, diretorio='', location=None):
+        """
+        Com `location`, gera o BR Code dinâmico: a conta do recebedor (campo 26)
+        leva só a URL do payload no PSP (subcampo 25) e o valor/txid ficam no PSP.
+        O código fica curto e com tamanho fixo por location.
+        """
+        self.nome = normalizar_texto(nome, TAMANHO_MAXIMO_NOME)
+        self.chavepix = chavepix.strip()
+        self.valor = f"{float(valor.replace(',', '.')):.2f}"
+        self.cidade = normalizar_texto(cidade, TAMANHO_MAXIMO_CIDADE)
+        self.txtId = normalizar_txid(txtId)
+        self.diretorioQrCode = diretorio
+        self.location = normalizar_location(location) if location else None
+
+        if len(self.valor) > TAMANHO_MAXIMO_VALOR:
+            raise ValueError(f"Valor excede {TAMANHO_MAXIMO_VALOR} caracteres")
+
+        # Tamanhos calculados em bytes UTF-8 (o que o leitor de QR efetivamente conta)
+        self.payloadFormat = campo_emv('00', '01')
+        self.merchantAccount = campo_emv('26', campo_emv('00', 'BR.GOV.BCB.PIX') + campo_emv('01', self.chavepix))
+        self.merchantCategCode = campo_emv('52', '0000')
+        self.transactionCurrency = campo_emv('53', '986')
+        self.transactionAmount = campo_emv('54', self.valor)
+        self.countryCode = campo_emv('58', 'BR')
+        self.merchantName = campo_emv('59', self.nome)
+        self.merchantCity = campo_emv('60', self.cidade)
+        self.addDataField = campo_emv('62', campo_emv('05', self.txtId))
         self.crc16 = '6304'
+        self.pointOfInitiation = ''
+
+        if self.location:
+            # Dinâmico: uso único (01=12), sem chave, valor ou txid no próprio código
+            self.pointOfInitiation = campo_emv('01', '12')
+            self.merchantAccount = campo_emv('26', campo_emv('00', 'BR.GOV.BCB.PIX') + campo_emv('25', self.location))
+            self.transactionAmount = ''
+            self.addDataField = campo_emv('62', campo_emv('05', '***'))
 
         # Variáveis para armazenar resultados
         self.payload_completa = None
         self.qrcode = None
+        self.qr = None  # Objeto QRCode com a matriz já calculada
   
-    def gerarPayload(self):
-        self.payload = f'{self.payloadFormat}{self.merchantAccount}{self.merchantCategCode}{self.transactionCurrency}{self.transactionAmount}{self.countryCode}{self.merchantName}{self.merchantCity}{self.addDataField}{self.crc16}'
+    @classmethod
+    def dinamico(cls, nome, cidade, location, diretorio=''):
+        """BR Code dinâmico para uma location criada no PSP"""
+        return cls(nome, '', '0.00', cidade, '', diretorio=diretorio, location=location)
+
+    def gerarPayload(self, gerar_qrcode=True):
+        self.payload = f'{self.payloadFormat}{self.pointOfInitiation}{self.merchantAccount}{self.merchantCategCode}{self.transactionCurrency}{self.transactionAmount}{self.countryCode}{self.merchantName}{self.merchantCity}{self.addDataField}{self.crc16}'
 
-        self.gerarCrc16(self.payload)
+        self.gerarCrc16(self.payload, gerar_qrcode)
         return self.payload_completa
 
     
-    def gerarCrc16(self, payload):
-        crc16 = crcmod.mkCrcFun(poly=0x11021, initCrc=0xFFFF, rev=False, xorOut=0x0000)
-
-        self.crc16Code = hex(crc16(str(payload).encode('utf-8')))
+    def gerarCrc16(self, payload, gerar_qrcode=True):
+        self.crc16Code = hex(crc16_ccitt(str(payload).encode('utf-8')))
 
         self.crc16Code_formatado = str(self.crc16Code).replace('0x', '').upper().zfill(4)
 
         self.payload_completa = f'{payload}{self.crc16Code_formatado}'
 
-        self.gerarQrCode(self.payload_completa, self.diretorioQrCode)
+        # Pedidos só de payload não pagam pela renderização do QR Code
+        if gerar_qrcode:
+            self.gerarQrCode(self.payload_completa, self.diretorioQrCode)
         return self.payload_completa
 
     
+    def gerarMatriz(self, payload):
+        """Codifica o payload uma única vez; imagens e SVGs derivam desta matriz"""
+        # Importação tardia: qrcode/PIL só são carregados quando há imagem a gerar
+        import qrcode
+
+        self.qr = qrcode.QRCode(
+            version=None,
+            error_correction=qrcode.constants.ERROR_CORRECT_M,
+            box_size=PIXELS_POR_MODULO,
+            border=4,
+        )
+        self.qr.add_data(payload)
+        self.qr.make(fit=True)
+        return self.qr
+
     def gerarQrCode(self, payload, diretorio):
         dir = os.path.expanduser(diretorio)
-        self.qrcode = qrcode.make(payload)
+        if self.qr is None:
+            self.gerarMatriz(payload)
+        self.qrcode = self.qr.make_image(fill_color="black", back_color="white")
         
         # Salvar apenas se diretório for especificado
         if dir and os.path.exists(dir):
@@ -81,9 +220,54 @@ class Payload():
         return self.qrcode
     
     def get_qrcode_image(self):
-        """Retorna o objeto QR Code PIL Image"""
+        """Retorna o objeto QR Code PIL Image (gerado sob demanda)"""
+        if self.qrcode is None and self.payload_completa:
+            self.gerarQrCode(self.payload_completa, self.diretorioQrCode)
         return self.qrcode
     
+    def gerarPng(self, liberar=True):
+        """
+        Bytes PNG do QR Code padrão. Com `liberar`, a imagem PIL e o objeto
+        QRCode são descartados logo após a codificação (só os bytes ficam).
+        """
+        buffered = BytesIO()
+        self.get_qrcode_image().save(buffered, format="PNG")
+        if liberar:
+            self.liberarImagem()
+        return buffered.getvalue()
+
+    def liberarImagem(self):
+        """Descarta a imagem PIL e a matriz (são recriadas sob demanda)"""
+        self.qrcode = None
+        self.qr = None
+
+    def get_matriz(self):
+        """Matriz de módulos (lista de linhas de bool, com borda), codificada sob demanda"""
+        if self.qr is None and self.payload_completa:
+            self.gerarMatriz(self.payload_completa)
+        return self.qr.get_matrix()
+
+    def gerarSaidas(self, saidas):
+        """
+        Renderiza várias saídas de uma vez a partir da mesma matriz.
+
+        Args:
+            saidas: Sequência de (formato, tamanho em px ou None para o padrão)
+
+        Returns:
+            Lista de dicts com format, size, mime_type e data (bytes), na ordem pedida
+        """
+        matriz = self.get_matriz()
+        resultado = []
+        for formato, tamanho in saidas:
+            resultado.append({
+                "format": formato,
+                "size": tamanho or len(matriz) * PIXELS_POR_MODULO,
+                "mime_type": FORMATOS_SAIDA.get(formato),
+                "data": renderizar_saida(matriz, formato, tamanho)
+            })
+        return resultado
+
     def get_payload(self):
         """Retorna o payload completo"""
         return self.payload_completa
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agrupamento de requisições concorrentes (micro-batching) no servidor.
+
+Cada thread de requisição chama `executar(item, prioridade)`. A primeira de uma
+janela vira líder: espera até `janela` segundos (ou até juntar `max_lote`
+itens), executa o lote inteiro com uma única chamada de `executar_lote` e
+entrega a cada thread o seu resultado. Se sobrarem itens na fila, o primeiro
+deles é promovido a líder do próximo lote, então nenhuma requisição fica
+presa servindo as demais.
+"""
+
+import threading
+import time
+
+# Limites superiores das faixas do histograma de tamanhos de lote
+_FAIXAS_LOTE = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class _Pedido():
+    __slots__ = ('item', 'prioridade', 'chegada', 'evento', 'lider', 'resultado', 'erro')
+
+    def __init__(self, item, prioridade):
+        self.item = item
+        self.prioridade = prioridade
+        self.chegada = time.monotonic()
+        self.evento = threading.Event()
+        self.lider = False
+        self.resultado = None
+        self.erro = None
+
+
+class AgrupadorRequisicoes():
+    def __init__(self, executar_lote, janela=0.002, max_lote=32):
+        """
+        Args:
+            executar_lote: Função (itens, prioridade) -> lista de resultados na mesma
+                           ordem; um item que falhou vem como a exceção a levantar
+            janela: Segundos que o líder espera por outras requisições
+            max_lote: Itens por lote (o lote sai antes da janela quando enche)
+        """
+        self.executar_lote = executar_lote
+        self.janela = janela
+        self.max_lote = max_lote
+
+        self._cond = threading.Condition()
+        self._fila = []
+
+        self.lotes = 0
+        self.itens = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.execucao_total = 0.0
+        self._histograma = [0] * (len(_FAIXAS_LOTE) + 1)
+
+    def executar(self, item, prioridade=None):
+        """Executa `item` dentro de um lote e retorna o seu resultado (ou levanta o seu erro)"""
+        pedido = _Pedido(item, prioridade)
+        with self._cond:
+            self._fila.append(pedido)
+            lider = len(self._fila) == 1
+            if len(self._fila) >= self.max_lote:
+                self._cond.notify_all()
+
+        if lider:
+            self._liderar(esperar=True)
+        else:
+            pedido.evento.wait()
+            if pedido.lider:
+                # Promovido: os itens já esperaram na fila, o lote sai sem nova janela
+                self._liderar(esperar=False)
+
+        if pedido.erro is not None:
+            raise pedido.erro
+        return pedido.resultado
+
+    def _liderar(self, esperar):
+        with self._cond:
+            if esperar:
+                limite = time.monotonic() + self.janela
+                while len(self._fila) < self.max_lote:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._cond.wait(restante)
+            lote = self._fila[:self.max_lote]
+            del self._fila[:self.max_lote]
+            if self._fila:
+                proximo = self._fila[0]
+                proximo.lider = True
+                proximo.evento.set()
+
+        inicio = time.monotonic()
+        prioridades = [p.prioridade for p in lote if p.prioridade is not None]
+        try:
+            resultados = list(self.executar_lote([p.item for p in lote], min(prioridades) if prioridades else None))
+            if len(resultados) != len(lote):
+                erro = RuntimeError(f"Lote com {len(resultados)} resultados para {len(lote)} itens")
+                resultados = resultados[:len(lote)] + [erro] * (len(lote) - len(resultados))
+        except Exception as e:
+            resultados = [e] * len(lote)
+        fim = time.monotonic()
+
+        for pedido, resultado in zip(lote, resultados):
+            if isinstance(resultado, Exception):
+                pedido.erro = resultado
+            else:
+                pedido.resultado = resultado
+            pedido.lider = False
+            pedido.evento.set()
+
+        esperas = [inicio - p.chegada for p in lote]
+        with self._cond:
+            self.lotes += 1
+            self.itens += len(lote)
+            self.espera_total += sum(esperas)
+            self.espera_maxima = max(self.espera_maxima, max(esperas))
+            self.execucao_total += fim - inicio
+            faixa = next((i for i, limite in enumerate(_FAIXAS_LOTE) if len(lote) <= limite), len(_FAIXAS_LOTE))
+            self._histograma[faixa] += 1
+
+    def estatisticas(self):
+        with self._cond:
+            rotulos = [str(limite) for limite in _FAIXAS_LOTE] + [f">{_FAIXAS_LOTE[-1]}"]
+            return {
+                "window_ms": self.janela * 1000,
+                "max_batch": self.max_lote,
+                "batches": self.lotes,
+                "items": self.itens,
+                "avg_batch_size": round(self.itens / self.lotes, 2) if self.lotes else 0,
+                "batch_size_histogram": dict(zip(rotulos, self._histograma)),
+                "avg_added_latency_ms": round(self.espera_total / self.itens * 1000, 3) if self.itens else 0,
+                "max_added_latency_ms": round(self.espera_maxima * 1000, 3),
+                "avg_batch_exec_ms": round(self.execucao_total / self.lotes * 1000, 3) if self.lotes else 0,
+                "queued": len(self._fila),
+            }
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache em memória com limite de entradas e expiração por tempo (TTL).
+Seguro para uso entre threads; descarta as entradas menos usadas quando enche
+(por número de entradas e, opcionalmente, pelo total de bytes).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache():
+    def __init__(self, max_entradas=1024, ttl=300.0, max_bytes=None, tamanho=len):
+        """
+        Args:
+            max_entradas: Número máximo de entradas mantidas
+            ttl: Tempo de vida de cada entrada, em segundos
+            max_bytes: Total máximo de bytes dos valores (None = sem limite)
+            tamanho: Função que mede um valor em bytes (usada com max_bytes)
+        """
+        self.max_entradas = max(1, int(max_entradas))
+        self.ttl = float(ttl)
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self.tamanho = tamanho
+        self.bytes = 0
+
+        self._lock = threading.Lock()
+        self._dados = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chave, padrao=None):
+        """Retorna o valor armazenado ou `padrao` se ausente/expirado"""
+        agora = time.monotonic()
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                self.misses += 1
+                return padrao
+
+            expira_em, valor = item[:2]
+            if expira_em <= agora:
+                self._remover(chave)
+                self.misses += 1
+                return padrao
+
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def set(self, chave, valor):
+        """
+        Armazena um valor, descartando as entradas mais antigas se necessário.
+        Retorna False (sem armazenar) se o valor sozinho excede max_bytes.
+        """
+        expira_em = time.monotonic() + self.ttl
+        tamanho = self.tamanho(valor) if self.max_bytes else 0
+        if self.max_bytes and tamanho > self.max_bytes:
+            return False
+
+        with self._lock:
+            self._remover(chave)
+            self._dados[chave] = (expira_em, valor, tamanho)
+            self.bytes += tamanho
+            while len(self._dados) > self.max_entradas or (self.max_bytes and self.bytes > self.max_bytes):
+                self._remover(next(iter(self._dados)))
+                self.evictions += 1
+        return True
+
+    def _remover(self, chave):
+        """Remove uma entrada (chamado com o lock adquirido)"""
+        item = self._dados.pop(chave, None)
+        if item is not None:
+            self.bytes -= item[2]
+        return item
+
+    def pop(self, chave, padrao=None):
+        """Remove e retorna um valor"""
+        with self._lock:
+            item = self._remover(chave)
+        return padrao if item is None else item[1]
+
+    def limpar_expirados(self):
+        """Remove entradas expiradas; retorna quantas foram removidas"""
+        agora = time.monotonic()
+        with self._lock:
+            expiradas = [c for c, item in self._dados.items() if item[0] <= agora]
+            for chave in expiradas:
+                self._remover(chave)
+        return len(expiradas)
+
+    def __len__(self):
+        return len(self._dados)
+
+    def __contains__(self, chave):
+        return self.get(chave, _AUSENTE) is not _AUSENTE
+
+    def estatisticas(self):
+        """Retorna contadores do cache"""
+        with self._lock:
+            return {
+                "entries": len(self._dados),
+                "max_entries": self.max_entradas,
+                "ttl": self.ttl,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_AUSENTE = object()
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linha de comando para geração de PIX em lote, sem passar pela API HTTP.
+
+Exemplos:
+    python pix_cli.py generate cobrancas.csv -o resultado.jsonl --images-dir qrcodes
+    python pix_cli.py generate cobrancas.jsonl -o resultado.csv --zip qrcodes.zip
+    cat cobrancas.jsonl | python pix_cli.py generate - --payload-only > payloads.jsonl
+    python pix_cli.py generate cobrancas.csv -o resultado.csv --zip qrcodes.zip --engine
+    python pix_cli.py decode recebidos.txt -o conciliacao.csv
+    python pix_cli.py keys chaves.txt -o chaves_validadas.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from payload_generator import Payload
+from pix_decoder import COLUNAS_DECODIFICACAO, decodificar_brcode, dividir_arquivo, iter_decodificar_arquivo
+from pix_keys import COLUNAS_VALIDACAO_CHAVES, classificar_chave, validar_chaves
+from render_engine import MotorRenderizacao
+
+CAMPOS_OBRIGATORIOS = ('nome', 'chavepix', 'cidade')
+COLUNAS_SAIDA = ('line', 'txid', 'payload', 'image', 'error')
+
+
+# ============================================================================
+# GERAÇÃO (executa nos processos de trabalho)
+# ============================================================================
+def nome_imagem(linha, txid):
+    """Nome do PNG gerado para um registro"""
+    sufixo = ''.join(c for c in txid if c.isalnum() or c in '-_')[:25]
+    return f"pix_{linha:09d}_{sufixo}.png" if sufixo else f"pix_{linha:09d}.png"
+
+
+def gerar_bloco(registros, gerar_imagens, images_dir, checar_chaves=False):
+    """
+    Gera um bloco de registros numerados (com `checar_chaves`, recusa chaves PIX inválidas).
+
+    Retorna (linhas, imagens): `linhas` são tuplas na ordem de COLUNAS_SAIDA e
+    `imagens` são pares (nome, bytes) quando a saída é ZIP (images_dir=None).
+    """
+    linhas = []
+    imagens = []
+    for linha, registro in registros:
+        if isinstance(registro, Exception):
+            linhas.append((linha, '', '', '', str(registro)))
+            continue
+        txid = str(registro.get('txid') or '').strip()
+        try:
+            faltando = [c for c in CAMPOS_OBRIGATORIOS if not str(registro.get(c) or '').strip()]
+            if faltando:
+                raise ValueError(f"Campo(s) obrigatório(s): {', '.join(faltando)}")
+            if checar_chaves:
+                erro_chave = classificar_chave(str(registro['chavepix']))[2]
+                if erro_chave:
+                    raise ValueError(erro_chave)
+
+            payload_gen = Payload(
+                nome=str(registro['nome']).strip(),
+                chavepix=str(registro['chavepix']).strip(),
+                valor=str(registro.get('valor') or '0.00').strip(),
+                cidade=str(registro['cidade']).strip(),
+                txtId=txid,
+                diretorio=''
+            )
+            payload = payload_gen.gerarPayload(gerar_qrcode=gerar_imagens)
+
+            imagem = ''
+            if gerar_imagens:
+                imagem = nome_imagem(linha, txid)
+                png_bytes = payload_gen.gerarPng()
+                if images_dir:
+                    with open(os.path.join(images_dir, imagem), 'wb') as f:
+                        f.write(png_bytes)
+                else:
+                    imagens.append((imagem, png_bytes))
+
+            linhas.append((linha, txid, payload, imagem, ''))
+        except Exception as e:
+            linhas.append((linha, txid, '', '', str(e)))
+
+    return linhas, imagens
+
+
+# ============================================================================
+# ENTRADA E SAÍDA
+# ============================================================================
+def detectar_formato(caminho, formato):
+    """Formato explícito ou deduzido pela extensão (padrão: csv)"""
+    if formato:
+        return formato
+    if caminho.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'csv'
+
+
+def ler_registros(arquivo, formato):
+    """
+    Itera (linha, registro) a partir de CSV ou JSONL, sem carregar o arquivo inteiro.
+    Uma linha JSONL ilegível vem como (linha, ValueError) e vira uma linha de erro na saída.
+    """
+    if formato == 'jsonl':
+        for linha, texto in enumerate(arquivo, start=1):
+            texto = texto.strip()
+            if not texto:
+                continue
+            try:
+                registro = json.loads(texto)
+            except json.JSONDecodeError as e:
+                yield linha, ValueError(f"JSON inválido: {e.msg} (coluna {e.colno})")
+                continue
+            if not isinstance(registro, dict):
+                yield linha, ValueError("Registro JSON deve ser um objeto")
+                continue
+            yield linha, registro
+        return
+
+    primeira = arquivo.readline()
+    delimitador = ';' if primeira.count(';') > primeira.count(',') else ','
+    colunas = [c.strip().lower() for c in next(csv.reader([primeira], delimiter=delimitador))]
+    for linha, valores in enumerate(csv.reader(arquivo, delimiter=delimitador), start=1):
+        if valores:
+            yield linha, dict(zip(colunas, valores))
+
+
+def em_blocos(registros, tamanho):
+    """Agrupa um iterador em listas de até `tamanho` itens"""
+    bloco = []
+    for item in registros:
+        bloco.append(item)
+        if len(bloco) >= tamanho:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
+
+
+def serializar(linhas, formato, colunas):
+    """Converte tuplas de resultado em texto CSV ou JSONL"""
+    if formato == 'csv':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(linhas)
+        return buffer.getvalue()
+    dumps = json.dumps
+    return ''.join(dumps(dict(zip(colunas, linha)), ensure_ascii=False) + '\n' for linha in linhas)
+
+
+class EscritorSaida():
+    """Grava os resultados em JSONL ou CSV"""
+
+    def __init__(self, arquivo, formato, colunas=COLUNAS_SAIDA):
+        self.arquivo = arquivo
+        self.formato = formato
+        self.colunas = colunas
+        if formato == 'csv':
+            self.csv = csv.writer(arquivo)
+            self.csv.writerow(colunas)
+
+    def escrever(self, linhas):
+        if self.formato == 'csv':
+            self.csv.writerows(linhas)
+            return
+        self.arquivo.write(serializar(linhas, self.formato, self.colunas))
+
+    def escrever_texto(self, texto):
+        """Grava resultados já serializados (por exemplo, por um processo de trabalho)"""
+        self.arquivo.write(texto)
+
+
+# ============================================================================
+# COMANDO generate
+# ============================================================================
+def executar_generate(args):
+    gerar_imagens = not args.payload_only
+    if gerar_imagens and not args.zip:
+        os.makedirs(args.images_dir, exist_ok=True)
+    images_dir = None if args.zip else args.images_dir
+
+    formato_entrada = detectar_formato(args.input, args.input_format)
+    formato_saida = detectar_formato(args.output, args.output_format) if args.output != '-' \
+        else (args.output_format or 'jsonl')
+
+    entrada = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8-sig')
+    saida = sys.stdout if args.output == '-' else open(args.output, 'w', newline='',
+                                                       encoding='utf-8', buffering=1 << 20)
+    zip_file = zipfile.ZipFile(args.zip, 'w', zipfile.ZIP_STORED) if (args.zip and gerar_imagens) else None
+
+    escritor = EscritorSaida(saida, formato_saida)
+    total = falhas = 0
+    workers = args.workers or os.cpu_count() or 1
+
+    try:
+        blocos = em_blocos(ler_registros(entrada, formato_entrada), args.chunk_size)
+        if args.engine and gerar_imagens:
+            total, falhas = _gerar_com_motor(blocos, workers, escritor, images_dir, zip_file, args.check_keys)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Janela limitada de blocos em voo; a saída mantém a ordem da entrada
+                pendentes = deque()
+                for bloco in blocos:
+                    pendentes.append(pool.submit(gerar_bloco, bloco, gerar_imagens, images_dir, args.check_keys))
+                    if len(pendentes) >= workers * 2:
+                        total, falhas = _consumir(pendentes.popleft(), escritor, zip_file, total, falhas)
+                while pendentes:
+                    total, falhas = _consumir(pendentes.popleft(), escritor, zip_file, total, falhas)
+    finally:
+        if zip_file is not None:
+            zip_file.close()
+        if saida is not sys.stdout:
+            saida.close()
+        if entrada is not sys.stdin:
+            entrada.close()
+
+    print(f"{total} registros processados, {falhas} com erro.", file=sys.stderr)
+    return 1 if falhas and args.strict else 0
+
+
+def _consumir(futuro, escritor, zip_file, total, falhas):
+    linhas, imagens = futuro.result()
+    escritor.escrever(linhas)
+    if zip_file is not None:
+        for nome, dados in imagens:
+            zip_file.writestr(nome, dados)
+    return total + len(linhas), falhas + sum(1 for linha in linhas if linha[4])
+
+
+def _gerar_com_motor(blocos, workers, escritor, images_dir, zip_file, checar_chaves=False):
+    """
+    Gera as imagens pelo motor de renderização: os processos recebem só as
+    tuplas das cobranças e devolvem os PNGs pela memória compartilhada.
+    """
+    motor = MotorRenderizacao(processos=workers)
+    # (linha, txid, erro de validação) na ordem da entrada; erro None = enviada ao motor
+    registros = deque()
+
+    def cobrancas():
+        for bloco in blocos:
+            for linha, registro in bloco:
+                if isinstance(registro, Exception):
+                    registros.append((linha, '', str(registro)))
+                    continue
+                txid = str(registro.get('txid') or '').strip()
+                faltando = [c for c in CAMPOS_OBRIGATORIOS if not str(registro.get(c) or '').strip()]
+                if faltando:
+                    registros.append((linha, txid, f"Campo(s) obrigatório(s): {', '.join(faltando)}"))
+                    continue
+                erro_chave = classificar_chave(str(registro['chavepix']))[2] if checar_chaves else ''
+                if erro_chave:
+                    registros.append((linha, txid, erro_chave))
+                    continue
+                registros.append((linha, txid, None))
+                yield (str(registro['nome']).strip(), str(registro['chavepix']).strip(),
+                       str(registro.get('valor') or '0.00').strip(), str(registro['cidade']).strip(), txid)
+
+    total = falhas = 0
+    linhas = []
+
+    def descarregar_erros():
+        nonlocal falhas
+        while registros and registros[0][2] is not None:
+            linha, txid, erro = registros.popleft()
+            linhas.append((linha, txid, '', '', erro))
+            falhas += 1
+
+    try:
+        for payload, png_bytes, erro in motor.renderizar_lote(cobrancas()):
+            descarregar_erros()
+            linha, txid, _ = registros.popleft()
+            if erro is not None:
+                linhas.append((linha, txid, '', '', erro))
+                falhas += 1
+            else:
+                imagem = nome_imagem(linha, txid)
+                if zip_file is not None:
+                    zip_file.writestr(imagem, png_bytes)
+                else:
+                    with open(os.path.join(images_dir, imagem), 'wb') as f:
+                        f.write(png_bytes)
+                linhas.append((linha, txid, payload, imagem, ''))
+            if len(linhas) >= 1000:
+                total += len(linhas)
+                escritor.escrever(linhas)
+                linhas.clear()
+        descarregar_erros()
+        total += len(linhas)
+        escritor.escrever(linhas)
+    finally:
+        motor.fechar()
+    return total, falhas
+
+
+# ============================================================================
+# COMANDO decode
+# ============================================================================
+def decodificar_trecho(caminho, inicio, fim, linha_inicial, formato):
+    """Decodifica um trecho do arquivo e devolve (texto serializado, total, inválidos)"""
+    linhas = list(iter_decodificar_arquivo(caminho, inicio, fim, linha_inicial))
+    invalidos = sum(1 for linha in linhas if not linha[6])
+    return serializar(linhas, formato, COLUNAS_DECODIFICACAO), len(linhas), invalidos
+
+
+def executar_decode(args):
+    formato_saida = detectar_formato(args.output, args.output_format) if args.output != '-' \
+        else (args.output_format or 'jsonl')
+    saida = sys.stdout if args.output == '-' else open(args.output, 'w', newline='',
+                                                       encoding='utf-8', buffering=1 << 20)
+    escritor = EscritorSaida(saida, formato_saida, COLUNAS_DECODIFICACAO)
+    total = invalidos = 0
+
+    try:
+        if args.input == '-':
+            # stdin não pode ser mapeado em memória: leitura em fluxo, um processo
+            bloco = []
+            for linha, texto in enumerate(sys.stdin.buffer, start=1):
+                texto = texto.strip()
+                if not texto:
+                    continue
+                bloco.append((linha,) + decodificar_brcode(texto))
+                if len(bloco) >= args.chunk_size:
+                    escritor.escrever(bloco)
+                    total += len(bloco)
+                    invalidos += sum(1 for item in bloco if not item[6])
+                    bloco = []
+            escritor.escrever(bloco)
+            total += len(bloco)
+            invalidos += sum(1 for item in bloco if not item[6])
+        else:
+            workers = args.workers or os.cpu_count() or 1
+            # Trechos de ~8 MB (ou mais, para arquivos muito grandes) processados em paralelo
+            partes = max(workers, os.path.getsize(args.input) // (8 << 20))
+            trechos = dividir_arquivo(args.input, partes)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pendentes = deque()
+                for inicio, fim, linha_inicial in trechos:
+                    pendentes.append(pool.submit(decodificar_trecho, args.input, inicio, fim,
+                                                 linha_inicial, formato_saida))
+                    if len(pendentes) >= workers * 2:
+                        total, invalidos = _consumir_trecho(pendentes.popleft(), escritor, total, invalidos)
+                while pendentes:
+                    total, invalidos = _consumir_trecho(pendentes.popleft(), escritor, total, invalidos)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+    print(f"{total} códigos lidos, {invalidos} inválidos.", file=sys.stderr)
+    return 1 if invalidos and args.strict else 0
+
+
+def _consumir_trecho(futuro, escritor, total, invalidos):
+    texto, quantidade, ruins = futuro.result()
+    escritor.escrever_texto(texto)
+    return total + quantidade, invalidos + ruins
+
+
+# ============================================================================
+# COMANDO keys
+# ============================================================================
+def executar_keys(args):
+    formato_saida = detectar_formato(args.output, args.output_format) if args.output != '-' \
+        else (args.output_format or 'jsonl')
+    entrada = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8-sig')
+    saida = sys.stdout if args.output == '-' else open(args.output, 'w', newline='',
+                                                       encoding='utf-8', buffering=1 << 20)
+    escritor = EscritorSaida(saida, formato_saida, COLUNAS_VALIDACAO_CHAVES)
+    total = invalidas = 0
+
+    try:
+        bloco = []
+        for texto in entrada:
+            texto = texto.strip()
+            if not texto:
+                continue
+            bloco.append(texto)
+            if len(bloco) >= args.chunk_size:
+                total, invalidas = _escrever_chaves(validar_chaves(bloco), escritor, total, invalidas)
+                bloco = []
+        total, invalidas = _escrever_chaves(validar_chaves(bloco), escritor, total, invalidas)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+        if entrada is not sys.stdin:
+            entrada.close()
+
+    print(f"{total} chaves lidas, {invalidas} inválidas.", file=sys.stderr)
+    return 1 if invalidas and args.strict else 0
+
+
+def _escrever_chaves(resultados, escritor, total, invalidas):
+    escritor.escrever(resultados)
+    return total + len(resultados), invalidas + sum(1 for resultado in resultados if not resultado[3])
+
+
+# ============================================================================
+# PARSER
+# ============================================================================
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Ferramentas de linha de comando do gerador PIX")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    gen = comandos.add_parser('generate', help="Gerar payloads (e QR Codes) em lote")
+    gen.add_argument('input', help="Arquivo CSV/JSONL de cobranças ('-' para stdin)")
+    gen.add_argument('-o', '--output', default='-', help="Arquivo de resultados ('-' para stdout)")
+    gen.add_argument('--input-format', choices=['csv', 'jsonl'], help="Formato da entrada")
+    gen.add_argument('--output-format', choices=['csv', 'jsonl'], help="Formato da saída")
+    imagens = gen.add_mutually_exclusive_group()
+    imagens.add_argument('--images-dir', default='qrcodes', help="Pasta para os PNGs (padrão: qrcodes)")
+    imagens.add_argument('--zip', help="Gravar os PNGs em um arquivo ZIP")
+    imagens.add_argument('--payload-only', action='store_true', help="Gerar apenas os payloads, sem imagens")
+    gen.add_argument('-j', '--workers', type=int, default=0, help="Processos de trabalho (padrão: nº de CPUs)")
+    gen.add_argument('--engine', action='store_true',
+                     help="Renderizar as imagens pelo motor de processos persistentes (memória compartilhada)")
+    gen.add_argument('--check-keys', action='store_true',
+                     help="Recusar registros com chave PIX inválida (CPF/CNPJ, telefone, e-mail, EVP)")
+    gen.add_argument('--chunk-size', type=int, default=1000, help="Registros por bloco enviado a cada processo")
+    gen.add_argument('--strict', action='store_true', help="Código de saída 1 se algum registro falhar")
+    gen.set_defaults(func=executar_generate)
+
+    dec = comandos.add_parser('decode', help="Decodificar BR Codes (um por linha) para conciliação")
+    dec.add_argument('input', help="Arquivo com códigos copia e cola ('-' para stdin)")
+    dec.add_argument('-o', '--output', default='-', help="Arquivo de resultados ('-' para stdout)")
+    dec.add_argument('--output-format', choices=['csv', 'jsonl'], help="Formato da saída")
+    dec.add_argument('-j', '--workers', type=int, default=0, help="Processos de trabalho (padrão: nº de CPUs)")
+    dec.add_argument('--chunk-size', type=int, default=10000, help="Linhas por bloco na leitura de stdin")
+    dec.add_argument('--strict', action='store_true', help="Código de saída 1 se algum código for inválido")
+    dec.set_defaults(func=executar_decode)
+
+    chv = comandos.add_parser('keys', help="Validar chaves PIX (uma por linha)")
+    chv.add_argument('input', help="Arquivo com uma chave por linha ('-' para stdin)")
+    chv.add_argument('-o', '--output', default='-', help="Arquivo de resultados ('-' para stdout)")
+    chv.add_argument('--output-format', choices=['csv', 'jsonl'], help="Formato da saída")
+    chv.add_argument('--chunk-size', type=int, default=10000, help="Chaves validadas por bloco")
+    chv.add_argument('--strict', action='store_true', help="Código de saída 1 se alguma chave for inválida")
+    chv.set_defaults(func=executar_keys)
+
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
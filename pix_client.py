@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente Python da API PIX.
+
+- Conexões HTTP reaproveitadas (keep-alive) por um pool limitado, seguro entre threads.
+- Chamadas concorrentes de `gerar` são agrupadas em uma única requisição a
+  POST /api/v1/pix/generate/batch quando o servidor anuncia o recurso "batch"
+  no health check; sem ele, cada chamada vai para /api/v1/pix/generate.
+- O payload devolvido é conferido localmente (CRC, chave, valor e txid) antes
+  de chegar ao chamador.
+- ClientePixAsync: mesma interface com corrotinas.
+
+Uso:
+    cliente = ClientePix("http://localhost:5000")
+    resposta = cliente.gerar("Loja", "loja@email.com", "10.00", "Sao Paulo", txid="PED1")
+    print(resposta["payload"])
+
+    async with ClientePixAsync("http://localhost:5000") as cliente:
+        respostas = await asyncio.gather(*(cliente.gerar(...) for ...))
+"""
+
+import asyncio
+import http.client
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from payload_generator import normalizar_location, normalizar_txid
+from pix_decoder import decodificar_brcode
+
+# Falhas de uma conexão reaproveitada que o servidor já fechou: vale repetir uma vez
+_CONEXAO_ENCERRADA = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                      http.client.BadStatusLine, BrokenPipeError, ConnectionResetError)
+
+
+class PixClienteError(Exception):
+    """Erro retornado pela API (status HTTP, mensagem e campo inválido, se houver)"""
+
+    def __init__(self, mensagem, status=None, campo=None, retry_after=None):
+        super().__init__(mensagem)
+        self.status = status
+        self.campo = campo
+        self.retry_after = retry_after
+
+
+class PayloadInvalidoError(PixClienteError):
+    """O payload devolvido não confere com a cobrança pedida (CRC ou campos)"""
+
+
+def verificar_payload(payload, cobranca):
+    """
+    Confere localmente um BR Code devolvido pela API contra a cobrança pedida.
+    Levanta PayloadInvalidoError se o CRC ou algum campo não conferir.
+    """
+    txid, valor, chave, _, _, crc_valido, erro = decodificar_brcode(payload)
+    if erro:
+        raise PayloadInvalidoError(f"Payload inválido: {erro}")
+    if not crc_valido:
+        raise PayloadInvalidoError("CRC do payload não confere")
+
+    if cobranca.get('location'):
+        if chave != normalizar_location(cobranca['location']):
+            raise PayloadInvalidoError(f"Location do payload ({chave}) difere da pedida")
+        return
+    if chave != str(cobranca.get('chavepix') or '').strip():
+        raise PayloadInvalidoError(f"Chave do payload ({chave}) difere da pedida")
+    try:
+        valor_pedido = float(str(cobranca.get('valor') or 0).replace(',', '.'))
+    except ValueError:
+        valor_pedido = None
+    if valor and valor_pedido is not None and abs(float(valor) - valor_pedido) >= 0.005:
+        raise PayloadInvalidoError(f"Valor do payload ({valor}) difere do pedido")
+    # O servidor grava o txid normalizado (só letras e números, até 25 caracteres)
+    txid_pedido = str(cobranca.get('txid') or '').strip()
+    if txid_pedido and txid != normalizar_txid(txid_pedido):
+        raise PayloadInvalidoError(f"txid do payload ({txid}) difere do pedido")
+
+
+class _Chamada():
+    """Cobrança na janela de agrupamento; o evento acorda a chamada quando ela vira líder"""
+
+    __slots__ = ('cobranca', 'futuro', 'evento', 'lider')
+
+    def __init__(self, cobranca):
+        self.cobranca = cobranca
+        self.futuro = Future()
+        self.evento = threading.Event()
+        self.lider = False
+        self.futuro.add_done_callback(lambda _: self.evento.set())
+
+
+class PoolConexoes():
+    def __init__(self, base_url, max_conexoes=8, timeout=10.0):
+        """
+        Args:
+            base_url: URL da API (http:// ou https://)
+            max_conexoes: Conexões abertas ao mesmo tempo (as demais chamadas esperam)
+            timeout: Segundos para conectar e para cada leitura
+        """
+        partes = urlsplit(base_url)
+        if partes.scheme not in ('http', 'https'):
+            raise ValueError(f"URL deve começar com http:// ou https:// ({base_url})")
+        self._classe = http.client.HTTPSConnection if partes.scheme == 'https' else http.client.HTTPConnection
+        self._host = partes.hostname
+        self._porta = partes.port
+        self._prefixo = partes.path.rstrip('/')
+        self.timeout = timeout
+
+        # LIFO: a conexão usada há menos tempo tem mais chance de ainda estar aberta
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(max_conexoes)
+
+        self.criadas = 0
+        self.requisicoes = 0
+        self.reconexoes = 0
+
+    def requisitar(self, metodo, caminho, corpo=None, headers=None):
+        """Executa uma requisição e retorna (status, headers, corpo em bytes)"""
+        cabecalhos = {'Accept': 'application/json'}
+        if corpo is not None:
+            cabecalhos['Content-Type'] = 'application/json'
+        if headers:
+            cabecalhos.update(headers)
+
+        with self._vagas:
+            conexao, reaproveitada = self._obter()
+            try:
+                try:
+                    resposta = self._enviar(conexao, metodo, caminho, corpo, cabecalhos)
+                except _CONEXAO_ENCERRADA:
+                    if not reaproveitada:
+                        raise
+                    # Servidor fechou a conexão ociosa: uma nova tentativa com conexão nova
+                    conexao.close()
+                    self.reconexoes += 1
+                    conexao, _ = self._nova(), False
+                    resposta = self._enviar(conexao, metodo, caminho, corpo, cabecalhos)
+                dados = resposta.read()
+            except BaseException:
+                conexao.close()
+                raise
+            if resposta.will_close:
+                conexao.close()
+            else:
+                self._livres.put(conexao)
+            self.requisicoes += 1
+            return resposta.status, resposta.headers, dados
+
+    def _obter(self):
+        try:
+            return self._livres.get_nowait(), True
+        except queue.Empty:
+            return self._nova(), False
+
+    def _nova(self):
+        self.criadas += 1
+        return self._classe(self._host, self._porta, timeout=self.timeout)
+
+    def _enviar(self, conexao, metodo, caminho, corpo, cabecalhos):
+        conexao.request(metodo, self._prefixo + caminho, body=corpo, headers=cabecalhos)
+        return conexao.getresponse()
+
+    def fechar(self):
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def estatisticas(self):
+        return {
+            "created": self.criadas,
+            "idle": self._livres.qsize(),
+            "requests": self.requisicoes,
+            "reconnects": self.reconexoes,
+        }
+
+
+class ClientePix():
+    def __init__(self, base_url, timeout=10.0, max_conexoes=8, agrupar=True,
+                 janela_lote=0.002, max_lote=50, verificar=True, headers=None):
+        """
+        Args:
+            base_url: URL da API, por exemplo http://localhost:5000
+            timeout: Segundos para conectar e para cada leitura
+            max_conexoes: Tamanho do pool de conexões keep-alive
+            agrupar: Agrupa chamadas concorrentes no endpoint de lote (se o servidor suportar)
+            janela_lote: Segundos que a primeira chamada espera por outras antes do envio
+            max_lote: Máximo de cobranças por requisição de lote (limitado pelo servidor)
+            verificar: Confere CRC e campos de cada payload recebido
+            headers: Cabeçalhos extras em todas as requisições (ex.: autenticação)
+        """
+        self.pool = PoolConexoes(base_url, max_conexoes, timeout)
+        self.agrupar = agrupar
+        self.janela_lote = janela_lote
+        self.max_lote = max_lote
+        self.verificar = verificar
+        self.headers = dict(headers or {})
+
+        self._recursos = None
+        self._lock_recursos = threading.Lock()
+        self._lock = threading.Lock()
+        self._fila = []
+
+        self.lotes_enviados = 0
+        self.cobrancas_em_lote = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        self.pool.fechar()
+
+    # ------------------------------------------------------------------
+    def _requisitar_json(self, metodo, caminho, dados=None, headers=None):
+        corpo = json.dumps(dados).encode('utf-8') if dados is not None else None
+        status, cabecalhos, resposta = self.pool.requisitar(metodo, caminho, corpo, dict(self.headers, **(headers or {})))
+        try:
+            conteudo = json.loads(resposta) if resposta else {}
+        except ValueError:
+            raise PixClienteError(f"Resposta não é JSON (HTTP {status})", status)
+        if status >= 400 or (isinstance(conteudo, dict) and conteudo.get('success') is False):
+            raise self._erro(conteudo, status, cabecalhos.get('Retry-After'))
+        return conteudo
+
+    @staticmethod
+    def _erro(conteudo, status, retry_after=None):
+        conteudo = conteudo if isinstance(conteudo, dict) else {}
+        return PixClienteError(conteudo.get('error') or f"HTTP {status}", status,
+                               conteudo.get('field'), retry_after)
+
+    def health(self):
+        return self._requisitar_json('GET', '/api/v1/health')
+
+    def recursos(self):
+        """Recursos anunciados pelo servidor (consultado uma vez; vazio se indisponível)"""
+        if self._recursos is None:
+            with self._lock_recursos:
+                if self._recursos is None:
+                    try:
+                        saude = self.health()
+                        if 'batch_max_items' in saude:
+                            self.max_lote = max(1, min(self.max_lote, int(saude['batch_max_items'])))
+                        self._recursos = set(saude.get('features') or ())
+                    except (PixClienteError, OSError, http.client.HTTPException):
+                        self._recursos = set()
+        return self._recursos
+
+    # ------------------------------------------------------------------
+    def gerar(self, nome, chavepix, valor, cidade, txid=None, return_image=False,
+              idempotency_key=None, **extras):
+        """
+        Gera uma cobrança e retorna a resposta da API (dict com payload, data, qr_code...).
+        `extras` vai no corpo (image_format, outputs, location).
+        """
+        cobranca = {"nome": nome, "chavepix": chavepix, "valor": valor, "cidade": cidade,
+                    "return_image": return_image}
+        if txid is not None:
+            cobranca["txid"] = txid
+        cobranca.update(extras)
+
+        # Com Idempotency-Key o pedido vai sozinho: a chave vale para o corpo inteiro
+        if idempotency_key is None and self.agrupar and 'batch' in self.recursos():
+            resposta = self._enfileirar(cobranca).result()
+        else:
+            headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+            resposta = self._requisitar_json('POST', '/api/v1/pix/generate', cobranca, headers)
+
+        if self.verificar:
+            verificar_payload(resposta['payload'], cobranca)
+        return resposta
+
+    def gerar_lote(self, cobrancas):
+        """
+        Gera uma lista de cobranças (dicts no formato do corpo da API) em requisições
+        de lote. Retorna, na mesma ordem, a resposta ou o PixClienteError de cada uma.
+        """
+        resultados = []
+        lote = self.max_lote if 'batch' in self.recursos() else 1
+        for inicio in range(0, len(cobrancas), lote):
+            parte = cobrancas[inicio:inicio + lote]
+            futuros = [(cobranca, Future()) for cobranca in parte]
+            self._enviar_lote(futuros)
+            for cobranca, futuro in futuros:
+                erro = futuro.exception()
+                if erro is None and self.verificar:
+                    try:
+                        verificar_payload(futuro.result()['payload'], cobranca)
+                    except PayloadInvalidoError as e:
+                        erro = e
+                resultados.append(erro if erro is not None else futuro.result())
+        return resultados
+
+    # ------------------------------------------------------------------
+    def _enfileirar(self, cobranca):
+        """
+        Coloca a cobrança na janela de agrupamento. A primeira chamada de uma janela
+        espera `janela_lote` e envia até max_lote cobranças; se sobrarem outras na
+        fila, a primeira delas é promovida a líder do próximo envio (como em
+        pix_batcher.AgrupadorRequisicoes), então nenhuma chamada fica presa
+        enviando as das demais.
+        """
+        chamada = _Chamada(cobranca)
+        with self._lock:
+            self._fila.append(chamada)
+            lider = len(self._fila) == 1
+
+        if lider:
+            self._liderar(esperar=True)
+        else:
+            chamada.evento.wait()
+            if chamada.lider:
+                # Promovida: as cobranças já esperaram na fila, o envio sai sem nova janela
+                self._liderar(esperar=False)
+        return chamada.futuro
+
+    def _liderar(self, esperar):
+        if esperar:
+            time.sleep(self.janela_lote)
+        with self._lock:
+            lote = self._fila[:self.max_lote]
+            del self._fila[:self.max_lote]
+            if self._fila:
+                proxima = self._fila[0]
+                proxima.lider = True
+                proxima.evento.set()
+        self._enviar_lote([(chamada.cobranca, chamada.futuro) for chamada in lote])
+
+    def _enviar_lote(self, itens):
+        """Envia [(cobrança, Future)] e resolve cada Future com a resposta do item"""
+        try:
+            if len(itens) == 1 or 'batch' not in self.recursos():
+                for cobranca, futuro in itens:
+                    try:
+                        futuro.set_result(self._requisitar_json('POST', '/api/v1/pix/generate', cobranca))
+                    except Exception as e:
+                        futuro.set_exception(e)
+                return
+
+            resposta = self._requisitar_json('POST', '/api/v1/pix/generate/batch',
+                                             {"charges": [cobranca for cobranca, _ in itens]})
+            self.lotes_enviados += 1
+            self.cobrancas_em_lote += len(itens)
+            resultados = resposta.get('results') or []
+            for (_, futuro), resultado in zip(itens, resultados):
+                if resultado.get('success'):
+                    futuro.set_result(resultado)
+                else:
+                    futuro.set_exception(self._erro(resultado, resultado.get('status')))
+            if len(resultados) != len(itens):
+                raise PixClienteError(f"Lote com {len(resultados)} resultados para {len(itens)} cobranças")
+        except Exception as e:
+            for _, futuro in itens:
+                if not futuro.done():
+                    futuro.set_exception(e)
+
+    def estatisticas(self):
+        return {
+            "pool": self.pool.estatisticas(),
+            "batches_sent": self.lotes_enviados,
+            "batched_charges": self.cobrancas_em_lote,
+        }
+
+
+class ClientePixAsync():
+    """
+    Variante asyncio do ClientePix: as chamadas rodam em um pool de threads
+    próprio, então corrotinas concorrentes também são agrupadas em lote.
+    """
+
+    def __init__(self, base_url, max_threads=32, **opcoes):
+        self.cliente = ClientePix(base_url, **opcoes)
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='pix-client')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.fechar()
+
+    async def _executar(self, funcao, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, lambda: funcao(*args, **kwargs))
+
+    async def fechar(self):
+        await self._executar(self.cliente.fechar)
+        self._executor.shutdown(wait=False)
+
+    async def health(self):
+        return await self._executar(self.cliente.health)
+
+    async def gerar(self, nome, chavepix, valor, cidade, txid=None, return_image=False,
+                    idempotency_key=None, **extras):
+        return await self._executar(self.cliente.gerar, nome, chavepix, valor, cidade, txid,
+                                    return_image, idempotency_key, **extras)
+
+    async def gerar_lote(self, cobrancas):
+        return await self._executar(self.cliente.gerar_lote, cobrancas)
+
+    def estatisticas(self):
+        return self.cliente.estatisticas()
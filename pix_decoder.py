@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Decodificador de BR Codes (PIX copia e cola) para conciliação em lote.
+Lê o mesmo layout TLV (ID + tamanho de 2 dígitos + valor) produzido por Payload,
+extraindo txid, valor, chave, recebedor e validade do CRC16.
+"""
+
+import mmap
+import os
+
+from payload_generator import crc16_ccitt
+
+COLUNAS_DECODIFICACAO = ('line', 'txid', 'amount', 'key', 'name', 'city', 'crc_valid', 'error')
+
+_GUI_PIX = b'BR.GOV.BCB.PIX'
+
+
+def _campos_tlv(dados, inicio, fim):
+    """Itera (id, início do valor, fim do valor) sem copiar os valores"""
+    pos = inicio
+    while pos < fim:
+        if pos + 4 > fim:
+            raise ValueError(f"Campo truncado na posição {pos - inicio}")
+        # Só dois dígitos ASCII: int() aceitaria '-4' ou ' 4' e o laço não avançaria
+        campo_tamanho = bytes(dados[pos + 2:pos + 4])
+        if not campo_tamanho.isdigit():
+            raise ValueError(f"Tamanho inválido na posição {pos - inicio}")
+        valor_ini = pos + 4
+        valor_fim = valor_ini + int(campo_tamanho)
+        if valor_fim <= pos or valor_fim > fim:
+            raise ValueError(f"Campo {bytes(dados[pos:pos + 2]).decode('ascii', 'replace')} excede o payload")
+        yield bytes(dados[pos:pos + 2]), valor_ini, valor_fim
+        pos = valor_fim
+
+
+def decodificar_brcode(dados, inicio=0, fim=None):
+    """
+    Decodifica um BR Code a partir de bytes/mmap (sem copiar a linha inteira).
+
+    Retorna a tupla (txid, amount, key, name, city, crc_valid, error), na ordem
+    de COLUNAS_DECODIFICACAO sem a coluna 'line'.
+    """
+    if isinstance(dados, str):
+        dados = dados.strip().encode('utf-8')
+        inicio, fim = 0, len(dados)
+    elif fim is None:
+        fim = len(dados)
+
+    txid = valor = chave = nome = cidade = ''
+    try:
+        # CRC: os 4 últimos caracteres (campo 63) cobrem todo o restante
+        if fim - inicio < 8 or dados[fim - 8:fim - 4] != b'6304':
+            return txid, valor, chave, nome, cidade, False, "Campo CRC (63) ausente"
+        try:
+            crc_informado = int(dados[fim - 4:fim], 16)
+        except ValueError:
+            return txid, valor, chave, nome, cidade, False, "CRC não hexadecimal"
+        crc_valido = crc16_ccitt(memoryview(dados)[inicio:fim - 4]) == crc_informado
+
+        for tag, ini, f in _campos_tlv(dados, inicio, fim - 8):
+            if tag == b'26':
+                for sub, sini, sfim in _campos_tlv(dados, ini, f):
+                    if sub == b'00' and dados[sini:sfim].upper() != _GUI_PIX:
+                        raise ValueError("GUI do arranjo não é BR.GOV.BCB.PIX")
+                    if sub in (b'01', b'25'):
+                        chave = dados[sini:sfim].decode('utf-8')
+            elif tag == b'54':
+                valor = dados[ini:f].decode('ascii')
+            elif tag == b'59':
+                nome = dados[ini:f].decode('utf-8')
+            elif tag == b'60':
+                cidade = dados[ini:f].decode('utf-8')
+            elif tag == b'62':
+                for sub, sini, sfim in _campos_tlv(dados, ini, f):
+                    if sub == b'05':
+                        txid = dados[sini:sfim].decode('utf-8')
+        return txid, valor, chave, nome, cidade, crc_valido, ''
+    except (ValueError, UnicodeDecodeError) as e:
+        return txid, valor, chave, nome, cidade, False, str(e)
+
+
+def iter_decodificar_arquivo(caminho, inicio=0, fim=None, linha_inicial=1):
+    """
+    Decodifica um arquivo com um BR Code por linha, via mmap.
+
+    `inicio`/`fim` delimitam um trecho em bytes (alinhado a quebras de linha),
+    permitindo processar partes do arquivo em paralelo. Gera tuplas na ordem
+    de COLUNAS_DECODIFICACAO.
+    """
+    with open(caminho, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            fim = len(mm) if fim is None else fim
+            pos = inicio
+            linha = linha_inicial
+            while pos < fim:
+                quebra = mm.find(b'\n', pos, fim)
+                if quebra == -1:
+                    quebra = fim
+                ini_linha, fim_linha = pos, quebra
+                # Ignora espaços e \r nas pontas
+                while fim_linha > ini_linha and mm[fim_linha - 1] in b' \r\t':
+                    fim_linha -= 1
+                while ini_linha < fim_linha and mm[ini_linha] in b' \t':
+                    ini_linha += 1
+                if fim_linha > ini_linha:
+                    yield (linha,) + decodificar_brcode(mm, ini_linha, fim_linha)
+                pos = quebra + 1
+                linha += 1
+
+
+def dividir_arquivo(caminho, partes):
+    """
+    Divide o arquivo em até `partes` trechos alinhados a quebras de linha.
+    Retorna lista de (início, fim, número da primeira linha).
+    """
+    tamanho = os.path.getsize(caminho)
+    if tamanho == 0:
+        return []
+    trechos = []
+    with open(caminho, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        passo = max(1, tamanho // max(1, partes))
+        inicio = 0
+        linha = 1
+        while inicio < tamanho:
+            fim = mm.find(b'\n', min(inicio + passo, tamanho - 1))
+            fim = tamanho if fim == -1 else fim + 1
+            trechos.append((inicio, fim, linha))
+            linha += _contar_linhas(mm, inicio, fim)
+            inicio = fim
+    return trechos
+
+
+def _contar_linhas(mm, inicio, fim, bloco=1 << 24):
+    """Conta quebras de linha em um trecho, copiando no máximo `bloco` bytes por vez"""
+    total = 0
+    for pos in range(inicio, fim, bloco):
+        total += mm[pos:min(pos + bloco, fim)].count(b'\n')
+    return total
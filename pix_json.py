@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serialização JSON das respostas da API.
+
+Usa orjson quando instalado (bem mais rápido para os dicts da API) e cai para
+o json da biblioteca padrão caso contrário. O encoder pode ser forçado com
+PIX_JSON_ENCODER=orjson|stdlib.
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ProvedorJSONRapido(DefaultJSONProvider):
+    """Provider do Flask: jsonify() e request.get_json() passam a usar o encoder escolhido"""
+
+    def __init__(self, app, encoder='auto'):
+        super().__init__(app)
+        if encoder == 'orjson' and orjson is None:
+            raise RuntimeError("orjson não instalado: use PIX_JSON_ENCODER=stdlib ou 'pip install orjson'")
+        self.usar_orjson = orjson is not None and encoder != 'stdlib'
+
+    @property
+    def nome(self):
+        return 'orjson' if self.usar_orjson else 'stdlib'
+
+    def dumps_bytes(self, obj):
+        if self.usar_orjson:
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(obj, default=self.default, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if self.usar_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
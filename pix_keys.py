@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classificação e validação de chaves PIX (CPF, CNPJ, telefone, e-mail e EVP).
+
+Uma chave só é válida no formato em que o DICT a guarda: CPF/CNPJ sem
+pontuação, telefone em E.164 (+55DDDNÚMERO), e-mail e EVP em minúsculas.
+Chaves reconhecíveis em outro formato (ex.: "123.456.789-09") são recusadas
+com a forma normalizada na mensagem, porque o código gerado com elas falha
+na hora do pagamento.
+
+Uso:
+    tipo, normalizada, erro = classificar_chave("12345678909")   # erro == '' se válida
+    for chave, tipo, normalizada, valida, erro in validar_chaves(chaves): ...
+"""
+
+import re
+
+TIPOS_CHAVE = ('cpf', 'cnpj', 'phone', 'email', 'evp')
+COLUNAS_VALIDACAO_CHAVES = ('key', 'type', 'normalized', 'valid', 'error')
+
+TAMANHO_MAXIMO_EMAIL = 77
+
+# Pesos dos dígitos verificadores (módulo 11), um par de tabelas por documento
+_PESOS_CPF = (tuple(range(10, 1, -1)), tuple(range(11, 1, -1)))
+_PESOS_CNPJ = ((5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2), (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+
+# Valor de cada caractere no cálculo (CNPJ alfanumérico: código ASCII - 48)
+_VALOR_CARACTERE = {c: ord(c) - 48 for c in '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'}
+
+# DDDs em uso no Brasil
+_DDDS = frozenset((
+    11, 12, 13, 14, 15, 16, 17, 18, 19, 21, 22, 24, 27, 28, 31, 32, 33, 34, 35, 37, 38,
+    41, 42, 43, 44, 45, 46, 47, 48, 49, 51, 53, 54, 55, 61, 62, 63, 64, 65, 66, 67, 68, 69,
+    71, 73, 74, 75, 77, 79, 81, 82, 83, 84, 85, 86, 87, 88, 89, 91, 92, 93, 94, 95, 96, 97, 98, 99,
+))
+
+_RE_CPF = re.compile(r'\d{11}')
+_RE_CPF_FORMATADO = re.compile(r'\d{3}\.?\d{3}\.?\d{3}-?\d{2}')
+_RE_CNPJ = re.compile(r'[0-9A-Z]{12}\d{2}')
+_RE_CNPJ_FORMATADO = re.compile(r'[0-9A-Za-z]{2}\.?[0-9A-Za-z]{3}\.?[0-9A-Za-z]{3}/?[0-9A-Za-z]{4}-?\d{2}')
+_RE_E164 = re.compile(r'\+[1-9]\d{1,14}')
+_RE_TELEFONE_BR = re.compile(r'\+55(\d{2})(9\d{8}|[2-8]\d{7})')
+_RE_TELEFONE_FORMATADO = re.compile(r'\+?[\d\s().-]{10,20}')
+_RE_EMAIL = re.compile(
+    r"[a-z0-9.!#$%&'*+/=?^_`{|}~-]+@[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?)+")
+_RE_EVP = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+_RE_EVP_QUALQUER = re.compile(r'[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}')
+_RE_NAO_ALFANUMERICO = re.compile(r'[^0-9A-Za-z]')
+_RE_NAO_DIGITO = re.compile(r'\D')
+
+
+def _digitos_conferem(documento, tabelas):
+    """Confere os dígitos verificadores (módulo 11) de um documento já sem pontuação"""
+    valores = [_VALOR_CARACTERE[c] for c in documento]
+    for posicao, pesos in enumerate(tabelas, start=len(tabelas[0])):
+        soma = sum(v * p for v, p in zip(valores, pesos))
+        # Resto 0 ou 1 -> dígito 0; senão 11 - resto
+        if soma * 10 % 11 % 10 != valores[posicao]:
+            return False
+    return True
+
+
+def _validar_cpf(cpf):
+    if cpf == cpf[0] * 11 or not _digitos_conferem(cpf, _PESOS_CPF):
+        return "CPF com dígitos verificadores inválidos"
+    return ''
+
+
+def _validar_cnpj(cnpj):
+    if cnpj == cnpj[0] * 14 or not _digitos_conferem(cnpj, _PESOS_CNPJ):
+        return "CNPJ com dígitos verificadores inválidos"
+    return ''
+
+
+def _validar_telefone(telefone):
+    if not telefone.startswith('+55'):
+        # Internacional: só o formato E.164 pode ser conferido
+        return ''
+    brasileiro = _RE_TELEFONE_BR.fullmatch(telefone)
+    if brasileiro is None:
+        return "Telefone deve ter +55, DDD e 8 ou 9 dígitos (celular começando com 9)"
+    if int(brasileiro.group(1)) not in _DDDS:
+        return f"DDD {brasileiro.group(1)} inexistente"
+    return ''
+
+
+def classificar_chave(chave):
+    """
+    Identifica o tipo de uma chave PIX e confere o seu formato.
+
+    Retorna (tipo, normalizada, erro): `tipo` é um de TIPOS_CHAVE ('' se não
+    reconhecido), `normalizada` é a chave no formato do DICT e `erro` é '' quando
+    a chave é válida exatamente como informada.
+    """
+    chave = (chave or '').strip()
+    if not chave:
+        return '', '', "Chave PIX vazia"
+
+    if '@' in chave:
+        normalizada = chave.lower()
+        if len(chave) > TAMANHO_MAXIMO_EMAIL:
+            return 'email', normalizada, f"E-mail excede {TAMANHO_MAXIMO_EMAIL} caracteres"
+        if _RE_EMAIL.fullmatch(normalizada) is None:
+            return 'email', normalizada, "E-mail inválido"
+        if normalizada != chave:
+            return 'email', normalizada, f"E-mail deve estar em minúsculas: {normalizada}"
+        return 'email', chave, ''
+
+    if chave[0] == '+':
+        if _RE_E164.fullmatch(chave):
+            return 'phone', chave, _validar_telefone(chave)
+        if _RE_TELEFONE_FORMATADO.fullmatch(chave):
+            normalizada = '+' + _RE_NAO_DIGITO.sub('', chave)
+            erro = _validar_telefone(normalizada) if _RE_E164.fullmatch(normalizada) else "Telefone inválido"
+            return 'phone', normalizada, erro or f"Telefone deve estar no formato E.164: {normalizada}"
+        return 'phone', chave, "Telefone inválido"
+
+    if _RE_CPF.fullmatch(chave):
+        erro = _validar_cpf(chave)
+        if erro and _validar_telefone('+55' + chave) == '':
+            erro += " (se for telefone, use +55 no início)"
+        return 'cpf', chave, erro
+    if _RE_CNPJ.fullmatch(chave):
+        return 'cnpj', chave, _validar_cnpj(chave)
+
+    if _RE_EVP.fullmatch(chave):
+        return 'evp', chave, ''
+    if _RE_EVP_QUALQUER.fullmatch(chave):
+        hexa = chave.replace('-', '').lower()
+        normalizada = f"{hexa[:8]}-{hexa[8:12]}-{hexa[12:16]}-{hexa[16:20]}-{hexa[20:]}"
+        return 'evp', normalizada, f"Chave aleatória deve estar em minúsculas com hífens: {normalizada}"
+
+    # Documentos com pontuação: tipo reconhecido, mas fora do formato do DICT
+    if _RE_CPF_FORMATADO.fullmatch(chave):
+        normalizada = _RE_NAO_DIGITO.sub('', chave)
+        return 'cpf', normalizada, _validar_cpf(normalizada) or f"CPF deve conter apenas dígitos: {normalizada}"
+    if _RE_CNPJ_FORMATADO.fullmatch(chave):
+        normalizada = _RE_NAO_ALFANUMERICO.sub('', chave).upper()
+        return 'cnpj', normalizada, _validar_cnpj(normalizada) or f"CNPJ deve conter apenas dígitos e letras: {normalizada}"
+    if _RE_TELEFONE_FORMATADO.fullmatch(chave) and len(_RE_NAO_DIGITO.sub('', chave)) in (10, 11):
+        normalizada = '+55' + _RE_NAO_DIGITO.sub('', chave)
+        return 'phone', normalizada, _validar_telefone(normalizada) or f"Telefone deve estar no formato E.164: {normalizada}"
+
+    return '', chave, "Chave PIX não reconhecida (CPF, CNPJ, telefone, e-mail ou chave aleatória)"
+
+
+def validar_chaves(chaves):
+    """
+    Valida uma lista (ou iterável) de chaves em uma passagem.
+    Retorna tuplas na ordem de COLUNAS_VALIDACAO_CHAVES.
+    """
+    classificar = classificar_chave
+    resultados = []
+    adicionar = resultados.append
+    for chave in chaves:
+        tipo, normalizada, erro = classificar(chave)
+        adicionar((chave, tipo, normalizada, not erro, erro))
+    return resultados
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentação de memória dos workers.
+
+Com o rastreamento ligado (PIX_MEMORY_TRACE=true), o tracemalloc acompanha as
+alocações e cada etapa da geração (payload, QR Code, PNG...) acumula quanto
+deixou alocado ao terminar. Desligado, `etapa()` não custa nada além de uma
+chamada de função.
+"""
+
+import gc
+import os
+import resource
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+_SEM_RASTREIO = nullcontext()
+
+# Alocações do próprio tracemalloc e do importador não interessam no relatório
+_FILTROS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def rss_bytes():
+    """Memória residente atual do processo (pico, se /proc não estiver disponível)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta em KB, macOS em bytes
+        return maximo if maximo > 1 << 32 else maximo * 1024
+
+
+class RastreadorMemoria():
+    def __init__(self, ativo=False, quadros=10):
+        """
+        Args:
+            ativo: Liga o tracemalloc (custo de CPU e memória; use para diagnóstico)
+            quadros: Profundidade das pilhas guardadas por alocação
+        """
+        self.ativo = ativo
+        self.quadros = quadros
+        self._lock = threading.Lock()
+        self._etapas = {}
+        if ativo and not tracemalloc.is_tracing():
+            tracemalloc.start(quadros)
+
+    def etapa(self, nome):
+        """Context manager que mede a memória retida por uma etapa"""
+        if not self.ativo:
+            return _SEM_RASTREIO
+        return self._medir(nome)
+
+    @contextmanager
+    def _medir(self, nome):
+        antes = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            # Em requisições simultâneas o delta inclui alocações de outras threads
+            delta = tracemalloc.get_traced_memory()[0] - antes
+            with self._lock:
+                etapa = self._etapas.setdefault(nome, {"calls": 0, "retained_bytes": 0, "max_retained_bytes": 0})
+                etapa["calls"] += 1
+                etapa["retained_bytes"] += delta
+                etapa["max_retained_bytes"] = max(etapa["max_retained_bytes"], delta)
+
+    def top_alocacoes(self, limite=20, agrupar='lineno'):
+        """Locais com mais memória alocada no momento (vazio se o rastreamento está desligado)"""
+        if not tracemalloc.is_tracing():
+            return []
+        estatisticas = tracemalloc.take_snapshot().filter_traces(_FILTROS).statistics(agrupar)
+        return [{
+            "site": str(estatistica.traceback[0]),
+            "size_bytes": estatistica.size,
+            "count": estatistica.count
+        } for estatistica in estatisticas[:limite]]
+
+    def estatisticas(self):
+        dados = {
+            "tracing": tracemalloc.is_tracing(),
+            "rss_bytes": rss_bytes(),
+            "gc_objects": len(gc.get_objects()),
+            "gc_counts": gc.get_count(),
+        }
+        if tracemalloc.is_tracing():
+            atual, pico = tracemalloc.get_traced_memory()
+            dados["traced_bytes"] = atual
+            dados["traced_peak_bytes"] = pico
+        with self._lock:
+            dados["stages"] = {nome: dict(etapa) for nome, etapa in self._etapas.items()}
+        return dados
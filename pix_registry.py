@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro local (SQLite em modo WAL) das cobranças geradas.
+As gravações vão para uma fila e são feitas em lote por uma thread de fundo,
+sem somar latência às requisições; as consultas usam índices por txid,
+hash do payload e data de criação.
+"""
+
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS charges (
+    id INTEGER PRIMARY KEY,
+    txid TEXT NOT NULL,
+    chavepix TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    nome TEXT,
+    cidade TEXT,
+    payload TEXT NOT NULL,
+    payload_hash TEXT NOT NULL,
+    image_location TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_charges_txid ON charges (txid, created_at);
+CREATE INDEX IF NOT EXISTS idx_charges_payload_hash ON charges (payload_hash);
+CREATE INDEX IF NOT EXISTS idx_charges_created_at ON charges (created_at);
+"""
+
+COLUNAS = ('txid', 'chavepix', 'valor', 'nome', 'cidade', 'payload',
+           'payload_hash', 'image_location', 'created_at')
+
+
+def hash_payload(payload):
+    """Hash usado para localizar uma cobrança pelo código copia e cola"""
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ChargeRegistry():
+    def __init__(self, caminho, tamanho_lote=500, intervalo=0.05, max_fila=100000):
+        """
+        Args:
+            caminho: Arquivo do banco SQLite
+            tamanho_lote: Máximo de registros por transação de escrita
+            intervalo: Tempo máximo (s) que um registro aguarda para ser gravado
+            max_fila: Registros pendentes antes de começar a descartar
+        """
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.max_fila = max_fila
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fila = None
+        self._local = threading.local()
+
+        self.gravados = 0
+        self.descartados = 0
+
+        with self._conectar() as conn:
+            conn.executescript(ESQUEMA)
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, timeout=10)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _leitura(self):
+        """Conexão de leitura da thread atual (recriada após fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._conectar()
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _garantir_escritor(self):
+        """Inicia a thread de escrita no processo atual (inclusive após fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._fila = queue.Queue(maxsize=self.max_fila)
+            threading.Thread(target=self._escritor, args=(self._fila,),
+                             name='registro-cobrancas', daemon=True).start()
+            self._pid = os.getpid()
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+    def registrar(self, txid, chavepix, valor, nome, cidade, payload, image_location=None):
+        """Enfileira uma cobrança para gravação (não bloqueia a requisição)"""
+        self._garantir_escritor()
+        registro = (txid or '', chavepix, valor, nome, cidade, payload,
+                    hash_payload(payload), image_location, time.time())
+        try:
+            self._fila.put_nowait(registro)
+        except queue.Full:
+            self.descartados += 1
+
+    def _escritor(self, fila):
+        conn = self._conectar()
+        sql = f"INSERT INTO charges ({', '.join(COLUNAS)}) VALUES ({', '.join('?' * len(COLUNAS))})"
+        while True:
+            lote = [fila.get()]
+            limite = time.monotonic() + self.intervalo
+            while len(lote) < self.tamanho_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            eventos = [item for item in lote if isinstance(item, threading.Event)]
+            registros = [item for item in lote if not isinstance(item, threading.Event)]
+            if registros:
+                try:
+                    with conn:
+                        conn.executemany(sql, registros)
+                    self.gravados += len(registros)
+                except sqlite3.Error:
+                    self.descartados += len(registros)
+            for evento in eventos:
+                evento.set()
+
+    def flush(self, timeout=5.0):
+        """Aguarda a gravação de tudo que já foi enfileirado"""
+        self._garantir_escritor()
+        evento = threading.Event()
+        self._fila.put(evento)
+        return evento.wait(timeout)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def _consultar(self, sql, parametros):
+        return [dict(linha) for linha in self._leitura().execute(sql, parametros)]
+
+    def buscar_por_txid(self, txid, limite=50):
+        """Cobranças com o txid informado, mais recentes primeiro"""
+        return self._consultar(
+            f"SELECT {', '.join(COLUNAS)} FROM charges WHERE txid = ? "
+            "ORDER BY created_at DESC LIMIT ?", (txid, limite))
+
+    def buscar_por_payload(self, payload):
+        """Cobrança correspondente a um código copia e cola"""
+        return self._consultar(
+            f"SELECT {', '.join(COLUNAS)} FROM charges WHERE payload_hash = ? "
+            "ORDER BY created_at DESC LIMIT 1", (hash_payload(payload),))
+
+    def buscar_por_periodo(self, inicio=None, fim=None, limite=100):
+        """Cobranças criadas entre dois timestamps (epoch), mais antigas primeiro"""
+        return self._consultar(
+            f"SELECT {', '.join(COLUNAS)} FROM charges WHERE created_at >= ? AND created_at < ? "
+            "ORDER BY created_at LIMIT ?",
+            (inicio if inicio is not None else 0, fim if fim is not None else float('inf'), limite))
+
+    def estatisticas(self):
+        return {
+            "path": self.caminho,
+            "pending": self._fila.qsize() if self._fila is not None else 0,
+            "written": self.gravados,
+            "dropped": self.descartados,
+        }
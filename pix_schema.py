@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Validação das requisições JSON da API.
+
+Cada schema é compilado uma única vez (expressões regulares e conversões já
+resolvidas) em uma lista de validadores; uma requisição inválida é rejeitada
+antes de qualquer trabalho com Payload.
+"""
+
+import re
+
+from payload_generator import FORMATOS_SAIDA, TAMANHO_MAXIMO_IMAGEM, normalizar_txid
+
+# Representações aceitas para campos booleanos
+BOOLEANOS = {True: True, False: False, 1: True, 0: False,
+             'true': True, 'false': False, '1': True, '0': False}
+
+
+class ErroValidacao(ValueError):
+    """Requisição fora do schema"""
+
+    def __init__(self, campo, mensagem):
+        super().__init__(mensagem)
+        self.campo = campo
+
+
+class Campo():
+    def __init__(self, tipo=str, obrigatorio=False, max_len=None, padrao=None,
+                 escolhas=None, default=None, mensagem_padrao=None, item=None, normalizar=None):
+        """
+        Args:
+            tipo: str, bool, list ou 'valor' (texto/número no formato de valor monetário)
+            obrigatorio: Campo precisa estar presente e não vazio
+            max_len: Tamanho máximo após strip() (itens, para listas)
+            padrao: Expressão regular que o texto deve satisfazer
+            escolhas: Conjunto de valores aceitos
+            default: Valor usado quando o campo está ausente
+            mensagem_padrao: Mensagem de erro quando `padrao` não casa
+            item: Função que valida/converte cada item de uma lista (levanta ValueError)
+            normalizar: Função aplicada ao texto já validado (não vazio)
+        """
+        self.tipo = tipo
+        self.obrigatorio = obrigatorio
+        self.max_len = max_len
+        self.padrao = re.compile(padrao) if padrao else None
+        self.escolhas = frozenset(escolhas) if escolhas else None
+        self.default = default
+        self.mensagem_padrao = mensagem_padrao
+        self.item = item
+        self.normalizar = normalizar
+
+
+def _validador(nome, campo):
+    """Gera a função que valida e normaliza um campo"""
+    casar = campo.padrao.fullmatch if campo.padrao else None
+
+    def validar(dados):
+        valor = dados.get(nome)
+        if valor is None or valor == '':
+            if campo.obrigatorio:
+                raise ErroValidacao(nome, f"Campo '{nome}' é obrigatório")
+            return campo.default
+
+        if campo.tipo is bool:
+            chave = valor.lower() if isinstance(valor, str) else valor
+            if not isinstance(chave, (bool, int, str)) or chave not in BOOLEANOS:
+                raise ErroValidacao(nome, f"Campo '{nome}' deve ser booleano")
+            return BOOLEANOS[chave]
+
+        if campo.tipo is list:
+            if not isinstance(valor, list):
+                raise ErroValidacao(nome, f"Campo '{nome}' deve ser uma lista")
+            if campo.max_len is not None and len(valor) > campo.max_len:
+                raise ErroValidacao(nome, f"Campo '{nome}' deve ter no máximo {campo.max_len} itens")
+            try:
+                return tuple(campo.item(item) for item in valor)
+            except ValueError as e:
+                raise ErroValidacao(nome, f"Campo '{nome}': {e}")
+
+        if campo.tipo == 'valor' and isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            valor = f"{valor:.2f}"
+        elif not isinstance(valor, str):
+            raise ErroValidacao(nome, f"Campo '{nome}' deve ser texto")
+
+        valor = valor.strip()
+        if campo.obrigatorio and not valor:
+            raise ErroValidacao(nome, f"Campo '{nome}' é obrigatório")
+        if campo.max_len is not None and len(valor) > campo.max_len:
+            raise ErroValidacao(nome, f"Campo '{nome}' deve ter no máximo {campo.max_len} caracteres")
+        if casar is not None and valor and not casar(valor):
+            raise ErroValidacao(nome, campo.mensagem_padrao or f"Campo '{nome}' em formato inválido")
+        if campo.escolhas is not None and valor not in campo.escolhas:
+            raise ErroValidacao(nome, f"Campo '{nome}' deve ser um de: {', '.join(sorted(campo.escolhas))}")
+        if campo.normalizar is not None and valor:
+            valor = campo.normalizar(valor)
+        return valor
+
+    return validar
+
+
+class Schema():
+    def __init__(self, **campos):
+        self.campos = campos
+        self._validadores = tuple((nome, _validador(nome, campo)) for nome, campo in campos.items())
+
+    def validar(self, dados):
+        """Retorna um dict com os campos validados/normalizados ou levanta ErroValidacao"""
+        if not isinstance(dados, dict):
+            raise ErroValidacao(None, "Corpo da requisição deve ser um objeto JSON")
+        return {nome: validar(dados) for nome, validar in self._validadores}
+
+
+def saida_qr(item):
+    """
+    Item de 'outputs': "svg", "png", "png:300" ou {"format": "png", "size": 300}.
+    Retorna (formato, tamanho em px ou None).
+    """
+    if isinstance(item, str):
+        formato, _, tamanho = item.strip().lower().partition(':')
+    elif isinstance(item, dict):
+        formato, tamanho = str(item.get('format', '')).lower(), item.get('size')
+    else:
+        raise ValueError("cada saída deve ser texto ou objeto")
+
+    if formato not in FORMATOS_SAIDA:
+        raise ValueError(f"formato deve ser um de: {', '.join(FORMATOS_SAIDA)}")
+    if tamanho in (None, ''):
+        return formato, None
+    if isinstance(tamanho, bool) or not str(tamanho).isdigit():
+        raise ValueError("tamanho deve ser um inteiro em pixels")
+    tamanho = int(tamanho)
+    if not 0 < tamanho <= TAMANHO_MAXIMO_IMAGEM:
+        raise ValueError(f"tamanho deve estar entre 1 e {TAMANHO_MAXIMO_IMAGEM} px")
+    return formato, tamanho
+
+
+# ============================================================================
+# SCHEMAS DA API
+# ============================================================================
+PADRAO_VALOR = r'\d{1,10}(?:[.,]\d{1,2})?'
+
+_CAMPOS_GERACAO = dict(
+    nome=Campo(obrigatorio=True, max_len=100),
+    chavepix=Campo(obrigatorio=True, max_len=77),
+    valor=Campo(tipo='valor', max_len=13, padrao=PADRAO_VALOR, default='0.00',
+                mensagem_padrao="Campo 'valor' deve ser numérico (ex: 150.50)"),
+    cidade=Campo(obrigatorio=True, max_len=100),
+    # Normalizado como no payload (campo 62-05); a resposta traz o txid efetivo
+    txid=Campo(max_len=35, default='', normalizar=normalizar_txid),
+    return_image=Campo(tipo=bool, default=False),
+    image_format=Campo(escolhas=('base64', 'url'), default='base64'),
+    outputs=Campo(tipo=list, max_len=8, item=saida_qr, default=()),
+)
+
+SCHEMA_GERACAO = Schema(location=Campo(default=None), **_CAMPOS_GERACAO)
+
+# BR Code dinâmico: a location (URL do payload no PSP) substitui chave e valor no código
+SCHEMA_GERACAO_DINAMICA = Schema(**dict(
+    _CAMPOS_GERACAO,
+    chavepix=Campo(max_len=77, default=''),
+    location=Campo(obrigatorio=True, max_len=85),
+))
+
+SCHEMA_VALIDACAO = Schema(
+    payload=Campo(obrigatorio=True, max_len=512),
+)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worker persistente para geração de payloads PIX (modo sidecar).
+
+Fala um protocolo binário simples sobre um Unix domain socket ou stdin/stdout,
+evitando o custo de HTTP + Flask para serviços que só precisam do payload.
+
+Protocolo (cada mensagem é um frame):
+    [4 bytes: tamanho do corpo, big-endian][corpo: array JSON compacto]
+
+    Requisição:  [id, "gen", nome, chavepix, valor, cidade, txid]
+                 [id, "ping"]
+    Resposta:    [id, 1, payload]   sucesso
+                 [id, 0, erro]      falha
+
+Vários pedidos podem ser enviados sem esperar as respostas (pipelining);
+as respostas saem na mesma ordem dos pedidos.
+
+Uso:
+    python pix_worker.py --socket /tmp/pix.sock
+    python pix_worker.py --stdio
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+from functools import lru_cache
+
+from payload_generator import Payload
+
+CABECALHO = struct.Struct('>I')
+TAMANHO_MAXIMO_FRAME = 1 << 20
+TAMANHO_LEITURA = 1 << 16
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+_loads = json.loads
+
+
+@lru_cache(maxsize=4096)
+def gerar_payload(nome, chavepix, valor, cidade, txid):
+    """Gera apenas o payload (sem QR Code); cobranças repetidas vêm do cache"""
+    return Payload(nome=nome, chavepix=chavepix, valor=valor,
+                   cidade=cidade, txtId=txid, diretorio='').gerarPayload(gerar_qrcode=False)
+
+
+def codificar_frame(mensagem):
+    """Serializa uma mensagem em um frame com prefixo de tamanho"""
+    corpo = _dumps(mensagem).encode('utf-8')
+    return CABECALHO.pack(len(corpo)) + corpo
+
+
+def processar_mensagem(mensagem):
+    """Executa um pedido e retorna a resposta correspondente"""
+    if not isinstance(mensagem, list) or len(mensagem) < 2:
+        return [None, 0, "Pedido deve ser um array [id, operação, ...]"]
+    id_ = mensagem[0]
+    try:
+        operacao = mensagem[1]
+        if operacao == 'gen':
+            nome, chavepix, valor, cidade, txid = mensagem[2:7]
+            return [id_, 1, gerar_payload(nome, chavepix, valor or '0.00', cidade, txid or '')]
+        if operacao == 'ping':
+            return [id_, 1, 'pong']
+        return [id_, 0, f"Operação desconhecida: {operacao}"]
+    except Exception as e:
+        return [id_, 0, str(e)]
+
+
+def atender(ler, escrever):
+    """
+    Loop de atendimento de uma conexão.
+
+    `ler(n)` retorna até n bytes (b'' no fim); `escrever(dados)` envia bytes.
+    Todos os frames completos de cada leitura são respondidos em uma única escrita.
+    Frames acima de TAMANHO_MAXIMO_FRAME recebem uma resposta de erro e o corpo
+    é descartado sem ser acumulado; a conexão continua sendo atendida.
+    """
+    buffer = bytearray()
+    descartar = 0
+    while True:
+        dados = ler(TAMANHO_LEITURA)
+        if not dados:
+            return
+        if descartar:
+            pulados = min(descartar, len(dados))
+            descartar -= pulados
+            dados = dados[pulados:]
+        buffer += dados
+
+        respostas = []
+        inicio = 0
+        while len(buffer) - inicio >= CABECALHO.size:
+            (tamanho,) = CABECALHO.unpack_from(buffer, inicio)
+            if tamanho > TAMANHO_MAXIMO_FRAME:
+                respostas.append(codificar_frame([None, 0, f"Frame muito grande: {tamanho} bytes"]))
+                inicio += CABECALHO.size
+                pulados = min(tamanho, len(buffer) - inicio)
+                inicio += pulados
+                descartar = tamanho - pulados
+                continue
+            fim = inicio + CABECALHO.size + tamanho
+            if fim > len(buffer):
+                break
+            try:
+                mensagem = _loads(bytes(buffer[inicio + CABECALHO.size:fim]))
+                resposta = processar_mensagem(mensagem)
+            except ValueError as e:
+                resposta = [None, 0, f"Frame inválido: {e}"]
+            respostas.append(codificar_frame(resposta))
+            inicio = fim
+
+        del buffer[:inicio]
+        if respostas:
+            escrever(b''.join(respostas))
+
+
+class _ConexaoUnix(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        try:
+            atender(sock.recv, sock.sendall)
+        except ConnectionError:
+            pass
+
+
+class ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def servir_socket(caminho):
+    """Atende conexões em um Unix domain socket (uma thread por conexão)"""
+    if os.path.exists(caminho):
+        os.unlink(caminho)
+    with ServidorUnix(caminho, _ConexaoUnix) as servidor:
+        print(f"Worker PIX ouvindo em {caminho}", file=sys.stderr)
+        try:
+            servidor.serve_forever()
+        finally:
+            os.unlink(caminho)
+
+
+def servir_stdio():
+    """Atende um único cliente pelo stdin/stdout (processo filho do serviço)"""
+    entrada = sys.stdin.buffer.raw if hasattr(sys.stdin.buffer, 'raw') else sys.stdin.buffer
+    saida = sys.stdout.buffer
+
+    def escrever(dados):
+        saida.write(dados)
+        saida.flush()
+
+    atender(entrada.read, escrever)
+
+
+class WorkerClient():
+    """Cliente Python do worker, usado em testes e benchmarks"""
+
+    def __init__(self, caminho):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(caminho)
+        self._buffer = bytearray()
+        self._proximo_id = 0
+
+    def enviar(self, pedidos):
+        """Envia vários pedidos de uma vez (pipelining) e retorna as respostas"""
+        frames = []
+        for pedido in pedidos:
+            self._proximo_id += 1
+            frames.append(codificar_frame([self._proximo_id, 'gen', *pedido]))
+        self.sock.sendall(b''.join(frames))
+        return [self._receber() for _ in pedidos]
+
+    def _receber(self):
+        while True:
+            if len(self._buffer) >= CABECALHO.size:
+                (tamanho,) = CABECALHO.unpack_from(self._buffer)
+                fim = CABECALHO.size + tamanho
+                if len(self._buffer) >= fim:
+                    corpo = bytes(self._buffer[CABECALHO.size:fim])
+                    del self._buffer[:fim]
+                    return _loads(corpo)
+            dados = self.sock.recv(TAMANHO_LEITURA)
+            if not dados:
+                raise ConnectionError("Worker encerrou a conexão")
+            self._buffer += dados
+
+    def close(self):
+        self.sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker persistente de payloads PIX")
+    transporte = parser.add_mutually_exclusive_group(required=True)
+    transporte.add_argument('--socket', help="Caminho do Unix domain socket")
+    transporte.add_argument('--stdio', action='store_true', help="Usar stdin/stdout")
+    args = parser.parse_args(argv)
+
+    if args.socket:
+        servir_socket(args.socket)
+    else:
+        servir_stdio()
+
+
+if __name__ == '__main__':
+    main()
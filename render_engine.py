@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de renderização em processos persistentes.
+
+A renderização do QR Code é CPU-bound e o GIL limita um processo a um núcleo.
+O motor mantém um pool de processos de vida longa (qrcode/PIL já carregados e
+aquecidos), envia tuplas compactas de cobrança e recebe as imagens por
+"slots" de um bloco de memória compartilhada (multiprocessing.shared_memory):
+pelo pipe só trafegam o payload e o tamanho, nunca imagens PIL ou bytes.
+
+Uso:
+    motor = MotorRenderizacao(processos=4)
+    payload, png = motor.renderizar(("Loja", "loja@email.com", "10.00", "Sao Paulo", "PED1"))
+    for payload, dados, erro in motor.renderizar_lote(cobrancas):
+        ...
+    motor.fechar()
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from payload_generator import Payload, renderizar_saida
+
+TAMANHO_SLOT = 64 * 1024   # bytes por slot (PNG padrão ~1-3 KB; SVG ~5-10 KB)
+BLOCO_LOTE = 32            # cobranças por tarefa enviada a um processo
+
+# Estado de cada processo de trabalho (definido pelo initializer)
+_shm = None
+_tamanho_slot = None
+
+
+# ============================================================================
+# PROCESSOS DE TRABALHO
+# ============================================================================
+def _inicializar_processo(nome_shm, tamanho_slot):
+    """Anexa a memória compartilhada e pré-aquece qrcode/PIL no processo"""
+    global _shm, _tamanho_slot
+    _shm = shared_memory.SharedMemory(name=nome_shm)
+    _tamanho_slot = tamanho_slot
+    _renderizar(("Aquecimento", "aquecimento@pix.com", "1.00", "Sao Paulo", "WARMUP"), 'png', None)
+    _renderizar(("Aquecimento", "aquecimento@pix.com", "1.00", "Sao Paulo", "WARMUP"), 'svg', None)
+
+
+def _renderizar(cobranca, formato, tamanho):
+    """(payload, bytes) de uma cobrança (nome, chavepix, valor, cidade, txid[, location])"""
+    payload_gen = Payload(*cobranca[:5], diretorio='',
+                          location=cobranca[5] if len(cobranca) > 5 else None)
+    payload = payload_gen.gerarPayload(gerar_qrcode=False)
+    if formato == 'png' and tamanho is None:
+        return payload, payload_gen.gerarPng()
+    return payload, renderizar_saida(payload_gen.get_matriz(), formato, tamanho)
+
+
+def _renderizar_bloco(itens, formato, tamanho):
+    """
+    Renderiza [(slot, cobrança), ...] gravando as imagens nos slots.
+    Retorna [(payload, tamanho em bytes, erro, bytes se não couberam no slot)].
+    """
+    resultados = []
+    for slot, cobranca in itens:
+        try:
+            payload, dados = _renderizar(cobranca, formato, tamanho)
+        except Exception as e:
+            resultados.append((None, 0, str(e), None))
+            continue
+        if len(dados) > _tamanho_slot:
+            # Raro (imagens muito grandes): volta pelo pipe
+            resultados.append((payload, len(dados), None, dados))
+            continue
+        inicio = slot * _tamanho_slot
+        _shm.buf[inicio:inicio + len(dados)] = dados
+        resultados.append((payload, len(dados), None, None))
+    return resultados
+
+
+# ============================================================================
+# MOTOR
+# ============================================================================
+class MotorRenderizacao():
+    def __init__(self, processos=None, slots=None, tamanho_slot=TAMANHO_SLOT):
+        """
+        Args:
+            processos: Processos de trabalho (padrão: nº de CPUs)
+            slots: Imagens que podem estar em voo ao mesmo tempo (padrão: 4 blocos por processo)
+            tamanho_slot: Bytes reservados por imagem na memória compartilhada
+        """
+        self.processos = processos or os.cpu_count() or 1
+        self.slots = slots or self.processos * BLOCO_LOTE * 4
+        self.tamanho_slot = tamanho_slot
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._pool = None
+        self._shm = None
+        self._livres = []
+        self._slots_liberados = threading.Condition()
+
+        self.renderizadas = 0
+        self.fora_do_slot = 0
+        self.erros = 0
+
+    def iniciar(self):
+        """Cria a memória compartilhada e o pool (uma vez por processo; seguro após fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.tamanho_slot)
+            self._livres = list(range(self.slots))
+            # spawn: processos limpos, sem herdar threads/locks do processo pai (Flask, Tk)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processos,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_processo,
+                initargs=(self._shm.name, self.tamanho_slot),
+            )
+            try:
+                # Sobe todos os processos já aquecidos
+                list(self._pool.map(abs, range(self.processos)))
+            except Exception:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._shm.close()
+                self._shm.unlink()
+                self._pool = self._shm = None
+                raise
+            self._pid = os.getpid()
+            atexit.register(self.fechar)
+
+    def fechar(self):
+        """Encerra o pool e libera a memória compartilhada"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._shm.close()
+            self._shm.unlink()
+            self._pid = self._pool = self._shm = None
+
+    # ------------------------------------------------------------------
+    def _reservar(self, quantidade, esperar=True):
+        """
+        Reserva `quantidade` slots de uma vez. Sem `esperar`, retorna None se não
+        houver slots livres (quem já tem blocos em voo deve recebê-los antes de
+        esperar, senão duas chamadas poderiam se bloquear mutuamente).
+        """
+        with self._slots_liberados:
+            while len(self._livres) < quantidade:
+                if not esperar:
+                    return None
+                self._slots_liberados.wait()
+            slots = self._livres[-quantidade:]
+            del self._livres[-quantidade:]
+            return slots
+
+    def _devolver(self, slots):
+        with self._slots_liberados:
+            self._livres.extend(slots)
+            self._slots_liberados.notify_all()
+
+    def _enviar(self, slots, cobrancas, formato, tamanho):
+        """Envia um bloco a um processo; cada cobrança escreve no seu slot"""
+        return slots, self._pool.submit(_renderizar_bloco, list(zip(slots, cobrancas)), formato, tamanho)
+
+    def _receber(self, slots, futuro):
+        """Copia as imagens dos slots, devolve os slots e retorna [(payload, bytes, erro)]"""
+        try:
+            resultados = futuro.result()
+            saida = []
+            for slot, (payload, n, erro, dados) in zip(slots, resultados):
+                if erro is not None:
+                    self.erros += 1
+                elif dados is None:
+                    inicio = slot * self.tamanho_slot
+                    dados = bytes(self._shm.buf[inicio:inicio + n])
+                else:
+                    self.fora_do_slot += 1
+                saida.append((payload, dados, erro))
+            self.renderizadas += len(saida)
+            return saida
+        finally:
+            self._devolver(slots)
+
+    def renderizar(self, cobranca, formato='png', tamanho=None):
+        """
+        Renderiza uma cobrança (seguro entre threads).
+        Retorna (payload, bytes); levanta ValueError se a cobrança for inválida.
+        """
+        self.iniciar()
+        enviado = self._enviar(self._reservar(1), [tuple(cobranca)], formato, tamanho)
+        payload, dados, erro = self._receber(*enviado)[0]
+        if erro is not None:
+            raise ValueError(erro)
+        return payload, dados
+
+    def renderizar_lote(self, cobrancas, formato='png', tamanho=None, bloco=BLOCO_LOTE):
+        """
+        Renderiza um iterável de cobranças em paralelo, mantendo a ordem.
+        Gera (payload, bytes, erro) para cada cobrança; erro é None em caso de sucesso.
+        """
+        self.iniciar()
+        bloco = max(1, min(bloco, self.slots // 2))
+        pendentes = deque()
+
+        def submeter(atual):
+            while True:
+                slots = self._reservar(len(atual), esperar=not pendentes)
+                if slots is not None:
+                    break
+                yield from self._receber(*pendentes.popleft())
+            pendentes.append(self._enviar(slots, atual, formato, tamanho))
+
+        try:
+            atual = []
+            for cobranca in cobrancas:
+                atual.append(tuple(cobranca))
+                if len(atual) >= bloco:
+                    yield from submeter(atual)
+                    atual = []
+                    # Janela limitada: no máximo metade dos slots em voo por chamada
+                    while len(pendentes) * bloco >= self.slots // 2:
+                        yield from self._receber(*pendentes.popleft())
+            if atual:
+                yield from submeter(atual)
+            while pendentes:
+                yield from self._receber(*pendentes.popleft())
+        finally:
+            # Lote abandonado no meio: espera os processos antes de liberar os slots
+            while pendentes:
+                slots, futuro = pendentes.popleft()
+                futuro.exception()
+                self._devolver(slots)
+
+    def estatisticas(self):
+        return {
+            "processes": self.processos,
+            "slots": self.slots,
+            "slot_bytes": self.tamanho_slot,
+            "free_slots": len(self._livres),
+            "started": self._pid == os.getpid(),
+            "rendered": self.renderizadas,
+            "oversized": self.fora_do_slot,
+            "errors": self.erros,
+        }
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Entrega eficiente dos arquivos estáticos e das páginas institucionais.
+
+- Arquivos estáticos com URLs versionadas (?v=<hash>) e cache de longa duração
+- Variantes pré-comprimidas (.br/.gz) geradas em build e escolhidas por Accept-Encoding
+- Páginas estáticas (index, docs, formulário, sitemap) renderizadas uma única vez
+  e servidas com ETag/Last-Modified
+
+Build das variantes comprimidas:
+    python static_assets.py
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+import time
+from functools import wraps
+
+from flask import current_app, request, send_file, abort, make_response
+from werkzeug.http import parse_accept_header
+from werkzeug.security import safe_join
+
+from pix_cache import TTLCache
+
+# Extensões que valem a pena comprimir (PNG/JPEG já são comprimidos)
+EXTENSOES_COMPRIMIVEIS = ('.css', '.js', '.svg', '.ico', '.xml', '.html', '.txt', '.json')
+CACHE_LONGO = 'public, max-age=31536000, immutable'
+CACHE_CURTO = 'public, max-age=3600'
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# ============================================================================
+# BUILD DAS VARIANTES PRÉ-COMPRIMIDAS
+# ============================================================================
+def comprimir_estaticos(diretorio):
+    """Gera arquivos .gz (e .br, se o módulo brotli estiver instalado) ao lado dos originais"""
+    gerados = []
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            if not nome.endswith(EXTENSOES_COMPRIMIVEIS):
+                continue
+            caminho = os.path.join(raiz, nome)
+            with open(caminho, 'rb') as f:
+                dados = f.read()
+
+            variantes = [('.gz', gzip.compress(dados, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variantes.append(('.br', brotli.compress(dados, quality=11)))
+
+            for sufixo, comprimido in variantes:
+                # Só mantém a variante se a economia for relevante
+                if len(comprimido) < len(dados) * 0.95:
+                    with open(caminho + sufixo, 'wb') as f:
+                        f.write(comprimido)
+                    gerados.append((caminho + sufixo, len(dados), len(comprimido)))
+    return gerados
+
+
+# ============================================================================
+# ARQUIVOS ESTÁTICOS
+# ============================================================================
+class AssetsEstaticos():
+    def __init__(self, app):
+        self.app = app
+        self.diretorio = app.static_folder
+        self._fingerprints = {}
+
+        # URLs de arquivos estáticos ganham ?v=<hash do conteúdo>
+        app.url_defaults(self._adicionar_versao)
+        app.view_functions['static'] = self.servir
+
+    def fingerprint(self, filename):
+        """Hash curto do conteúdo do arquivo (calculado uma vez por processo)"""
+        versao = self._fingerprints.get(filename)
+        if versao is None:
+            caminho = safe_join(self.diretorio, filename)
+            if caminho is None or not os.path.isfile(caminho):
+                return None
+            with open(caminho, 'rb') as f:
+                versao = hashlib.sha256(f.read()).hexdigest()[:12]
+            self._fingerprints[filename] = versao
+        return versao
+
+    def _adicionar_versao(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            versao = self.fingerprint(values['filename'])
+            if versao:
+                values['v'] = versao
+
+    def servir(self, filename):
+        """Serve um arquivo estático, preferindo a variante pré-comprimida aceita pelo cliente"""
+        caminho = safe_join(self.diretorio, filename)
+        if caminho is None or not os.path.isfile(caminho):
+            abort(404)
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        aceitas = parse_accept_header(request.headers.get('Accept-Encoding', ''))
+        arquivo, codificacao = caminho, None
+        for sufixo, nome in (('.br', 'br'), ('.gz', 'gzip')):
+            if aceitas[nome] and os.path.isfile(caminho + sufixo):
+                arquivo, codificacao = caminho + sufixo, nome
+                break
+
+        response = send_file(arquivo, mimetype=mimetype, conditional=True, etag=True)
+        if codificacao:
+            response.headers['Content-Encoding'] = codificacao
+        response.vary.add('Accept-Encoding')
+
+        # URL versionada: o conteúdo nunca muda, pode ficar em cache por um ano
+        versionada = request.args.get('v') and request.args.get('v') == self.fingerprint(filename)
+        response.headers['Cache-Control'] = CACHE_LONGO if versionada else CACHE_CURTO
+        return response
+
+
+# ============================================================================
+# PÁGINAS EM CACHE
+# ============================================================================
+# Uma entrada por página decorada (e por PIX_PUBLIC_URL); o limite só protege contra excessos
+paginas_cache = TTLCache(max_entradas=16, ttl=3600)
+
+
+def pagina_em_cache(view):
+    """
+    Decorator para views sem parâmetros cujo conteúdo não depende da requisição:
+    renderiza uma vez e serve a mesma resposta, com ETag e gzip. Links absolutos
+    nessas páginas devem usar PIX_PUBLIC_URL, nunca o cabeçalho Host.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        chave = (request.path, current_app.config.get('PIX_PUBLIC_URL', ''))
+        entrada = paginas_cache.get(chave)
+        if entrada is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            corpo = response.get_data()
+            entrada = {
+                "corpo": corpo,
+                "gzip": gzip.compress(corpo, compresslevel=6),
+                "mimetype": response.mimetype,
+                "etag": hashlib.sha256(corpo).hexdigest()[:20],
+                "last_modified": time.time()
+            }
+            paginas_cache.set(chave, entrada)
+
+        usar_gzip = bool(parse_accept_header(request.headers.get('Accept-Encoding', ''))['gzip'])
+        response = make_response(entrada["gzip"] if usar_gzip else entrada["corpo"])
+        response.mimetype = entrada["mimetype"]
+        if usar_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+            response.set_etag(entrada["etag"] + '-gz')
+        else:
+            response.set_etag(entrada["etag"])
+        response.last_modified = entrada["last_modified"]
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = 'public, max-age=300'
+        return response.make_conditional(request)
+
+    return wrapper
+
+
+if __name__ == '__main__':
+    diretorio = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    for caminho, original, comprimido in comprimir_estaticos(diretorio):
+        print(f"{caminho}: {original} -> {comprimido} bytes")
@@ -1,11 +1,9 @@
 #!/usr/bin/env python3
-import qrcode, unicodedata
-
-def _norm(s: str) -> str:
-    return unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode().upper()
+import qrcode
+from payload_generator import normalizar_texto, TAMANHO_MAXIMO_NOME, TAMANHO_MAXIMO_CIDADE
 
 def _f(id_: str, v: str) -> str:
-    return f"{id_}{len(v):02}{v}"
+    return f"{id_}{len(v.encode('utf-8')):02}{v}"
 
 def _crc16(s: str) -> str:
     reg = 0xFFFF
@@ -17,8 +15,8 @@ def _crc16(s: str) -> str:
     return f"{reg:04X}"
 
 def payload_pix(chave, nome, cidade, valor, txid="***"):
-    nome = _norm(nome).strip()[:25]
-    cidade = _norm(cidade).strip()[:15]
+    nome = normalizar_texto(nome, TAMANHO_MAXIMO_NOME)
+    cidade = normalizar_texto(cidade, TAMANHO_MAXIMO_CIDADE)
     valor = f"{valor:.2f}"
     mai = _f("26", _f("00", "BR.GOV.BCB.PIX") + _f("01", chave))
     partes = [
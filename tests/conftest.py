@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+# Registro de cobranças em um diretório temporário (antes de qualquer importação do app)
+os.environ.setdefault('PIX_REGISTRY_PATH', os.path.join(tempfile.mkdtemp(), 'pix_registry_test.db'))
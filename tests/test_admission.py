@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+import app as modulo
+from admission import AdmissionController, SobrecargaError, PRIORIDADE_IMAGEM, PRIORIDADE_PAYLOAD
+
+
+class _Pedido(threading.Thread):
+    """adquirir() em outra thread; guarda a ordem de admissão ou o erro"""
+
+    def __init__(self, controle, prioridade, admitidos):
+        super().__init__(daemon=True)
+        self.controle = controle
+        self.prioridade = prioridade
+        self.admitidos = admitidos
+        self.erro = None
+
+    def run(self):
+        try:
+            self.controle.adquirir(self.prioridade)
+            self.admitidos.append(self)
+        except SobrecargaError as e:
+            self.erro = e
+
+
+def _esperar_fila(controle, tamanho):
+    limite = time.monotonic() + 2
+    while controle.estatisticas()["queued"] != tamanho:
+        assert time.monotonic() < limite, "fila não chegou ao tamanho esperado"
+        time.sleep(0.001)
+
+
+def test_admite_ate_o_limite_de_concorrencia():
+    controle = AdmissionController(max_concorrencia=2, max_fila=0, retry_after=7)
+    controle.adquirir()
+    controle.adquirir()
+    assert controle.estatisticas()["active"] == 2
+
+    with pytest.raises(SobrecargaError) as erro:
+        controle.adquirir()
+    assert (erro.value.status, erro.value.retry_after) == (429, 7)
+    assert controle.estatisticas()["rejected"] == 1
+
+    controle.liberar()
+    controle.adquirir()
+    assert controle.estatisticas()["admitted"] == 3
+
+
+def test_fila_cheia_responde_429():
+    controle = AdmissionController(max_concorrencia=1, max_fila=1, timeout_fila=5)
+    controle.adquirir()
+    admitidos = []
+    na_fila = _Pedido(controle, PRIORIDADE_IMAGEM, admitidos)
+    na_fila.start()
+    _esperar_fila(controle, 1)
+
+    with pytest.raises(SobrecargaError) as erro:
+        controle.adquirir(PRIORIDADE_IMAGEM)
+    assert erro.value.status == 429
+
+    controle.liberar()
+    na_fila.join(2)
+    assert admitidos == [na_fila]
+    assert controle.estatisticas()["active"] == 1
+
+
+def test_tempo_de_fila_esgotado_responde_503():
+    controle = AdmissionController(max_concorrencia=1, max_fila=4, timeout_fila=0.05, retry_after=3)
+    controle.adquirir()
+    inicio = time.monotonic()
+    with pytest.raises(SobrecargaError) as erro:
+        controle.adquirir()
+    assert time.monotonic() - inicio >= 0.05
+    assert (erro.value.status, erro.value.retry_after) == (503, 3)
+    estatisticas = controle.estatisticas()
+    assert (estatisticas["queued"], estatisticas["timed_out"]) == (0, 1)
+
+
+def test_vaga_liberada_vai_primeiro_para_pedidos_so_de_payload():
+    controle = AdmissionController(max_concorrencia=1, max_fila=4, timeout_fila=5)
+    controle.adquirir()
+    admitidos = []
+    imagem = _Pedido(controle, PRIORIDADE_IMAGEM, admitidos)
+    imagem.start()
+    _esperar_fila(controle, 1)
+    payload = _Pedido(controle, PRIORIDADE_PAYLOAD, admitidos)
+    payload.start()
+    _esperar_fila(controle, 2)
+
+    controle.liberar()
+    payload.join(2)
+    assert admitidos == [payload]
+    controle.liberar()
+    imagem.join(2)
+    assert admitidos == [payload, imagem]
+
+
+def test_payload_com_fila_cheia_desloca_pedido_de_imagem():
+    controle = AdmissionController(max_concorrencia=1, max_fila=1, timeout_fila=5)
+    controle.adquirir()
+    admitidos = []
+    imagem = _Pedido(controle, PRIORIDADE_IMAGEM, admitidos)
+    imagem.start()
+    _esperar_fila(controle, 1)
+
+    payload = _Pedido(controle, PRIORIDADE_PAYLOAD, admitidos)
+    payload.start()
+    imagem.join(2)
+    assert imagem.erro is not None and imagem.erro.status == 429
+
+    # Fila cheia com um pedido de payload: outro de payload não o desloca
+    with pytest.raises(SobrecargaError):
+        controle.adquirir(PRIORIDADE_PAYLOAD)
+
+    controle.liberar()
+    payload.join(2)
+    assert admitidos == [payload]
+
+
+def test_vaga_e_devolvida_mesmo_com_erro():
+    controle = AdmissionController(max_concorrencia=1, max_fila=0)
+    with pytest.raises(RuntimeError):
+        with controle.vaga():
+            assert controle.estatisticas()["active"] == 1
+            raise RuntimeError("falha na geração")
+    assert controle.estatisticas()["active"] == 0
+
+
+def test_api_sobrecarregada_responde_com_retry_after(monkeypatch):
+    controle = AdmissionController(max_concorrencia=1, max_fila=0, retry_after=9)
+    monkeypatch.setattr(modulo, 'admission', controle)
+    controle.adquirir()
+    resposta = modulo.app.test_client().post('/api/v1/pix/generate', json={
+        "nome": "Loja", "chavepix": "loja@email.com", "valor": "7.77", "cidade": "Sao Paulo", "return_image": True})
+    assert resposta.status_code == 429
+    assert resposta.headers['Retry-After'] == '9'
+    assert resposta.get_json()["success"] is False
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+from urllib.parse import quote
+
+import pytest
+
+from app import app
+
+
+@pytest.fixture
+def cliente():
+    return app.test_client()
+
+
+def test_validate_tamanho_negativo_nao_trava(cliente):
+    resposta = cliente.post('/api/v1/pix/validate', json={"payload": "00-46304ABCD"})
+    assert resposta.status_code == 200
+    assert resposta.get_json()["valid"] is False
+    assert resposta.get_json()["error"]
+
+
+def _gerar(cliente, **campos):
+    corpo = dict({"nome": "Loja", "chavepix": "loja@email.com", "valor": "10.00", "cidade": "Sao Paulo"}, **campos)
+    return cliente.post('/api/v1/pix/generate', json=corpo)
+
+
+def _gerar_formulario(cliente, **campos):
+    corpo = dict({"nome": "Loja", "chavepix": "loja@email.com", "valor": "1.00", "cidade": "Sao Paulo"}, **campos)
+    return cliente.post('/generate', data=corpo)
+
+
+def test_registro_da_api_por_txid(cliente):
+    from app import registry
+
+    resposta = _gerar(cliente, txid="PED1")
+    assert resposta.status_code == 200
+    registry.flush()
+    encontrada = cliente.get('/api/v1/pix/charges/PED1')
+    assert encontrada.status_code == 200
+    assert encontrada.get_json()["charges"][0]["payload"] == resposta.get_json()["payload"]
+
+
+@pytest.mark.parametrize('txid_pedido, txid_payload', [("PED-1", "PED1"), ("pedido 12", "pedido12")])
+def test_api_normaliza_txid_e_devolve_o_usado(cliente, txid_pedido, txid_payload):
+    from pix_decoder import decodificar_brcode
+
+    resposta = _gerar(cliente, txid=txid_pedido)
+    assert resposta.status_code == 200
+    assert resposta.get_json()["data"]["txid"] == txid_payload
+    assert decodificar_brcode(resposta.get_json()["payload"])[0] == txid_payload
+
+
+@pytest.mark.parametrize('txid_pedido, txid_payload', [
+    ("PED-2", "PED2"),
+    ("Pedido 42-b", "Pedido42b"),
+])
+def test_registro_usa_txid_do_payload(cliente, txid_pedido, txid_payload):
+    from app import registry
+
+    resposta = _gerar_formulario(cliente, txid=txid_pedido)
+    assert resposta.status_code == 200
+    registry.flush()
+
+    for consulta in (txid_payload, txid_pedido):
+        encontrada = cliente.get(f'/api/v1/pix/charges/{quote(consulta)}')
+        assert encontrada.status_code == 200
+        assert encontrada.get_json()["txid"] == txid_payload
+        assert encontrada.get_json()["charges"][0]["txid"] == txid_payload
+
+
+@pytest.mark.parametrize('caminho', ['/api/v1/pix/generate', '/api/v1/pix/validate'])
+def test_rotas_post_respondem_405_a_get(cliente, caminho):
+    assert cliente.get(caminho).status_code == 405
+
+
+def test_registro_do_formulario_usa_txid_truncado(cliente):
+    from app import registry
+
+    txid = "FORM" + "7" * 26
+    resposta = _gerar_formulario(cliente, txid=txid)
+    assert resposta.status_code == 200
+    registry.flush()
+    encontrada = cliente.get(f'/api/v1/pix/charges/{txid}')
+    assert encontrada.status_code == 200
+    assert encontrada.get_json()["txid"] == txid[:25]
+
+
+@pytest.mark.parametrize('limit, esperado', [(None, 20), ('5', 5), ('0', 1), ('-3', 1), ('1000', 100)])
+def test_debug_memory_limita_limit(cliente, monkeypatch, limit, esperado):
+    import app as modulo
+
+    pedidos = []
+    monkeypatch.setitem(modulo.app.config, 'PIX_MEMORY_TRACE', True)
+    monkeypatch.setattr(modulo.memoria, 'top_alocacoes', lambda limite, agrupar: pedidos.append(limite) or [])
+    resposta = cliente.get('/api/v1/debug/memory', query_string={} if limit is None else {'limit': limit})
+    assert resposta.status_code == 200
+    assert pedidos == [esperado]
+
+
+@pytest.mark.parametrize('limit', ['abc', '1.5', ''])
+def test_debug_memory_recusa_limit_nao_numerico(cliente, monkeypatch, limit):
+    import app as modulo
+
+    monkeypatch.setitem(modulo.app.config, 'PIX_MEMORY_TRACE', True)
+    resposta = cliente.get('/api/v1/debug/memory', query_string={'limit': limit})
+    assert resposta.status_code == 400
+    assert resposta.get_json()["success"] is False
+
+
+def test_paginas_em_cache_nao_dependem_do_host(cliente, monkeypatch):
+    from static_assets import paginas_cache
+
+    monkeypatch.setitem(cliente.application.config, 'PIX_PUBLIC_URL', '')
+    paginas_cache.pop(('/', ''))
+    antes = len(paginas_cache)
+    for i in range(50):
+        resposta = cliente.get('/', headers={'Host': f'atacante{i}.exemplo.com'})
+        assert resposta.status_code == 200
+        assert b'atacante' not in resposta.get_data()
+    assert len(paginas_cache) == antes + 1
+
+    documentacao = cliente.get('/api/docs', headers={'Host': 'atacante.exemplo.com'}).get_data()
+    assert b'"http://localhost:5000/api/v1/pix/generate"' in documentacao
+    assert b'window.location.origin' in documentacao
+    assert b'<link rel="canonical" href="/api/docs">' in documentacao
+    assert b'atacante' not in documentacao
+
+    monkeypatch.setitem(cliente.application.config, 'PIX_PUBLIC_URL', 'https://pix.exemplo.com')
+    resposta = cliente.get('/api/docs', headers={'Host': 'atacante.exemplo.com'})
+    assert b'https://pix.exemplo.com/api/v1/pix/generate' in resposta.get_data()
+    assert b'<link rel="canonical" href="https://pix.exemplo.com/api/docs">' in resposta.get_data()
+    assert b'window.location.origin' not in resposta.get_data()
+    assert b'atacante' not in resposta.get_data()
+
+
+@pytest.mark.parametrize('limit, esperado', [('-1', 1), ('0', 1), ('2', 2), ('5000', 1000)])
+def test_lista_de_cobrancas_limita_limit(cliente, monkeypatch, limit, esperado):
+    import app as modulo
+
+    pedidos = []
+    monkeypatch.setattr(modulo.registry, 'buscar_por_periodo',
+                        lambda inicio, fim, limite: pedidos.append(limite) or [])
+    resposta = cliente.get('/api/v1/pix/charges', query_string={'limit': limit})
+    assert resposta.status_code == 200
+    assert pedidos == [esperado]
+
+
+@pytest.mark.parametrize('parametros', [{'limit': 'abc'}, {'limit': '1.5'}, {'since': 'ontem'}])
+def test_lista_de_cobrancas_recusa_parametro_invalido(cliente, parametros):
+    resposta = cliente.get('/api/v1/pix/charges', query_string=parametros)
+    assert resposta.status_code == 400
+    assert resposta.get_json()["success"] is False
+
+
+def _lote(cliente, cobrancas, **kwargs):
+    resposta = cliente.post('/api/v1/pix/generate/batch', json={"charges": cobrancas}, **kwargs)
+    assert resposta.status_code == 200
+    return resposta.get_json()["results"]
+
+
+def _item(txid, **campos):
+    return dict({"nome": "Loja", "chavepix": "loja@email.com", "valor": "3.00", "cidade": "Sao Paulo",
+                 "txid": txid}, **campos)
+
+
+def test_lote_reenviado_nao_gera_nem_registra_de_novo(cliente, monkeypatch):
+    import app as modulo
+
+    registradas = []
+    monkeypatch.setattr(modulo, 'registrar_cobranca', lambda *args, **kwargs: registradas.append(args))
+    cobrancas = [_item("LOTEIDEM1"), _item("LOTEIDEM2"), _item("")]
+
+    primeira = _lote(cliente, cobrancas)
+    assert len(registradas) == 3
+    assert not any(r.get("idempotent_replayed") for r in primeira)
+
+    segunda = _lote(cliente, cobrancas)
+    assert len(registradas) == 4  # só o item sem txid é gerado de novo
+    assert [r.get("idempotent_replayed", False) for r in segunda] == [True, True, False]
+    assert [r["payload"] for r in segunda[:2]] == [r["payload"] for r in primeira[:2]]
+    assert all(r["status"] == 200 for r in segunda)
+
+
+def test_item_do_lote_reaproveita_a_geracao_individual(cliente):
+    individual = _gerar(cliente, txid="LOTEIDEM3")
+    item = _lote(cliente, [dict({"nome": "Loja", "chavepix": "loja@email.com", "valor": "10.00",
+                                 "cidade": "Sao Paulo"}, txid="LOTEIDEM3")])[0]
+    assert item["idempotent_replayed"] is True
+    assert item["payload"] == individual.get_json()["payload"]
+
+
+def test_idempotency_key_do_lote_vale_por_item(cliente):
+    cabecalho = {'Idempotency-Key': 'lote-idem-4'}
+    primeira = _lote(cliente, [_item(""), _item("", valor="4.00")], headers=cabecalho)
+    segunda = _lote(cliente, [_item(""), _item("", valor="5.00")], headers=cabecalho)
+
+    assert segunda[0]["idempotent_replayed"] is True
+    assert segunda[0]["payload"] == primeira[0]["payload"]
+    assert segunda[1]["status"] == 422
+    assert segunda[1]["success"] is False
+
+
+def test_registro_guarda_os_campos_do_payload(cliente):
+    from app import registry
+
+    estatico = _gerar(cliente, txid="REG-VALOR-1", valor="10", nome="Padaria Ação").get_json()["payload"]
+    dinamico = _gerar(cliente, txid="REGDIN1", chavepix="", location="psp.exemplo.com/qr/v2/" + "b" * 32,
+                      nome="Padaria Ação").get_json()["payload"]
+    registry.flush()
+
+    registro = dict(registry.buscar_por_payload(estatico)[0])
+    assert (registro["txid"], registro["valor"], registro["chavepix"], registro["nome"]) == (
+        "REGVALOR1", "10.00", "loja@email.com", "PADARIA ACAO")
+
+    registro = dict(registry.buscar_por_payload(dinamico)[0])
+    assert (registro["txid"], registro["valor"], registro["chavepix"]) == (
+        "***", "", "psp.exemplo.com/qr/v2/" + "b" * 32)
+    assert cliente.get('/api/v1/pix/charges/REGDIN1').status_code == 404
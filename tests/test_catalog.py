@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+import threading
+
+from catalog import PreaquecedorCatalogo
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CATALOGO = os.path.join(RAIZ, 'catalog.example.json')
+
+
+def test_executar_e_sincrono():
+    geradas = []
+    threads_antes = threading.active_count()
+    preaquecedor = PreaquecedorCatalogo(CATALOGO, lambda *cobranca: geradas.append(cobranca))
+    preaquecedor.executar()
+    assert preaquecedor.status["state"] == "done"
+    assert preaquecedor.status["done"] == len(geradas) == 10
+    assert threading.active_count() == threads_antes
+
+    # Já concluído: nem a versão em segundo plano roda de novo
+    preaquecedor.iniciar()
+    assert len(geradas) == 10
+
+
+def test_importar_app_nao_inicia_thread_do_catalogo(tmp_path):
+    # Com preload_app o gunicorn importa o app no master: nenhuma thread pode sobrar para o fork
+    codigo = ("import threading, app; "
+              "print(sorted(t.name for t in threading.enumerate() if t.name == 'preaquecimento-catalogo'))")
+    env = dict(os.environ, PIX_CATALOG=CATALOGO, PIX_REGISTRY_PATH=str(tmp_path / 'r.db'))
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, env=env,
+                           capture_output=True, text=True, timeout=60)
+    assert saida.returncode == 0, saida.stderr
+    assert saida.stdout.strip().splitlines()[-1] == '[]'
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from idempotency import IdempotencyStore
+
+DUPLICATAS = 4
+
+
+def _concorrentes(store, respostas):
+    """
+    Dispara a original e DUPLICATAS cópias com a mesma chave enquanto a primeira
+    chamada de `gerar` está bloqueada; a n-ésima chamada devolve respostas[n].
+    """
+    liberar = threading.Event()
+    chamadas = []
+
+    def gerar():
+        chamadas.append(None)
+        if len(chamadas) == 1:
+            liberar.wait(5)
+        return respostas[min(len(chamadas), len(respostas)) - 1]
+
+    resultados = [None] * (DUPLICATAS + 1)
+
+    def requisicao(i):
+        resultados[i] = store.executar('key:pedido', 'impressao', gerar)
+
+    threads = [threading.Thread(target=requisicao, args=(i,)) for i in range(DUPLICATAS + 1)]
+    threads[0].start()
+    while not chamadas:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    liberar.set()
+    for thread in threads:
+        thread.join(5)
+    return resultados, len(chamadas)
+
+
+def test_duplicatas_recebem_a_resposta_da_original():
+    store = IdempotencyStore()
+    resultados, chamadas = _concorrentes(store, [(200, b'{"ok":1}', {})])
+
+    assert chamadas == 1
+    assert resultados[0] == (200, b'{"ok":1}', {}, False)
+    assert all(r == (200, b'{"ok":1}', {}, True) for r in resultados[1:])
+    assert store.executar('key:pedido', 'impressao', lambda: (500, b'', {}))[3] is True
+
+
+def test_duplicatas_recebem_a_mesma_recusa_por_sobrecarga():
+    store = IdempotencyStore()
+    recusa = (429, b'{"success":false}', {'Retry-After': '1'})
+    resultados, chamadas = _concorrentes(store, [recusa])
+
+    assert all(r == recusa + (False,) for r in resultados)
+    assert store.estatisticas()["coalesced"] == 0
+    # Nada memorizado: a próxima tentativa gera de novo
+    assert store.executar('key:pedido', 'impressao', lambda: (200, b'{}', {})) == (200, b'{}', {}, False)
+
+
+def test_duplicatas_tentam_de_novo_quando_a_original_falha():
+    store = IdempotencyStore()
+    resultados, chamadas = _concorrentes(store, [(500, b'{"erro":1}', {}), (200, b'{"ok":1}', {})])
+
+    assert resultados[0] == (500, b'{"erro":1}', {}, False)
+    assert chamadas == 2
+    assert all(r[:3] == (200, b'{"ok":1}', {}) for r in resultados[1:])
+
+
+def test_duplicatas_tentam_de_novo_quando_a_original_levanta():
+    store = IdempotencyStore()
+    chamadas = []
+    liberar = threading.Event()
+
+    def gerar():
+        chamadas.append(None)
+        if len(chamadas) == 1:
+            liberar.wait(5)
+            raise RuntimeError("falha")
+        return 200, b'{"ok":1}', {}
+
+    erros = []
+
+    def original():
+        try:
+            store.executar('key:pedido', 'impressao', gerar)
+        except RuntimeError as e:
+            erros.append(e)
+
+    thread = threading.Thread(target=original)
+    thread.start()
+    while not chamadas:
+        time.sleep(0.001)
+    duplicata = []
+    segunda = threading.Thread(target=lambda: duplicata.append(store.executar('key:pedido', 'impressao', gerar)))
+    segunda.start()
+    time.sleep(0.05)
+    liberar.set()
+    thread.join(5)
+    segunda.join(5)
+
+    assert len(erros) == 1
+    assert duplicata == [(200, b'{"ok":1}', {}, False)]
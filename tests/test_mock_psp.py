@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import re
+
+import pytest
+
+import app as modulo
+from mock_psp import criar_app, ler_jws
+from payload_generator import Payload, TAMANHO_MAXIMO_LOCATION
+from pix_decoder import decodificar_brcode
+
+NOME, CIDADE = "LOJA EXEMPLO", "SAO PAULO"
+COBRANCA = {"calendario": {"expiracao": 600}, "valor": {"original": "12.30"}, "chave": "loja@email.com"}
+
+
+@pytest.fixture
+def psp():
+    return criar_app(NOME, CIDADE, segredo=b'segredo-de-teste').test_client()
+
+
+def _criar(psp, **kwargs):
+    resposta = psp.post('/v2/cob', json=COBRANCA, **kwargs)
+    assert resposta.status_code == 201
+    return resposta.get_json()
+
+
+# ---------------------------------------------------------------------------
+# Payload(location=...)
+# ---------------------------------------------------------------------------
+def test_payload_dinamico_tem_campos_do_br_code_dinamico():
+    location = "psp.exemplo.com/qr/v2/" + "a" * 32
+    payload = Payload("Loja", "loja@email.com", "10.00", "Sao Paulo", "PED1",
+                      location="https://" + location).gerarPayload(gerar_qrcode=False)
+
+    # Ponto de iniciação 12 (uso único) logo após o formato do payload
+    assert payload.startswith("000201" + "010212")
+    # Conta do recebedor só com GUI e location (subcampo 25), sem chave
+    assert f"26760014BR.GOV.BCB.PIX2554{location}" in payload
+    assert "loja@email.com" not in payload
+    # Sem valor (campo 54) e txid '***' no campo 62
+    assert "5405" not in payload
+    assert "62070503***6304" in payload
+
+    txid, valor, chave, nome, cidade, crc_valido, erro = decodificar_brcode(payload)
+    assert (txid, valor, chave, crc_valido, erro) == ("***", "", location, True, "")
+
+
+@pytest.mark.parametrize('location', ["psp.exemplo.com/qr/v2/ com espaço", "https://", "p" * (TAMANHO_MAXIMO_LOCATION + 1)])
+def test_location_invalida(location):
+    with pytest.raises(ValueError):
+        Payload.dinamico("Loja", "Sao Paulo", location)
+
+
+# ---------------------------------------------------------------------------
+# PSP simulado
+# ---------------------------------------------------------------------------
+def test_psp_cria_cobranca_com_location_e_copia_e_cola(psp):
+    cobranca = _criar(psp)
+    assert re.fullmatch(r'localhost/qr/v2/[0-9a-f]{32}', cobranca["location"])
+    assert cobranca["valor"] == {"original": "12.30"}
+    assert cobranca["pixCopiaECola"] == Payload.dinamico(NOME, CIDADE, cobranca["location"]).gerarPayload(
+        gerar_qrcode=False)
+
+    consulta = psp.get(f'/v2/cob/{cobranca["txid"]}')
+    assert consulta.status_code == 200
+    assert consulta.get_json()["location"] == cobranca["location"]
+
+
+def test_psp_serve_a_location_como_jws_assinado(psp):
+    cobranca = _criar(psp)
+    resposta = psp.get('/' + cobranca["location"].split('/', 1)[1])
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/jose'
+
+    conteudo = ler_jws(resposta.get_data(as_text=True), b'segredo-de-teste')
+    assert (conteudo["txid"], conteudo["valor"], conteudo["chave"]) == (
+        cobranca["txid"], {"original": "12.30"}, "loja@email.com")
+    with pytest.raises(ValueError):
+        ler_jws(resposta.get_data(as_text=True), b'outro-segredo')
+
+
+def test_psp_txid_informado(psp):
+    txid = "A" * 26
+    assert psp.put(f'/v2/cob/{txid}', json=COBRANCA).status_code == 201
+    assert psp.put(f'/v2/cob/{txid}', json=COBRANCA).status_code == 409
+    assert psp.put('/v2/cob/CURTO', json=COBRANCA).status_code == 400
+    assert psp.post('/v2/cob', json={"chave": "x"}).status_code == 400
+    assert psp.get('/v2/cob/inexistente').status_code == 404
+    assert psp.get('/qr/v2/' + "0" * 32).status_code == 404
+
+
+# ---------------------------------------------------------------------------
+# API com location criada no PSP simulado
+# ---------------------------------------------------------------------------
+def _gerar_dinamico(location, **campos):
+    corpo = dict({"nome": NOME, "cidade": CIDADE, "location": location}, **campos)
+    return modulo.app.test_client().post('/api/v1/pix/generate', json=corpo)
+
+
+def test_api_gera_o_mesmo_codigo_que_o_psp(psp):
+    cobranca = _criar(psp)
+    resposta = _gerar_dinamico("https://" + cobranca["location"], return_image=True)
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert dados["payload"] == cobranca["pixCopiaECola"]
+    assert dados["data"]["location"] == cobranca["location"]
+    assert dados["qr_code"]["data"].startswith("data:image/png;base64,")
+
+
+def test_api_dinamica_nao_confere_a_chave(psp, monkeypatch):
+    monkeypatch.setitem(modulo.app.config, 'PIX_KEY_CHECK', True)
+    cobranca = _criar(psp)
+
+    # Chave inválida (ou ausente) é ignorada: o código leva só a location
+    for chavepix in ("chave-invalida", ""):
+        resposta = _gerar_dinamico(cobranca["location"], chavepix=chavepix)
+        assert resposta.status_code == 200
+        assert resposta.get_json()["payload"] == cobranca["pixCopiaECola"]
+
+    # Sem location a mesma chave é recusada
+    estatico = modulo.app.test_client().post('/api/v1/pix/generate', json={
+        "nome": NOME, "cidade": CIDADE, "chavepix": "chave-invalida", "valor": "1.00"})
+    assert estatico.status_code == 400
+    assert estatico.get_json()["field"] == "chavepix"
+
+
+def test_api_dinamica_recusa_location_invalida():
+    resposta = _gerar_dinamico("psp.exemplo.com/qr/v2/ com espaço")
+    assert resposta.status_code == 400
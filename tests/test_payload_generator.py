@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from payload_generator import (Payload, campo_emv, crc16_ccitt, normalizar_texto,
+                               TAMANHO_MAXIMO_NOME, TAMANHO_MAXIMO_CIDADE)
+
+
+def gerar(**campos):
+    dados = {"nome": "Loja", "chavepix": "loja@email.com", "valor": "10.50",
+             "cidade": "Sao Paulo", "txtId": "PED1", "diretorio": ''}
+    dados.update(campos)
+    return Payload(**dados)
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ("Padaria Ação", "PADARIA ACAO"),
+    ("  são   joão\tdel-rei ", "SAO JOAO DEL-REI"),
+    ("Café ☕ 東京", "CAFE"),
+    ("Ｌｏｊａ", "LOJA"),  # largura total (NFKD)
+])
+def test_normaliza_acentos_e_multibyte(texto, esperado):
+    assert normalizar_texto(texto) == esperado
+
+
+def test_trunca_nome_e_cidade():
+    payload = gerar(nome="Comércio de Alimentos Brasileiros", cidade="São José dos Campos")
+    assert payload.nome == "COMERCIO DE ALIMENTOS BRA"
+    assert len(payload.nome) == TAMANHO_MAXIMO_NOME
+    assert payload.cidade == "SAO JOSE DOS CA"
+    assert len(payload.cidade) == TAMANHO_MAXIMO_CIDADE
+
+
+def test_truncamento_nao_deixa_espaco_no_fim():
+    # O 25º (ou 15º) caractere é o espaço entre duas palavras
+    assert normalizar_texto("Loja de Materiais Gerais Ltda", 25) == "LOJA DE MATERIAIS GERAIS"
+    assert normalizar_texto("Ribeirao Preto Sul", 15) == "RIBEIRAO PRETO"
+    payload = gerar(cidade="Rio de Janeiro Norte")
+    assert payload.cidade == "RIO DE JANEIRO"
+    assert payload.merchantCity == "6014RIO DE JANEIRO"
+
+
+@pytest.mark.parametrize('valor, esperado', [
+    ("ABC", "5903ABC"),
+    ("ÇÃO", "5905ÇÃO"),       # tamanho em bytes UTF-8, não em caracteres
+    ("€", "5903€"),
+    ("", "5900"),
+])
+def test_campo_emv_conta_bytes(valor, esperado):
+    assert campo_emv('59', valor) == esperado
+
+
+def test_campo_emv_acima_de_99_bytes():
+    assert campo_emv('26', 'x' * 99).startswith('2699')
+    with pytest.raises(ValueError):
+        campo_emv('26', 'é' * 50)
+
+
+def test_campos_do_payload():
+    payload = gerar(valor="7,5")
+    codigo = payload.gerarPayload(gerar_qrcode=False)
+    assert codigo.startswith("000201" "26360014BR.GOV.BCB.PIX0114loja@email.com" "52040000" "5303986"
+                             "54047.50" "5802BR" "5904LOJA" "6009SAO PAULO" "62080504PED1" "6304")
+    assert codigo[-4:] == f"{crc16_ccitt(codigo[:-4].encode('utf-8')):04X}"
+
+
+def test_valor_acima_do_limite():
+    with pytest.raises(ValueError):
+        gerar(valor="12345678901.00")
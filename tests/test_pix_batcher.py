@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+import app as modulo
+from pix_batcher import AgrupadorRequisicoes
+from pix_decoder import decodificar_brcode
+
+
+def _em_paralelo(funcao, itens):
+    """Executa funcao(item) em uma thread por item; retorna resultado ou exceção de cada um"""
+    barreira = threading.Barrier(len(itens))
+    resultados = [None] * len(itens)
+
+    def executar(i):
+        barreira.wait()
+        try:
+            resultados[i] = funcao(itens[i])
+        except Exception as e:
+            resultados[i] = e
+
+    threads = [threading.Thread(target=executar, args=(i,)) for i in range(len(itens))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads), "requisição presa no agrupador"
+    return resultados
+
+
+class _Lotes():
+    """executar_lote de teste: dobra cada item e registra os lotes recebidos"""
+
+    def __init__(self, demora=0.0):
+        self.demora = demora
+        self.lotes = []
+        self.prioridades = []
+
+    def __call__(self, itens, prioridade):
+        self.lotes.append(list(itens))
+        self.prioridades.append(prioridade)
+        time.sleep(self.demora)
+        return [ValueError(f"item {item}") if item < 0 else item * 2 for item in itens]
+
+
+def test_requisicoes_simultaneas_viram_um_lote():
+    lotes = _Lotes()
+    agrupador = AgrupadorRequisicoes(lotes, janela=0.1, max_lote=32)
+    resultados = _em_paralelo(agrupador.executar, list(range(6)))
+
+    assert resultados == [0, 2, 4, 6, 8, 10]
+    assert len(lotes.lotes) == 1
+    assert sorted(lotes.lotes[0]) == list(range(6))
+    assert agrupador.estatisticas()["batches"] == 1
+    assert agrupador.estatisticas()["items"] == 6
+
+
+def test_lote_cheio_sai_antes_da_janela():
+    lotes = _Lotes()
+    agrupador = AgrupadorRequisicoes(lotes, janela=2.0, max_lote=3)
+    inicio = time.monotonic()
+    assert _em_paralelo(agrupador.executar, [1, 2, 3]) == [2, 4, 6]
+    assert time.monotonic() - inicio < 1.0
+    assert [len(lote) for lote in lotes.lotes] == [3]
+
+
+def test_sobras_promovem_novo_lider():
+    lotes = _Lotes(demora=0.02)
+    agrupador = AgrupadorRequisicoes(lotes, janela=0.05, max_lote=2)
+    itens = list(range(7))
+    assert _em_paralelo(agrupador.executar, itens) == [i * 2 for i in itens]
+
+    assert all(len(lote) <= 2 for lote in lotes.lotes)
+    assert sorted(i for lote in lotes.lotes for i in lote) == itens
+    assert agrupador.estatisticas()["queued"] == 0
+
+
+def test_erro_de_um_item_so_afeta_o_seu_pedido():
+    agrupador = AgrupadorRequisicoes(_Lotes(), janela=0.05)
+    resultados = _em_paralelo(agrupador.executar, [1, -1, 3])
+    assert resultados[0] == 2 and resultados[2] == 6
+    assert isinstance(resultados[1], ValueError)
+
+
+def test_erro_do_lote_inteiro_chega_a_todos():
+    def falhar(itens, prioridade):
+        raise RuntimeError("falha geral")
+
+    agrupador = AgrupadorRequisicoes(falhar, janela=0.05)
+    resultados = _em_paralelo(agrupador.executar, [1, 2, 3])
+    assert all(isinstance(r, RuntimeError) for r in resultados)
+
+
+def test_lote_com_resultados_faltando_nao_trava():
+    agrupador = AgrupadorRequisicoes(lambda itens, prioridade: [item * 2 for item in itens[:1]],
+                                     janela=0.05)
+    resultados = _em_paralelo(agrupador.executar, [1, 2, 3])
+    assert sum(isinstance(r, RuntimeError) for r in resultados) == 2
+    assert [r for r in resultados if not isinstance(r, RuntimeError)][0] in (2, 4, 6)
+
+
+def test_lote_usa_a_maior_prioridade():
+    lotes = _Lotes()
+    agrupador = AgrupadorRequisicoes(lotes, janela=0.1)
+    _em_paralelo(lambda item: agrupador.executar(item, prioridade=item), [3, 1, 2])
+    assert lotes.prioridades == [1]
+
+
+# ---------------------------------------------------------------------------
+# gerar_lote_cacheado e o micro-batching da API
+# ---------------------------------------------------------------------------
+def _cobranca(txid, valor="10.00", com_imagem=False):
+    return ("Loja", "loja@email.com", valor, "Sao Paulo", txid, com_imagem, None)
+
+
+def test_gerar_lote_cacheado_mantem_ordem_e_erros():
+    cobrancas = [_cobranca("LOTE1"), _cobranca("LOTE2", valor="abc"), _cobranca("LOTE3", com_imagem=True)]
+    resultados = modulo.gerar_lote_cacheado(cobrancas)
+
+    assert decodificar_brcode(resultados[0][0])[0] == "LOTE1"
+    assert resultados[0][1] is None
+    assert isinstance(resultados[1], Exception)
+    assert decodificar_brcode(resultados[2][0])[0] == "LOTE3"
+    assert resultados[2][1].startswith(b'\x89PNG')
+
+    # Segunda chamada: tudo do cache de renderização, mesma resposta
+    hits = modulo.render_cache.estatisticas()["hits"]
+    assert modulo.gerar_lote_cacheado([cobrancas[0], cobrancas[2]]) == [resultados[0], resultados[2]]
+    assert modulo.render_cache.estatisticas()["hits"] == hits + 2
+
+
+def test_api_com_micro_batching(monkeypatch):
+    agrupador = AgrupadorRequisicoes(modulo.gerar_lote_cacheado, janela=0.1, max_lote=8)
+    monkeypatch.setattr(modulo, 'microbatcher', agrupador)
+
+    def gerar(txid):
+        corpo = {"nome": "Loja", "chavepix": "loja@email.com", "valor": "5.00", "cidade": "Sao Paulo", "txid": txid}
+        resposta = modulo.app.test_client().post('/api/v1/pix/generate', json=corpo)
+        return resposta.status_code, decodificar_brcode(resposta.get_json()["payload"])[0]
+
+    txids = [f"MICRO{i}" for i in range(4)]
+    assert _em_paralelo(gerar, txids) == [(200, txid) for txid in txids]
+    assert agrupador.estatisticas()["items"] == 4
+    assert agrupador.estatisticas()["batches"] < 4
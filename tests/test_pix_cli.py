@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+import pix_cli
+
+ENTRADA = '\n'.join([
+    json.dumps({"nome": "Loja", "chavepix": "loja@email.com", "valor": "1.00", "cidade": "Sao Paulo", "txid": "A1"}),
+    '{"nome": "Loja", "chavepix": ',
+    '["nao", "objeto"]',
+    '',
+    json.dumps({"nome": "Loja", "chavepix": "loja@email.com", "valor": "2.00", "cidade": "Sao Paulo", "txid": "A5"}),
+]) + '\n'
+
+
+@pytest.mark.parametrize('opcoes', [[], ['--engine']])
+def test_jsonl_malformado_gera_linha_de_erro(tmp_path, opcoes):
+    entrada = tmp_path / 'cobrancas.jsonl'
+    entrada.write_text(ENTRADA, encoding='utf-8')
+    saida = tmp_path / 'resultado.jsonl'
+
+    codigo = pix_cli.main(['generate', str(entrada), '-o', str(saida), '--zip', str(tmp_path / 'q.zip'),
+                           '-j', '1', '--strict'] + opcoes)
+    linhas = [json.loads(texto) for texto in saida.read_text(encoding='utf-8').splitlines()]
+
+    assert codigo == 1
+    assert [linha["line"] for linha in linhas] == [1, 2, 3, 5]
+    assert linhas[0]["payload"] and linhas[3]["payload"] and not linhas[0]["error"]
+    assert linhas[1]["error"].startswith("JSON inválido")
+    assert linhas[2]["error"] == "Registro JSON deve ser um objeto"
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+from werkzeug.serving import make_server
+
+from app import app
+from payload_generator import Payload
+from pix_client import ClientePix, ClientePixAsync, PayloadInvalidoError, PixClienteError, verificar_payload
+from pix_decoder import decodificar_brcode
+
+
+def gerar(txid, chavepix="loja@email.com", valor="10.00"):
+    return Payload("Loja", chavepix, valor, "Sao Paulo", txid, diretorio='').gerarPayload(gerar_qrcode=False)
+
+
+@pytest.mark.parametrize('txid', ["PED1", "PED-1", "a b", "Pedido Ação", "X" * 40, ""])
+def test_aceita_txid_normalizado_pelo_servidor(txid):
+    verificar_payload(gerar(txid), {"chavepix": "loja@email.com", "valor": "10.00", "txid": txid})
+
+
+@pytest.mark.parametrize('cobranca', [
+    {"chavepix": "outra@email.com", "valor": "10.00", "txid": "PED1"},
+    {"chavepix": "loja@email.com", "valor": "10.01", "txid": "PED1"},
+    {"chavepix": "loja@email.com", "valor": "10.00", "txid": "PED2"},
+])
+def test_recusa_campos_divergentes(cobranca):
+    with pytest.raises(PayloadInvalidoError):
+        verificar_payload(gerar("PED1"), cobranca)
+
+
+def test_recusa_crc_invalido():
+    payload = gerar("PED1")
+    with pytest.raises(PayloadInvalidoError):
+        verificar_payload(payload[:-4] + ('0000' if payload[-4:] != '0000' else '1111'),
+                          {"chavepix": "loja@email.com", "valor": "10.00"})
+
+
+# ---------------------------------------------------------------------------
+# Contra o app Flask rodando localmente
+# ---------------------------------------------------------------------------
+_sequencia = itertools.count()
+
+
+def _sem_health(environ, start_response):
+    """Servidor antigo: sem health check, portanto sem o recurso "batch" anunciado"""
+    if environ['PATH_INFO'] == '/api/v1/health':
+        start_response('404 NOT FOUND', [('Content-Type', 'application/json')])
+        return [b'{"success": false}']
+    return app(environ, start_response)
+
+
+def _servidor(wsgi):
+    servidor = make_server('127.0.0.1', 0, wsgi, threaded=True)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    return servidor, f"http://127.0.0.1:{servidor.server_port}"
+
+
+@pytest.fixture(scope='module')
+def url():
+    servidor, endereco = _servidor(app)
+    yield endereco
+    servidor.shutdown()
+
+
+@pytest.fixture(scope='module')
+def url_sem_lote():
+    servidor, endereco = _servidor(_sem_health)
+    yield endereco
+    servidor.shutdown()
+
+
+def _cobranca(**campos):
+    return dict({"nome": "Loja", "chavepix": "loja@email.com", "valor": "10.00", "cidade": "Sao Paulo",
+                 "txid": f"CLI{next(_sequencia)}"}, **campos)
+
+
+def _em_paralelo(funcao, quantidade):
+    barreira = threading.Barrier(quantidade)
+    resultados = [None] * quantidade
+
+    def executar(i):
+        barreira.wait()
+        resultados[i] = funcao(i)
+
+    threads = [threading.Thread(target=executar, args=(i,)) for i in range(quantidade)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return resultados
+
+
+def test_chamadas_concorrentes_pelo_pool_sem_lote(url):
+    with ClientePix(url, agrupar=False, max_conexoes=2) as cliente:
+        cobrancas = [_cobranca() for _ in range(6)]
+        respostas = _em_paralelo(lambda i: cliente.gerar(**cobrancas[i]), len(cobrancas))
+
+        assert [decodificar_brcode(r["payload"])[0] for r in respostas] == [c["txid"] for c in cobrancas]
+        estatisticas = cliente.pool.estatisticas()
+        assert estatisticas["requests"] == len(cobrancas)
+        # O servidor de desenvolvimento responde "Connection: close": nada volta ao pool
+        assert estatisticas["idle"] == 0
+        assert cliente.estatisticas()["batches_sent"] == 0
+
+
+def test_chamadas_concorrentes_vao_em_lote(url):
+    with ClientePix(url, janela_lote=0.05) as cliente:
+        assert 'batch' in cliente.recursos()
+        cobrancas = [_cobranca() for _ in range(8)]
+        respostas = _em_paralelo(lambda i: cliente.gerar(**cobrancas[i]), len(cobrancas))
+
+        for cobranca, resposta in zip(cobrancas, respostas):
+            assert decodificar_brcode(resposta["payload"])[0] == cobranca["txid"]
+        assert cliente.estatisticas()["batched_charges"] == len(cobrancas)
+        assert cliente.estatisticas()["batches_sent"] < len(cobrancas)
+
+
+def test_gerar_lote_preserva_a_ordem_e_os_erros_por_item(url):
+    with ClientePix(url, max_lote=3) as cliente:
+        cobrancas = [_cobranca() for _ in range(7)]
+        cobrancas[4] = _cobranca(nome="")
+        resultados = cliente.gerar_lote(cobrancas)
+
+        assert len(resultados) == len(cobrancas)
+        for i, (cobranca, resultado) in enumerate(zip(cobrancas, resultados)):
+            if i == 4:
+                assert isinstance(resultado, PixClienteError)
+                assert (resultado.status, resultado.campo) == (400, 'nome')
+            else:
+                assert decodificar_brcode(resultado["payload"])[0] == cobranca["txid"]
+        # 3 + 3 em lote; a última cobrança vai sozinha para /generate
+        assert cliente.estatisticas()["batches_sent"] == 2
+
+
+def test_sem_recurso_batch_usa_requisicoes_individuais(url_sem_lote):
+    with ClientePix(url_sem_lote, janela_lote=0.02) as cliente:
+        assert cliente.recursos() == set()
+        cobrancas = [_cobranca() for _ in range(4)]
+        respostas = _em_paralelo(lambda i: cliente.gerar(**cobrancas[i]), len(cobrancas))
+        resultados = cliente.gerar_lote([_cobranca(), _cobranca(valor="abc")])
+
+        assert [decodificar_brcode(r["payload"])[0] for r in respostas] == [c["txid"] for c in cobrancas]
+        assert resultados[0]["success"] is True
+        assert isinstance(resultados[1], PixClienteError) and resultados[1].campo == 'valor'
+        assert cliente.estatisticas()["batches_sent"] == 0
+
+
+def test_erro_da_api_chega_como_pix_cliente_error(url):
+    with ClientePix(url, agrupar=False) as cliente:
+        with pytest.raises(PixClienteError) as erro:
+            cliente.gerar("Loja", "loja@email.com", "abc", "Sao Paulo")
+        assert (erro.value.status, erro.value.campo) == (400, 'valor')
+
+
+def test_cliente_async_agrupa_corrotinas(url):
+    cobrancas = [_cobranca() for _ in range(6)]
+
+    async def executar():
+        async with ClientePixAsync(url, janela_lote=0.05) as cliente:
+            respostas = await asyncio.gather(*(cliente.gerar(**cobranca) for cobranca in cobrancas))
+            return respostas, cliente.estatisticas()
+
+    respostas, estatisticas = asyncio.run(executar())
+    assert [decodificar_brcode(r["payload"])[0] for r in respostas] == [c["txid"] for c in cobrancas]
+    assert estatisticas["batched_charges"] == len(cobrancas)
+
+
+def test_lider_envia_so_a_sua_janela_e_passa_a_vez():
+    cliente = ClientePix("http://127.0.0.1:9", janela_lote=0.05, max_lote=1)
+    cliente._recursos = {'batch'}
+    envios = []
+
+    def enviar(itens):
+        envios.append((threading.current_thread().name, [c["txid"] for c, _ in itens]))
+        time.sleep(0.01)
+        for _, futuro in itens:
+            futuro.set_result({"success": True})
+
+    cliente._enviar_lote = enviar
+    futuros = {}
+
+    def chamar(txid):
+        futuros[txid] = cliente._enfileirar({"txid": txid})
+
+    lider = threading.Thread(target=chamar, args=("L",), name="lider")
+    lider.start()
+    time.sleep(0.01)
+    outras = [threading.Thread(target=chamar, args=(f"T{i}",), name=f"T{i}") for i in range(4)]
+    for thread in outras:
+        thread.start()
+    for thread in [lider] + outras:
+        thread.join(5)
+
+    assert [nome for nome, _ in envios].count("lider") == 1
+    assert envios[0] == ("lider", ["L"])
+    assert sorted(t for _, txids in envios for t in txids) == ["L", "T0", "T1", "T2", "T3"]
+    assert all(futuro.result(0) == {"success": True} for futuro in futuros.values())
+
+
+def test_lote_com_resultados_faltando_nao_deixa_chamada_pendurada():
+    cliente = ClientePix("http://127.0.0.1:9")
+    cliente._recursos = {'batch'}
+    cliente._requisitar_json = lambda *args, **kwargs: {"results": [{"success": True}]}
+    itens = [({}, Future()), ({}, Future())]
+    cliente._enviar_lote(itens)
+    assert itens[0][1].result(0) == {"success": True}
+    assert isinstance(itens[1][1].exception(0), PixClienteError)
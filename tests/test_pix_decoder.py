@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from payload_generator import Payload, crc16_ccitt
+from pix_decoder import decodificar_brcode
+
+
+def com_crc(corpo):
+    corpo += '6304'
+    return corpo + f"{crc16_ccitt(corpo.encode()):04X}"
+
+
+def test_decodifica_payload_gerado():
+    payload = Payload("Loja", "loja@email.com", "10.50", "Sao Paulo", "PED1", diretorio='').gerarPayload(gerar_qrcode=False)
+    assert decodificar_brcode(payload) == ('PED1', '10.50', 'loja@email.com', 'LOJA', 'SAO PAULO', True, '')
+
+
+def test_crc_alterado():
+    payload = Payload("Loja", "loja@email.com", "10.50", "Sao Paulo", "PED1", diretorio='').gerarPayload(gerar_qrcode=False)
+    adulterado = payload[:-4] + ('0000' if payload[-4:] != '0000' else '1111')
+    assert decodificar_brcode(adulterado)[5] is False
+
+
+@pytest.mark.parametrize('codigo', [
+    '00-46304ABCD',            # tamanho negativo (antes travava o laço)
+    com_crc('00-4'),
+    com_crc('00 401'),         # tamanho com espaço
+    com_crc('00ab0101'),       # tamanho não numérico
+    com_crc('000201260'),      # campo truncado (sem os 2 dígitos do tamanho)
+    com_crc('00020126990014BR.GOV.BCB.PIX'),  # tamanho além do fim do payload
+])
+def test_tamanhos_invalidos_retornam_erro(codigo):
+    resultado = decodificar_brcode(codigo)
+    assert resultado[6] != ''
+    assert resultado[5] is False
+
+
+def test_sem_crc():
+    assert decodificar_brcode('000201')[6] == "Campo CRC (63) ausente"
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pix_keys import COLUNAS_VALIDACAO_CHAVES, TAMANHO_MAXIMO_EMAIL, classificar_chave, validar_chaves
+
+
+@pytest.mark.parametrize('chave, tipo', [
+    ("12345678909", 'cpf'),
+    ("11222333000181", 'cnpj'),
+    ("12ABC34501DE35", 'cnpj'),
+    ("+5511987654321", 'phone'),
+    ("+551187654321", 'phone'),
+    ("+14155552671", 'phone'),
+    ("loja@email.com", 'email'),
+    ("123e4567-e89b-12d3-a456-426614174000", 'evp'),
+])
+def test_chave_valida(chave, tipo):
+    assert classificar_chave(chave) == (tipo, chave, '')
+
+
+def test_espacos_nas_pontas_sao_ignorados():
+    assert classificar_chave("  loja@email.com\n") == ('email', 'loja@email.com', '')
+
+
+@pytest.mark.parametrize('chave, tipo, trecho', [
+    ("12345678900", 'cpf', "dígitos verificadores"),
+    ("11111111111", 'cpf', "dígitos verificadores"),
+    ("11222333000180", 'cnpj', "dígitos verificadores"),
+    ("00000000000000", 'cnpj', "dígitos verificadores"),
+    ("12ABC34501DE36", 'cnpj', "dígitos verificadores"),
+    ("+5520987654321", 'phone', "DDD 20"),
+    ("+5511887654321", 'phone', "celular começando com 9"),
+    ("+abc", 'phone', "Telefone inválido"),
+    ("a@b", 'email', "E-mail inválido"),
+    ("loja@@email.com", 'email', "E-mail inválido"),
+])
+def test_digitos_e_formato_invalidos(chave, tipo, trecho):
+    tipo_obtido, _, erro = classificar_chave(chave)
+    assert tipo_obtido == tipo
+    assert trecho in erro
+
+
+@pytest.mark.parametrize('chave, tipo, normalizada', [
+    ("123.456.789-09", 'cpf', "12345678909"),
+    ("11.222.333/0001-81", 'cnpj', "11222333000181"),
+    ("12.abc.345/01de-35", 'cnpj', "12ABC34501DE35"),
+    ("(11) 98765-4321", 'phone', "+5511987654321"),
+    ("+55 11 98765-4321", 'phone', "+5511987654321"),
+    ("Loja@Email.com", 'email', "loja@email.com"),
+    ("123E4567E89B12D3A456426614174000", 'evp', "123e4567-e89b-12d3-a456-426614174000"),
+])
+def test_chave_formatada_e_recusada_com_a_forma_normalizada(chave, tipo, normalizada):
+    tipo_obtido, normalizada_obtida, erro = classificar_chave(chave)
+    assert (tipo_obtido, normalizada_obtida) == (tipo, normalizada)
+    assert normalizada in erro
+    assert classificar_chave(normalizada) == (tipo, normalizada, '')
+
+
+def test_cpf_invalido_que_parece_telefone_sugere_mais_55():
+    tipo, _, erro = classificar_chave("11987654321")
+    assert tipo == 'cpf'
+    assert "+55" in erro
+
+
+def test_email_no_limite_de_tamanho():
+    dominio = "@ex.com"
+    no_limite = "x" * (TAMANHO_MAXIMO_EMAIL - len(dominio)) + dominio
+    assert classificar_chave(no_limite)[2] == ''
+    assert "excede" in classificar_chave("x" + no_limite)[2]
+
+
+@pytest.mark.parametrize('chave', ["", "   ", None])
+def test_chave_vazia(chave):
+    assert classificar_chave(chave) == ('', '', "Chave PIX vazia")
+
+
+@pytest.mark.parametrize('chave', ["abc", "1234", "123456789012345678"])
+def test_chave_nao_reconhecida(chave):
+    tipo, normalizada, erro = classificar_chave(chave)
+    assert (tipo, normalizada) == ('', chave)
+    assert "não reconhecida" in erro
+
+
+def test_validar_chaves_em_lote():
+    resultados = validar_chaves(["12345678909", "123.456.789-09", "abc"])
+    assert len(resultados[0]) == len(COLUNAS_VALIDACAO_CHAVES)
+    assert [r[3] for r in resultados] == [True, False, False]
+    assert [r[1] for r in resultados] == ['cpf', 'cpf', '']
+    assert resultados[1][2] == "12345678909"
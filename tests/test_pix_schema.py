@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pix_schema import SCHEMA_GERACAO, SCHEMA_GERACAO_DINAMICA, SCHEMA_VALIDACAO, ErroValidacao
+
+BASE = {"nome": "Loja", "chavepix": "loja@email.com", "valor": "10.00", "cidade": "Sao Paulo"}
+
+
+def _validar(schema=SCHEMA_GERACAO, **campos):
+    return schema.validar(dict(BASE, **campos))
+
+
+def _erro(schema=SCHEMA_GERACAO, dados=..., **campos):
+    with pytest.raises(ErroValidacao) as erro:
+        schema.validar(dict(BASE, **campos) if dados is ... else dados)
+    return erro.value
+
+
+def test_campos_validos_com_defaults():
+    dados = SCHEMA_GERACAO.validar({"nome": " Loja ", "chavepix": "loja@email.com", "cidade": "SP"})
+    assert dados["nome"] == "Loja"
+    assert dados["valor"] == "0.00"
+    assert dados["txid"] == ""
+    assert dados["return_image"] is False
+    assert dados["image_format"] == "base64"
+    assert dados["outputs"] == ()
+    assert dados["location"] is None
+
+
+@pytest.mark.parametrize('txid, esperado', [
+    ("Pedido42", "Pedido42"),
+    ("A" * 25, "A" * 25),
+    ("A" * 26, "A" * 25),
+    ("PED-1", "PED1"),
+    ("pedido 12", "pedido12"),
+    ("Ação", "Acao"),
+    ("***", "***"),
+    ("---", "***"),
+    ("", ""),
+])
+def test_txid_normalizado_como_no_payload(txid, esperado):
+    assert _validar(txid=txid)["txid"] == esperado
+
+
+def test_txid_acima_do_tamanho_maximo():
+    assert _validar(txid="A" * 35)["txid"] == "A" * 25
+    assert _erro(txid="A" * 36).campo == 'txid'
+
+
+@pytest.mark.parametrize('valor, esperado', [("10", "10"), ("10,5", "10,5"), (10.5, "10.50"), (3, "3.00")])
+def test_valor_aceito(valor, esperado):
+    assert _validar(valor=valor)["valor"] == esperado
+
+
+@pytest.mark.parametrize('valor', ["abc", "10.555", "-1", True, [10]])
+def test_valor_invalido(valor):
+    assert _erro(valor=valor).campo == 'valor'
+
+
+@pytest.mark.parametrize('campo', ['nome', 'chavepix', 'cidade'])
+def test_obrigatorio_ausente_ou_em_branco(campo):
+    assert _erro(**{campo: "   "}).campo == campo
+    assert _erro(dados={k: v for k, v in BASE.items() if k != campo}).campo == campo
+
+
+def test_tamanho_maximo():
+    assert _validar(nome="N" * 100)["nome"] == "N" * 100
+    assert _erro(nome="N" * 101).campo == 'nome'
+
+
+def test_campo_nao_texto():
+    assert _erro(nome=123).campo == 'nome'
+
+
+@pytest.mark.parametrize('corpo', [None, [], "texto"])
+def test_corpo_nao_objeto(corpo):
+    assert _erro(dados=corpo).campo is None
+
+
+@pytest.mark.parametrize('valor, esperado', [(True, True), ("true", True), ("FALSE", False), (0, False), ("1", True)])
+def test_booleano(valor, esperado):
+    assert _validar(return_image=valor)["return_image"] is esperado
+
+
+@pytest.mark.parametrize('valor', ["sim", 2, [True]])
+def test_booleano_invalido(valor):
+    assert _erro(return_image=valor).campo == 'return_image'
+
+
+def test_escolhas():
+    assert _validar(image_format="url")["image_format"] == "url"
+    assert _erro(image_format="jpeg").campo == 'image_format'
+
+
+def test_outputs():
+    saidas = _validar(outputs=["svg", "png:300", {"format": "PNG", "size": 64}])["outputs"]
+    assert saidas == (("svg", None), ("png", 300), ("png", 64))
+
+
+@pytest.mark.parametrize('outputs', ["svg", ["gif"], ["png:0"], ["png:abc"], [{"format": "png", "size": True}],
+                                     [42], ["svg"] * 9])
+def test_outputs_invalidos(outputs):
+    assert _erro(outputs=outputs).campo == 'outputs'
+
+
+def test_dinamico_exige_location():
+    assert _erro(SCHEMA_GERACAO_DINAMICA, chavepix="").campo == 'location'
+    dados = _validar(SCHEMA_GERACAO_DINAMICA, chavepix="", location="psp.exemplo.com/cob/1")
+    assert dados["location"] == "psp.exemplo.com/cob/1"
+    assert dados["chavepix"] == ""
+
+
+def test_validacao_payload():
+    assert SCHEMA_VALIDACAO.validar({"payload": " 000201 "})["payload"] == "000201"
+    assert _erro(SCHEMA_VALIDACAO, dados={}).campo == 'payload'
+    assert _erro(SCHEMA_VALIDACAO, dados={"payload": "0" * 513}).campo == 'payload'
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+import pix_worker
+from pix_worker import CABECALHO, TAMANHO_MAXIMO_FRAME, atender, codificar_frame, processar_mensagem
+from payload_generator import Payload
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PEDIDO = ["Loja", "loja@email.com", "10.50", "Sao Paulo", "PED1"]
+
+
+def esperado(nome, chavepix, valor, cidade, txid):
+    return Payload(nome, chavepix, valor, cidade, txid, diretorio='').gerarPayload(gerar_qrcode=False)
+
+
+def decodificar_frames(dados):
+    mensagens = []
+    while dados:
+        (tamanho,) = CABECALHO.unpack_from(dados)
+        mensagens.append(pix_worker._loads(dados[CABECALHO.size:CABECALHO.size + tamanho]))
+        dados = dados[CABECALHO.size + tamanho:]
+    return mensagens
+
+
+def conversar(*pedacos):
+    """Roda atender() sobre uma sequência de leituras e retorna as respostas"""
+    leituras = iter(pedacos)
+    saida = bytearray()
+    atender(lambda n: next(leituras, b''), saida.extend)
+    return decodificar_frames(bytes(saida))
+
+
+@pytest.mark.parametrize('mensagem, resposta', [
+    ([1, "ping"], [1, 1, "pong"]),
+    ([2, "gen", *PEDIDO], [2, 1, esperado(*PEDIDO)]),
+    ([3, "gen", "Loja", "loja@email.com", "", "Sao Paulo", ""], [3, 1, esperado("Loja", "loja@email.com", "0.00", "Sao Paulo", "")]),
+    ([4, "xyz"], [4, 0, "Operação desconhecida: xyz"]),
+    ({"id": 5}, [None, 0, "Pedido deve ser um array [id, operação, ...]"]),
+])
+def test_processar_mensagem(mensagem, resposta):
+    assert processar_mensagem(mensagem) == resposta
+
+
+def test_erro_de_geracao_vira_resposta():
+    id_, ok, erro = processar_mensagem([6, "gen", "Loja", "loja@email.com", "abc", "Sao Paulo", ""])
+    assert (id_, ok) == (6, 0) and erro
+
+
+def test_frames_em_pedacos_e_pipelining():
+    dados = codificar_frame([1, "ping"]) + codificar_frame([2, "gen", *PEDIDO]) + codificar_frame([3, "ping"])
+    # Leituras que cortam cabeçalhos e corpos no meio
+    respostas = conversar(dados[:2], dados[2:9], dados[9:40], dados[40:])
+    assert respostas == [[1, 1, "pong"], [2, 1, esperado(*PEDIDO)], [3, 1, "pong"]]
+
+
+def test_frame_com_json_invalido():
+    corpo = b'[1, "ping"'
+    respostas = conversar(CABECALHO.pack(len(corpo)) + corpo + codificar_frame([2, "ping"]))
+    assert respostas[0][:2] == [None, 0] and respostas[0][2].startswith("Frame inválido")
+    assert respostas[1] == [2, 1, "pong"]
+
+
+def test_frame_muito_grande_e_descartado_sem_derrubar_a_conexao():
+    tamanho = TAMANHO_MAXIMO_FRAME + 10
+    corpo = b'x' * tamanho
+    dados = codificar_frame([1, "ping"]) + CABECALHO.pack(tamanho) + corpo + codificar_frame([2, "ping"])
+    pedacos = [dados[i:i + 65536] for i in range(0, len(dados), 65536)]
+    assert conversar(*pedacos) == [
+        [1, 1, "pong"],
+        [None, 0, f"Frame muito grande: {tamanho} bytes"],
+        [2, 1, "pong"],
+    ]
+    # Tudo em uma única leitura
+    assert conversar(dados)[2] == [2, 1, "pong"]
+
+
+def test_worker_por_socket_unix():
+    caminho = os.path.join(tempfile.mkdtemp(), 'pix.sock')
+    threading.Thread(target=pix_worker.servir_socket, args=(caminho,), daemon=True).start()
+    limite = time.monotonic() + 5
+    while not os.path.exists(caminho):
+        assert time.monotonic() < limite, "worker não abriu o socket"
+        time.sleep(0.01)
+
+    cliente = pix_worker.WorkerClient(caminho)
+    try:
+        outro = ["Padaria Ação", "11999998888", "7,5", "São José", "PED2"]
+        respostas = cliente.enviar([PEDIDO, outro, PEDIDO])
+        assert [r[0] for r in respostas] == [1, 2, 3]
+        assert [r[2] for r in respostas] == [esperado(*PEDIDO), esperado(*outro), esperado(*PEDIDO)]
+    finally:
+        cliente.close()
+
+
+def test_worker_stdio_continua_apos_frame_muito_grande():
+    tamanho = TAMANHO_MAXIMO_FRAME + 1
+    entrada = (CABECALHO.pack(tamanho) + b'x' * tamanho
+               + codificar_frame([1, "gen", *PEDIDO]) + codificar_frame([2, "ping"]))
+    processo = subprocess.run([sys.executable, os.path.join(RAIZ, 'pix_worker.py'), '--stdio'],
+                              input=entrada, capture_output=True, timeout=30, cwd=RAIZ)
+    assert processo.returncode == 0, processo.stderr.decode()
+    assert decodificar_frames(processo.stdout) == [
+        [None, 0, f"Frame muito grande: {tamanho} bytes"],
+        [1, 1, esperado(*PEDIDO)],
+        [2, 1, "pong"],
+    ]
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import threading
+from multiprocessing import shared_memory
+
+import pytest
+
+from payload_generator import Payload
+from render_engine import MotorRenderizacao
+
+SLOTS = 8
+
+
+@pytest.fixture(scope='module')
+def motor():
+    motor = MotorRenderizacao(processos=2, slots=SLOTS, tamanho_slot=4096)
+    motor.iniciar()
+    yield motor
+    motor.fechar()
+
+
+def _cobranca(i, valor="10.00"):
+    return ("Loja", "loja@email.com", valor, "Sao Paulo", f"PED{i}")
+
+
+def _esperado(cobranca):
+    payload_gen = Payload(*cobranca, diretorio='')
+    return payload_gen.gerarPayload(gerar_qrcode=False), payload_gen.gerarPng()
+
+
+def test_renderizar_igual_ao_processo_atual(motor):
+    assert motor.renderizar(_cobranca(1)) == _esperado(_cobranca(1))
+    assert motor.estatisticas()["free_slots"] == SLOTS
+
+
+def test_renderizar_cobranca_invalida(motor):
+    with pytest.raises(ValueError):
+        motor.renderizar(_cobranca(1, valor="abc"))
+    assert motor.estatisticas()["free_slots"] == SLOTS
+
+
+def test_slots_reservados_e_reaproveitados(motor):
+    primeiros = motor._reservar(SLOTS - 2)
+    assert len(set(primeiros)) == SLOTS - 2
+    assert motor._reservar(3, esperar=False) is None
+
+    ultimos = motor._reservar(2)
+    assert sorted(primeiros + ultimos) == list(range(SLOTS))
+
+    # Reserva bloqueada até outra thread devolver slots
+    obtidos = []
+    espera = threading.Thread(target=lambda: obtidos.append(motor._reservar(2)))
+    espera.start()
+    espera.join(0.05)
+    assert espera.is_alive()
+    motor._devolver(ultimos)
+    espera.join(5)
+    assert sorted(obtidos[0]) == sorted(ultimos)
+
+    motor._devolver(obtidos[0])
+    motor._devolver(primeiros)
+    assert motor.estatisticas()["free_slots"] == SLOTS
+
+
+def test_lote_mantem_a_ordem_e_os_erros_por_item(motor):
+    cobrancas = [_cobranca(i) for i in range(20)]
+    cobrancas[7] = _cobranca(7, valor="abc")
+    resultados = list(motor.renderizar_lote(cobrancas, bloco=3))
+
+    assert len(resultados) == len(cobrancas)
+    for i, (cobranca, (payload, dados, erro)) in enumerate(zip(cobrancas, resultados)):
+        if i == 7:
+            assert payload is None and dados is None and erro
+        else:
+            assert erro is None
+            assert (payload, dados) == _esperado(cobranca)
+    assert motor.estatisticas()["free_slots"] == SLOTS
+
+
+def test_lote_abandonado_devolve_os_slots(motor):
+    lote = motor.renderizar_lote((_cobranca(i) for i in range(12)), bloco=2)
+    next(lote)
+    lote.close()
+    assert motor.estatisticas()["free_slots"] == SLOTS
+
+
+def test_imagem_maior_que_o_slot_volta_pelo_pipe(motor):
+    antes = motor.estatisticas()["oversized"]
+    payload, dados = motor.renderizar(_cobranca(1), formato='svg')
+    assert len(dados) > 4096
+    assert dados.startswith(b'<svg')
+    assert motor.estatisticas()["oversized"] == antes + 1
+
+
+def test_fechar_libera_a_memoria_compartilhada():
+    motor = MotorRenderizacao(processos=1, slots=2)
+    motor.iniciar()
+    nome = motor._shm.name
+    assert motor.estatisticas()["started"] is True
+
+    motor.fechar()
+    assert motor.estatisticas()["started"] is False
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=nome)
+    # Fechar de novo não falha
+    motor.fechar()
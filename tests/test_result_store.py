@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import re
+import time
+
+import pytest
+
+import app as modulo
+from pix_cache import TTLCache
+
+FORMULARIO = {"nome": "Loja", "chavepix": "loja@email.com", "valor": "1.00", "cidade": "Sao Paulo"}
+RE_RESULTADO = re.compile(rb'/generate/result/([A-Za-z0-9_-]+)\.png')
+
+
+@pytest.fixture
+def cliente():
+    return modulo.app.test_client()
+
+
+def _gerar(cliente, **campos):
+    resposta = cliente.post('/generate', data=dict(FORMULARIO, **campos))
+    assert resposta.status_code == 200
+    return resposta.get_data()
+
+
+def test_resultado_servido_da_memoria_pelo_token(cliente, monkeypatch):
+    monkeypatch.setitem(modulo.app.config, 'PIX_RESULT_MODE', 'memory')
+    pagina = _gerar(cliente)
+    token = RE_RESULTADO.search(pagina).group(1).decode()
+    assert b'data:image/png;base64' not in pagina
+
+    imagem = cliente.get(f'/generate/result/{token}.png')
+    assert imagem.status_code == 200
+    assert imagem.mimetype == 'image/png'
+    assert imagem.get_data().startswith(b'\x89PNG')
+    assert imagem.headers['Cache-Control'].startswith('private')
+
+
+@pytest.mark.parametrize('token', ['inexistente', 'a' * 22, '..'])
+def test_token_desconhecido(cliente, token):
+    assert cliente.get(f'/generate/result/{token}.png').status_code == 404
+
+
+def test_token_expirado(cliente, monkeypatch):
+    monkeypatch.setitem(modulo.app.config, 'PIX_RESULT_MODE', 'memory')
+    monkeypatch.setattr(modulo, 'result_store', TTLCache(ttl=0.05))
+    token = RE_RESULTADO.search(_gerar(cliente)).group(1).decode()
+    assert cliente.get(f'/generate/result/{token}.png').status_code == 200
+    time.sleep(0.1)
+    assert cliente.get(f'/generate/result/{token}.png').status_code == 404
+
+
+@pytest.mark.parametrize('modo, campos', [('inline', {}), ('memory', {"return_base64": "true"})])
+def test_resultado_embutido(cliente, monkeypatch, modo, campos):
+    monkeypatch.setitem(modulo.app.config, 'PIX_RESULT_MODE', modo)
+    pagina = _gerar(cliente, **campos)
+    assert b'data:image/png;base64,' in pagina
+    assert RE_RESULTADO.search(pagina) is None
+
+
+def test_imagem_maior_que_o_limite_vai_embutida(cliente, monkeypatch):
+    monkeypatch.setitem(modulo.app.config, 'PIX_RESULT_MODE', 'memory')
+    monkeypatch.setattr(modulo, 'result_store', TTLCache(max_bytes=10))
+    pagina = _gerar(cliente)
+    assert b'data:image/png;base64,' in pagina
+    assert len(modulo.result_store) == 0
+
+
+def test_ttlcache_descarta_o_menos_usado():
+    cache = TTLCache(max_entradas=2, ttl=60)
+    cache.set('a', b'1')
+    cache.set('b', b'2')
+    assert cache.get('a') == b'1'
+    cache.set('c', b'3')
+    assert 'b' not in cache
+    assert cache.get('a') == b'1' and cache.get('c') == b'3'
+    assert cache.estatisticas()["evictions"] == 1
+
+
+def test_ttlcache_limite_de_bytes():
+    cache = TTLCache(max_entradas=10, ttl=60, max_bytes=10)
+    assert cache.set('grande', b'x' * 11) is False
+    assert cache.set('a', b'x' * 6) is True
+    assert cache.set('b', b'x' * 6) is True
+    assert 'a' not in cache
+    assert cache.bytes == 6
+    assert cache.pop('b') == b'x' * 6
+    assert cache.bytes == 0
+
+
+def test_ttlcache_expiracao():
+    cache = TTLCache(ttl=0.05)
+    cache.set('a', b'1')
+    assert cache.get('a') == b'1'
+    time.sleep(0.1)
+    assert cache.get('a') is None
+    assert cache.limpar_expirados() == 0
+    assert len(cache) == 0
@@ -2,129 +2,341 @@
 # -*- coding: utf-8 -*-
 """
 Gerador de PIX com QR Code usando Tkinter
-Classe Payload fornecida integrada com interface gráfica
+Interface gráfica sobre a classe Payload de payload_generator.py
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk
-import crcmod
-import qrcode
+from PIL import ImageTk
 import os
 import sys
+import csv
+import queue
+import threading
+import zipfile
+from collections import deque
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Gerador do código PIX (mesma normalização e layout EMV usados pela API)
+from payload_generator import Payload, imagem_da_matriz, renderizar_saida
+from render_engine import MotorRenderizacao
+from pix_keys import classificar_chave
+
+
+# Opção "PNG para impressão" do diálogo de salvar
+TAMANHO_PNG_IMPRESSAO = 1200
+TIPO_PNG_IMPRESSAO = f"PNG para impressão ({TAMANHO_PNG_IMPRESSAO} px)"
+
+# Conferência da chave PIX (CPF/CNPJ, telefone, e-mail, EVP), como PIX_KEY_CHECK da API
+CONFERIR_CHAVE = os.environ.get('PIX_KEY_CHECK', 'False').lower() == 'true'
+
 
 # ============================================================================
-# CLASSE PAYLOAD - Geradora do código PIX
+# GERAÇÃO E VALIDAÇÃO (fora da thread do Tk)
 # ============================================================================
-class Payload():
-    """Classe para geração do payload PIX seguindo padrão do Banco Central"""
+def gerar_pix_em_segundo_plano(nome, chave, valor, cidade, txid, tamanho_preview=300):
+    """
+    Gera payload, QR Code e imagem de pré-visualização fora da thread do Tk.
+    O QR Code é codificado uma única vez: a pré-visualização e os arquivos
+    salvos depois derivam da mesma matriz.
+    Retorna (payload, objeto QRCode, imagem PIL da pré-visualização).
+    """
+    payload_gen = Payload(
+        nome=nome,
+        chavepix=chave,
+        valor=f"{float(valor):.2f}",
+        cidade=cidade,
+        txtId=txid,
+        diretorio=''  # Não salvar automaticamente
+    )
+    payload_completa = payload_gen.gerarPayload(gerar_qrcode=False)
+    preview = imagem_da_matriz(payload_gen.get_matriz(), tamanho_preview)
+    return payload_completa, payload_gen.qr, preview
+
+
+def validar_campos(nome, chave, valor_text, cidade):
+    """Valida os dados de uma cobrança; retorna a lista de erros"""
+    errors = []
     
-    def __init__(self, nome, chavepix, valor, cidade, txtId, diretorio=''):
-        """
-        Inicializa o gerador de payload PIX
-        
-        Args:
-            nome: Nome do beneficiário (até 25 caracteres)
-            chavepix: Chave PIX (CPF, CNPJ, telefone, email ou chave aleatória)
-            valor: Valor da transação (formato string com '.' como separador decimal)
-            cidade: Cidade do beneficiário (até 15 caracteres)
-            txtId: Identificador da transação (opcional)
-            diretorio: Diretório para salvar QR Code (opcional)
-        """
-        self.nome = nome
-        self.chavepix = chavepix
-        self.valor = valor.replace(',', '.')
-        self.cidade = cidade
-        self.txtId = txtId
-        self.diretorioQrCode = diretorio
+    # Nome
+    nome = nome.strip()
+    if not nome:
+        errors.append("O nome do recebedor é obrigatório")
+    elif len(nome) > 25:
+        errors.append("Nome deve ter no máximo 25 caracteres")
+    
+    # Chave PIX
+    chave = chave.strip()
+    if not chave:
+        errors.append("A chave PIX é obrigatória")
+    elif CONFERIR_CHAVE:
+        erro_chave = classificar_chave(chave)[2]
+        if erro_chave:
+            errors.append(erro_chave)
+    
+    # Valor
+    valor_text = valor_text.replace(",", ".").strip()
+    try:
+        valor = float(valor_text)
+        if valor <= 0:
+            errors.append("O valor deve ser maior que zero")
+        elif valor > 999999.99:
+            errors.append("Valor máximo é R$ 999.999,99")
+    except ValueError:
+        errors.append("Valor inválido. Use números (ex: 10.50 ou 10,50)")
+    
+    # Cidade
+    cidade = cidade.strip()
+    if not cidade:
+        errors.append("A cidade é obrigatória")
+    elif len(cidade) > 15:
+        errors.append("Cidade deve ter no máximo 15 caracteres")
+    
+    return errors
 
-        # Calcula tamanhos dos campos
-        self.nome_tam = len(self.nome)
-        self.chavepix_tam = len(self.chavepix)
-        self.valor_tam = len(self.valor)
-        self.cidade_tam = len(self.cidade)
-        self.txtId_tam = len(self.txtId)
 
-        # Constrói campos formatados
-        self.merchantAccount_tam = f'0014BR.GOV.BCB.PIX01{self.chavepix_tam:02}{self.chavepix}'
-        self.transactionAmount_tam = f'{self.valor_tam:02}{float(self.valor):.2f}'
-        
-        # Campo adicional (TXID) - se vazio, usa padrão
-        if self.txtId_tam > 0:
-            self.addDataField_tam = f'05{self.txtId_tam:02}{self.txtId}'
-        else:
-            self.addDataField_tam = '0503***'
-        
-        # Formata tamanhos para strings de 2 dígitos
-        self.nome_tam_fmt = f'{self.nome_tam:02}'
-        self.cidade_tam_fmt = f'{self.cidade_tam:02}'
+# ============================================================================
+# MODO LOTE - Geração a partir de CSV em um pool de processos
+# ============================================================================
+COLUNAS_LOTE = ('nome', 'chavepix', 'valor', 'cidade', 'txid')
+TAMANHO_BLOCO_LOTE = 200
 
-        # Campos fixos do padrão PIX
-        self.payloadFormat = '000201'
-        self.merchantAccount = f'26{len(self.merchantAccount_tam):02}{self.merchantAccount_tam}'
-        self.merchantCategCode = '52040000'
-        self.transactionCurrency = '5303986'
-        self.transactionAmount = f'54{self.transactionAmount_tam}'
-        self.countryCode = '5802BR'
-        self.merchantName = f'59{self.nome_tam_fmt}{self.nome}'
-        self.merchantCity = f'60{self.cidade_tam_fmt}{self.cidade}'
-        self.addDataField = f'62{len(self.addDataField_tam):02}{self.addDataField_tam}'
-        self.crc16 = '6304'
-        
-        # Variáveis para resultados
-        self.payload_completa = None
-        self.qrcode = None
 
-    def gerarPayload(self):
-        """Gera o payload completo do PIX"""
-        # Constrói payload sem CRC
-        self.payload = f'{self.payloadFormat}{self.merchantAccount}{self.merchantCategCode}{self.transactionCurrency}{self.transactionAmount}{self.countryCode}{self.merchantName}{self.merchantCity}{self.addDataField}{self.crc16}'
-        
-        # Calcula CRC16
-        self.gerarCrc16(self.payload)
-        
-        return self.payload_completa
+def nome_arquivo_lote(linha, txid):
+    """Nome do PNG gerado para uma linha do CSV"""
+    sufixo = ''.join(c for c in txid if c.isalnum() or c in '-_')[:25]
+    return f"pix_{linha:06d}_{sufixo}.png" if sufixo else f"pix_{linha:06d}.png"
 
-    def gerarCrc16(self, payload):
-        """Calcula o CRC16 do payload"""
-        # Função CRC16 com parâmetros específicos do PIX
-        crc16 = crcmod.mkCrcFun(poly=0x11021, initCrc=0xFFFF, rev=False, xorOut=0x0000)
-        
-        # Calcula CRC
-        self.crc16Code = hex(crc16(str(payload).encode('utf-8')))
-        
-        # Formata CRC (4 dígitos hex, maiúsculos)
-        self.crc16Code_formatado = str(self.crc16Code).replace('0x', '').upper().zfill(4)
+
+def gerar_bloco_lote(linhas, diretorio):
+    """
+    Gera um bloco de cobranças (executa em um processo do pool).
+
+    Com `diretorio`, grava os PNGs diretamente e não devolve os bytes;
+    sem ele (saída ZIP), devolve os bytes para o processo principal.
+    Retorna lista de (linha, arquivo, payload, png_bytes, erros).
+    """
+    resultados = []
+    for linha, registro in linhas:
+        nome = registro.get('nome') or ''
+        chave = registro.get('chavepix') or ''
+        valor_text = registro.get('valor') or ''
+        cidade = registro.get('cidade') or ''
+        txid = (registro.get('txid') or '').strip()
+        
+        erros = validar_campos(nome, chave, valor_text, cidade)
+        if erros:
+            resultados.append((linha, '', '', None, erros))
+            continue
         
-        # Payload completo com CRC
-        self.payload_completa = f'{payload}{self.crc16Code_formatado}'
+        try:
+            payload_gen = Payload(
+                nome=nome.strip(),
+                chavepix=chave.strip(),
+                valor=f"{float(valor_text.replace(',', '.')):.2f}",
+                cidade=cidade.strip(),
+                txtId=txid,
+                diretorio=''
+            )
+            payload_completa = payload_gen.gerarPayload()
+            
+            arquivo = nome_arquivo_lote(linha, txid)
+            png_bytes = payload_gen.gerarPng()
+            
+            if diretorio:
+                with open(os.path.join(diretorio, arquivo), 'wb') as f:
+                    f.write(png_bytes)
+                png_bytes = None
+            
+            resultados.append((linha, arquivo, payload_completa, png_bytes, []))
+        except Exception as e:
+            resultados.append((linha, '', '', None, [str(e)]))
+    
+    return resultados
+
+
+class ProcessadorLote(threading.Thread):
+    """
+    Coordena a geração em lote fora da thread do Tk: lê o CSV em blocos,
+    distribui entre processos, grava o ZIP/relatório e publica o progresso.
+    """
+    
+    def __init__(self, arquivo_csv, destino, zip_saida, eventos, motor=None):
+        """
+        Args:
+            arquivo_csv: CSV com as colunas nome, chavepix, valor, cidade, txid
+            destino: Pasta de saída ou caminho do arquivo ZIP
+            zip_saida: True para gravar em ZIP
+            eventos: queue.Queue que recebe ('progresso', feitos, total, falhas)
+                     e ('fim', mensagem) / ('erro', mensagem)
+            motor: MotorRenderizacao usado na saída ZIP (as imagens voltam pela
+                   memória compartilhada em vez de serializadas pelo pool)
+        """
+        super().__init__(daemon=True)
+        self.arquivo_csv = arquivo_csv
+        self.destino = destino
+        self.zip_saida = zip_saida
+        self.eventos = eventos
+        self.motor = motor
+        self.cancelado = threading.Event()
+    
+    def cancelar(self):
+        self.cancelado.set()
+    
+    def run(self):
+        try:
+            self.eventos.put(('fim', self.processar()))
+        except Exception as e:
+            self.eventos.put(('erro', str(e)))
+    
+    def ler_blocos(self):
+        """Lê o CSV em blocos de linhas numeradas"""
+        with open(self.arquivo_csv, newline='', encoding='utf-8-sig') as f:
+            amostra = f.read(4096)
+            f.seek(0)
+            try:
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+            except csv.Error:
+                dialeto = csv.excel
+            leitor = csv.DictReader(f, dialect=dialeto)
+            leitor.fieldnames = [c.strip().lower() for c in (leitor.fieldnames or [])]
+            faltando = [c for c in COLUNAS_LOTE[:4] if c not in leitor.fieldnames]
+            if faltando:
+                raise ValueError(f"Colunas ausentes no CSV: {', '.join(faltando)}")
+            
+            bloco = []
+            for linha, registro in enumerate(leitor, start=1):
+                bloco.append((linha, registro))
+                if len(bloco) >= TAMANHO_BLOCO_LOTE:
+                    yield bloco
+                    bloco = []
+            if bloco:
+                yield bloco
+    
+    def processar(self):
+        # Contagem rápida de linhas apenas para a barra de progresso
+        with open(self.arquivo_csv, 'rb') as f:
+            total = max(0, sum(1 for _ in f) - 1)
+        self.eventos.put(('progresso', 0, total, 0))
+        
+        if self.zip_saida:
+            zip_file = zipfile.ZipFile(self.destino, 'w', zipfile.ZIP_STORED)
+            diretorio = None
+            relatorio_path = None
+        else:
+            zip_file = None
+            diretorio = self.destino
+            relatorio_path = os.path.join(diretorio, 'resultado.csv')
         
-        # Gera QR Code
-        self.gerarQrCode(self.payload_completa, self.diretorioQrCode)
+        feitos = falhas = 0
+        relatorio = StringIO() if zip_file else open(relatorio_path, 'w', newline='', encoding='utf-8')
+        escritor = csv.writer(relatorio)
+        escritor.writerow(['linha', 'arquivo', 'payload', 'erros'])
         
-        return self.payload_completa
-
-    def gerarQrCode(self, payload, diretorio):
-        """Gera imagem do QR Code a partir do payload"""
-        # Gera QR Code
-        self.qrcode = qrcode.make(payload)
-        
-        # Salva em arquivo se diretório foi especificado
-        if diretorio and os.path.exists(diretorio):
-            dir_path = os.path.expanduser(diretorio)
-            file_path = os.path.join(dir_path, 'pixqrcodegen.png')
-            self.qrcode.save(file_path)
-            print(f"QR Code salvo em: {file_path}")
-        
-        return self.qrcode
-    
-    def get_qrcode_image(self):
-        """Retorna o objeto QR Code PIL Image"""
-        return self.qrcode
-    
-    def get_payload(self):
-        """Retorna o payload completo"""
-        return self.payload_completa
+        workers = os.cpu_count() or 1
+        max_pendentes = workers * 2
+        try:
+            if zip_file is not None and self.motor is not None:
+                feitos, falhas = self.processar_com_motor(zip_file, escritor, total)
+                return self.resumo(feitos, total, falhas)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pendentes = set()
+                blocos = self.ler_blocos()
+                esgotado = False
+                
+                while pendentes or not esgotado:
+                    # Mantém um número limitado de blocos em voo (memória constante)
+                    while not esgotado and not self.cancelado.is_set() and len(pendentes) < max_pendentes:
+                        bloco = next(blocos, None)
+                        if bloco is None:
+                            esgotado = True
+                        else:
+                            pendentes.add(pool.submit(gerar_bloco_lote, bloco, diretorio))
+                    
+                    if self.cancelado.is_set():
+                        for futuro in pendentes:
+                            futuro.cancel()
+                        esgotado = True
+                    
+                    if not pendentes:
+                        break
+                    
+                    concluidos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                    for futuro in concluidos:
+                        if futuro.cancelled():
+                            continue
+                        for linha, arquivo, payload_completa, png_bytes, erros in futuro.result():
+                            if erros:
+                                falhas += 1
+                            elif zip_file is not None:
+                                zip_file.writestr(arquivo, png_bytes)
+                            escritor.writerow([linha, arquivo, payload_completa, '; '.join(erros)])
+                            feitos += 1
+                    self.eventos.put(('progresso', feitos, total, falhas))
+        finally:
+            if zip_file is not None:
+                zip_file.writestr('resultado.csv', relatorio.getvalue())
+                zip_file.close()
+            relatorio.close()
+        
+        return self.resumo(feitos, total, falhas)
+    
+    def resumo(self, feitos, total, falhas):
+        if self.cancelado.is_set():
+            return f"Cancelado após {feitos} de {total} linhas ({falhas} com erro)."
+        return f"{feitos} linhas processadas, {falhas} com erro."
+    
+    def processar_com_motor(self, zip_file, escritor, total):
+        """Saída ZIP pelo motor de renderização; a validação roda nesta thread"""
+        # (linha, erros) na ordem do CSV; lista vazia = cobrança enviada ao motor
+        linhas = deque()
+        
+        def cobrancas():
+            for bloco in self.ler_blocos():
+                for linha, registro in bloco:
+                    if self.cancelado.is_set():
+                        return
+                    nome = registro.get('nome') or ''
+                    chave = registro.get('chavepix') or ''
+                    valor_text = registro.get('valor') or ''
+                    cidade = registro.get('cidade') or ''
+                    txid = (registro.get('txid') or '').strip()
+                    
+                    erros = validar_campos(nome, chave, valor_text, cidade)
+                    linhas.append((linha, txid, erros))
+                    if not erros:
+                        yield (nome.strip(), chave.strip(), f"{float(valor_text.replace(',', '.')):.2f}",
+                               cidade.strip(), txid)
+        
+        feitos = falhas = 0
+        
+        def registrar(linha, arquivo, payload_completa, erros):
+            nonlocal feitos, falhas
+            if erros:
+                falhas += 1
+            escritor.writerow([linha, arquivo, payload_completa, '; '.join(erros)])
+            feitos += 1
+            if feitos % TAMANHO_BLOCO_LOTE == 0:
+                self.eventos.put(('progresso', feitos, total, falhas))
+        
+        def registrar_invalidas():
+            while linhas and linhas[0][2]:
+                linha, _, erros = linhas.popleft()
+                registrar(linha, '', '', erros)
+        
+        for payload_completa, png_bytes, erro in self.motor.renderizar_lote(cobrancas()):
+            registrar_invalidas()
+            linha, txid, _ = linhas.popleft()
+            if erro is not None:
+                registrar(linha, '', '', [erro])
+                continue
+            arquivo = nome_arquivo_lote(linha, txid)
+            zip_file.writestr(arquivo, png_bytes)
+            registrar(linha, arquivo, payload_completa, [])
+        registrar_invalidas()
+        self.eventos.put(('progresso', feitos, total, falhas))
+        return feitos, falhas
 
 
 # ============================================================================
@@ -133,6 +345,9 @@ class Payload():
 class PixGeneratorApp:
     """Interface gráfica para geração de PIX com QR Code"""
     
+    # Atraso da pré-visualização ao vivo após a última alteração (ms)
+    PREVIEW_DEBOUNCE_MS = 400
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Gerador de PIX com QR Code v2.0")
@@ -155,12 +370,29 @@ class PixGeneratorApp:
         # Estado do QR Code
         self.qr_image = None
         self.current_payload = None
+        self.current_qr = None
+        
+        # Geração em segundo plano: uma thread de trabalho, resultados
+        # entregues à thread do Tk por uma fila lida via after()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.resultados = queue.Queue()
+        self.motor_lote = None
+        self._job_id = 0
+        self._futuro = None
+        self._preview_after = None
         
         # Configurar interface
         self.setup_ui()
         
         # Exemplo de dados (opcional - para testes)
         self.preencher_exemplo()
+        
+        # Pré-visualização ao vivo: regenera quando os campos mudam
+        for var in (self.nome_var, self.chave_var, self.valor_var,
+                    self.cidade_var, self.txid_var):
+            var.trace_add('write', self.agendar_preview)
+        
+        self.root.after(50, self.processar_resultados)
     
     def preencher_exemplo(self):
         """Preenche campos com dados de exemplo (opcional)"""
@@ -276,6 +508,13 @@ class PixGeneratorApp:
                             cursor="hand2", **button_style)
         btn_copy.pack(side=tk.LEFT, padx=5)
         
+        btn_lote = tk.Button(button_frame, text="📂 LOTE CSV", 
+                            command=self.abrir_lote,
+                            bg="#3498db", fg="white",
+                            activebackground="#2980b9",
+                            cursor="hand2", **button_style)
+        btn_lote.pack(side=tk.LEFT, padx=5)
+        
         # Frame de resultado (dividido em duas partes)
         result_frame = tk.LabelFrame(main_frame, text=" RESULTADO ", 
                                     font=("Arial", 13, "bold"), 
@@ -348,39 +587,8 @@ class PixGeneratorApp:
     
     def validate_fields(self):
         """Valida os campos de entrada"""
-        errors = []
-        
-        # Nome
-        nome = self.nome_var.get().strip()
-        if not nome:
-            errors.append("O nome do recebedor é obrigatório")
-        elif len(nome) > 25:
-            errors.append("Nome deve ter no máximo 25 caracteres")
-        
-        # Chave PIX
-        chave = self.chave_var.get().strip()
-        if not chave:
-            errors.append("A chave PIX é obrigatória")
-        
-        # Valor
-        valor_text = self.valor_var.get().replace(",", ".").strip()
-        try:
-            valor = float(valor_text)
-            if valor <= 0:
-                errors.append("O valor deve ser maior que zero")
-            elif valor > 999999.99:
-                errors.append("Valor máximo é R$ 999.999,99")
-        except ValueError:
-            errors.append("Valor inválido. Use números (ex: 10.50 ou 10,50)")
-        
-        # Cidade
-        cidade = self.cidade_var.get().strip()
-        if not cidade:
-            errors.append("A cidade é obrigatória")
-        elif len(cidade) > 15:
-            errors.append("Cidade deve ter no máximo 15 caracteres")
-        
-        return errors
+        return validar_campos(self.nome_var.get(), self.chave_var.get(),
+                              self.valor_var.get(), self.cidade_var.get())
     
     def generate_pix(self):
         """Gera o código PIX e o QR Code usando a classe Payload"""
@@ -391,6 +599,41 @@ class PixGeneratorApp:
                                "Corrija os seguintes erros:\n\n• " + "\n• ".join(errors))
             return
         
+        # A geração explícita substitui qualquer pré-visualização pendente
+        if self._preview_after is not None:
+            self.root.after_cancel(self._preview_after)
+            self._preview_after = None
+        
+        self.status_label.config(text="⏳ Gerando PIX...")
+        self.iniciar_geracao(preview=False)
+    
+    def agendar_preview(self, *args):
+        """Reagenda a pré-visualização a cada alteração dos campos (debounce)"""
+        if self._preview_after is not None:
+            self.root.after_cancel(self._preview_after)
+        self._preview_after = self.root.after(self.PREVIEW_DEBOUNCE_MS, self.executar_preview)
+    
+    def executar_preview(self):
+        """Gera a pré-visualização se os campos estiverem válidos"""
+        self._preview_after = None
+        if self.validate_fields():
+            # Dados incompletos: descarta qualquer geração em andamento
+            self.cancelar_geracao()
+            return
+        self.iniciar_geracao(preview=True)
+    
+    def cancelar_geracao(self):
+        """Invalida o job atual; resultados atrasados serão ignorados"""
+        self._job_id += 1
+        if self._futuro is not None:
+            self._futuro.cancel()
+            self._futuro = None
+    
+    def iniciar_geracao(self, preview):
+        """Envia a geração para a thread de trabalho"""
+        self.cancelar_geracao()
+        job_id = self._job_id
+        
         # Obter dados validados
         nome = self.nome_var.get().strip()
         chave = self.chave_var.get().strip()
@@ -398,56 +641,69 @@ class PixGeneratorApp:
         cidade = self.cidade_var.get().strip()
         txid = self.txid_var.get().strip()
         
+        def tarefa():
+            try:
+                resultado = gerar_pix_em_segundo_plano(nome, chave, valor_text, cidade, txid)
+                self.resultados.put((job_id, preview, resultado, None))
+            except Exception as e:
+                self.resultados.put((job_id, preview, None, e))
+        
+        self._futuro = self.executor.submit(tarefa)
+    
+    def processar_resultados(self):
+        """Consome resultados da thread de trabalho (executa na thread do Tk)"""
         try:
-            # Converter valor para string com 2 casas decimais
-            valor_float = float(valor_text)
-            valor_str = f"{valor_float:.2f}"
-            
-            # Gerar payload usando a classe fornecida
-            payload_gen = Payload(
-                nome=nome,
-                chavepix=chave,
-                valor=valor_str,
-                cidade=cidade,
-                txtId=txid if txid else "",
-                diretorio=''  # Não salvar automaticamente
-            )
-            
-            # Gerar payload completo
-            payload_completa = payload_gen.gerarPayload()
-            self.current_payload = payload_completa
-            
-            # Obter objeto QR Code
-            qr_obj = payload_gen.get_qrcode_image()
-            
-            # Exibir QR Code na interface
-            self.display_qrcode(qr_obj)
-            
-            # Exibir código PIX
-            self.display_payload(payload_completa)
-            
-            # Atualizar status e habilitar botão de salvar
-            self.status_label.config(text="✅ PIX gerado com sucesso! Escaneie o QR Code ou copie o código.")
-            self.btn_save.config(state=tk.NORMAL)
-            
-            # Exibir payload no console para debug
-            print("\n" + "="*60)
-            print("PAYLOAD PIX GERADO:")
-            print(payload_completa)
-            print("="*60 + "\n")
-            
-        except ValueError as ve:
-            messagebox.showerror("Erro de Valor", f"Erro no valor: {str(ve)}")
-        except Exception as e:
+            while True:
+                job_id, preview, resultado, erro = self.resultados.get_nowait()
+                if job_id != self._job_id:
+                    continue  # Resultado de um job já substituído
+                self._futuro = None
+                if erro is not None:
+                    self.exibir_erro_geracao(erro, preview)
+                else:
+                    self.exibir_resultado(resultado, preview)
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(50, self.processar_resultados)
+    
+    def exibir_resultado(self, resultado, preview):
+        """Atualiza a interface com um PIX gerado em segundo plano"""
+        payload_completa, qr, qr_preview = resultado
+        self.current_payload = payload_completa
+        self.current_qr = qr
+        
+        # Exibir QR Code e código PIX
+        self.display_qrcode(qr_preview)
+        self.display_payload(payload_completa)
+        self.btn_save.config(state=tk.NORMAL)
+        
+        if preview:
+            self.status_label.config(text="👁️ Pré-visualização atualizada")
+            return
+        
+        # Atualizar status
+        self.status_label.config(text="✅ PIX gerado com sucesso! Escaneie o QR Code ou copie o código.")
+        
+        # Exibir payload no console para debug
+        print("\n" + "="*60)
+        print("PAYLOAD PIX GERADO:")
+        print(payload_completa)
+        print("="*60 + "\n")
+    
+    def exibir_erro_geracao(self, erro, preview):
+        """Informa um erro ocorrido na thread de trabalho"""
+        if preview:
+            self.status_label.config(text=f"⚠️ Pré-visualização indisponível: {erro}")
+        elif isinstance(erro, ValueError):
+            messagebox.showerror("Erro de Valor", f"Erro no valor: {str(erro)}")
+        else:
             messagebox.showerror("Erro na Geração", 
-                               f"Erro ao gerar PIX:\n\n{str(e)}\n\nVerifique os dados e tente novamente.")
+                               f"Erro ao gerar PIX:\n\n{str(erro)}\n\nVerifique os dados e tente novamente.")
     
-    def display_qrcode(self, qr_obj):
-        """Exibe o QR Code na interface"""
+    def display_qrcode(self, qr_img):
+        """Exibe o QR Code (já redimensionado) na interface"""
         try:
-            # Redimensionar para exibição
-            qr_img = qr_obj.resize((300, 300), Image.Resampling.LANCZOS)
-            
             # Converter para formato Tkinter
             self.qr_image = ImageTk.PhotoImage(qr_img)
             
@@ -472,14 +728,18 @@ class PixGeneratorApp:
     
     def save_qrcode(self):
         """Salva o QR Code em um arquivo"""
-        if not self.current_payload:
+        if not self.current_payload or self.current_qr is None:
             messagebox.showerror("Erro", "Nenhum QR Code para salvar. Gere um PIX primeiro.")
             return
         
+        tipo = tk.StringVar(self.root)
         file_path = filedialog.asksaveasfilename(
             defaultextension=".png",
+            typevariable=tipo,
             filetypes=[
                 ("PNG Image", "*.png"),
+                (TIPO_PNG_IMPRESSAO, "*.png"),
+                ("SVG Image", "*.svg"),
                 ("JPEG Image", "*.jpg"),
                 ("All Files", "*.*")
             ],
@@ -489,24 +749,21 @@ class PixGeneratorApp:
         
         if file_path:
             try:
-                # Gerar QR Code em alta resolução
-                qr = qrcode.QRCode(
-                    version=None,
-                    error_correction=qrcode.constants.ERROR_CORRECT_M,
-                    box_size=10,
-                    border=4,
-                )
-                qr.add_data(self.current_payload)
-                qr.make(fit=True)
-                
-                # Criar e salvar imagem
-                img = qr.make_image(fill_color="black", back_color="white")
-                
-                # Converter para RGB se necessário
-                if img.mode != 'RGB' and file_path.lower().endswith('.jpg'):
-                    img = img.convert('RGB')
-                
-                img.save(file_path)
+                # Renderizar a partir da matriz já calculada (sem codificar de novo)
+                matriz = self.current_qr.get_matrix()
+                extensao = os.path.splitext(file_path)[1].lower()
+                if extensao == '.svg':
+                    with open(file_path, 'wb') as f:
+                        f.write(renderizar_saida(matriz, 'svg'))
+                else:
+                    tamanho = TAMANHO_PNG_IMPRESSAO if tipo.get() == TIPO_PNG_IMPRESSAO else None
+                    img = imagem_da_matriz(matriz, tamanho)
+                    
+                    # Converter para RGB se necessário
+                    if extensao in ('.jpg', '.jpeg'):
+                        img = img.convert('RGB')
+                    
+                    img.save(file_path)
                 
                 messagebox.showinfo("Sucesso", 
                                   f"QR Code salvo com sucesso!\n\nLocal: {file_path}")
@@ -535,6 +792,36 @@ class PixGeneratorApp:
         except Exception as e:
             messagebox.showerror("Erro", f"Não foi possível copiar:\n\n{str(e)}")
     
+    def abrir_lote(self):
+        """Gera cobranças em lote a partir de um arquivo CSV"""
+        arquivo_csv = filedialog.askopenfilename(
+            filetypes=[("CSV", "*.csv"), ("All Files", "*.*")],
+            title="Selecionar CSV de cobranças (nome, chavepix, valor, cidade, txid)"
+        )
+        if not arquivo_csv:
+            return
+        
+        zip_saida = messagebox.askyesno("Saída do Lote",
+                                        "Gravar os QR Codes em um arquivo ZIP?\n\n"
+                                        "Escolha 'Não' para gravar em uma pasta.")
+        if zip_saida:
+            destino = filedialog.asksaveasfilename(defaultextension=".zip",
+                                                   filetypes=[("ZIP", "*.zip")],
+                                                   initialfile="pix_lote.zip",
+                                                   title="Salvar lote como")
+        else:
+            destino = filedialog.askdirectory(title="Pasta de saída do lote")
+        if not destino:
+            return
+        
+        # Motor de renderização persistente: processos já aquecidos entre um lote e outro
+        if zip_saida and self.motor_lote is None:
+            self.motor_lote = MotorRenderizacao()
+        
+        JanelaLote(self.root, ProcessadorLote(arquivo_csv, destino, zip_saida, queue.Queue(),
+                                              self.motor_lote if zip_saida else None),
+                   on_fim=lambda msg: self.status_label.config(text=f"📂 Lote: {msg}"))
+    
     def clear_fields(self):
         """Limpa todos os campos e resultados"""
         # Limpar campos de entrada
@@ -556,11 +843,78 @@ class PixGeneratorApp:
             self.qr_image = None
         
         # Resetar estado
+        self.cancelar_geracao()
         self.current_payload = None
+        self.current_qr = None
         self.btn_save.config(state=tk.DISABLED)
         self.status_label.config(text="Campos limpos. Preencha os dados para gerar um novo PIX.")
 
 
+class JanelaLote:
+    """Janela de progresso do modo lote, com botão de cancelar"""
+    
+    def __init__(self, root, processador, on_fim=None):
+        self.processador = processador
+        self.on_fim = on_fim
+        
+        self.janela = tk.Toplevel(root)
+        self.janela.title("Geração em Lote")
+        self.janela.geometry("460x160")
+        self.janela.configure(bg="#ffffff")
+        self.janela.protocol("WM_DELETE_WINDOW", self.cancelar)
+        
+        self.status = tk.Label(self.janela, text="Lendo arquivo...",
+                               font=("Arial", 11), bg="#ffffff", fg="#2c3e50")
+        self.status.pack(pady=(20, 10))
+        
+        self.barra = ttk.Progressbar(self.janela, length=400, mode='determinate')
+        self.barra.pack(pady=5)
+        
+        self.btn_cancelar = tk.Button(self.janela, text="✖ CANCELAR",
+                                      command=self.cancelar,
+                                      bg="#e74c3c", fg="white",
+                                      activebackground="#c0392b",
+                                      font=("Arial", 10, "bold"), cursor="hand2")
+        self.btn_cancelar.pack(pady=10)
+        
+        self.processador.start()
+        self.janela.after(100, self.atualizar)
+    
+    def cancelar(self):
+        """Interrompe o lote (blocos já enviados terminam normalmente)"""
+        self.processador.cancelar()
+        self.btn_cancelar.config(state=tk.DISABLED)
+        self.status.config(text="Cancelando...")
+    
+    def atualizar(self):
+        """Consome os eventos do processador (executa na thread do Tk)"""
+        fim = None
+        try:
+            while True:
+                evento = self.processador.eventos.get_nowait()
+                if evento[0] == 'progresso':
+                    _, feitos, total, falhas = evento
+                    self.barra.config(maximum=max(total, 1), value=feitos)
+                    self.status.config(text=f"{feitos} de {total} linhas ({falhas} com erro)")
+                else:
+                    fim = evento
+        except queue.Empty:
+            pass
+        
+        if fim is None:
+            self.janela.after(100, self.atualizar)
+            return
+        
+        tipo, mensagem = fim
+        self.janela.destroy()
+        if tipo == 'erro':
+            messagebox.showerror("Erro no Lote", f"Não foi possível processar o lote:\n\n{mensagem}")
+        else:
+            messagebox.showinfo("Lote Concluído", f"✅ {mensagem}\n\nDestino: {self.processador.destino}")
+        if self.on_fim:
+            self.on_fim(mensagem)
+
+
 # ============================================================================
 # FUNÇÃO PRINCIPAL E INSTALAÇÃO DE DEPENDÊNCIAS
 # ============================================================================
@@ -632,6 +986,10 @@ def main():
         
         # Configurar para fechar corretamente
         def on_closing():
+            app.executor.shutdown(wait=False, cancel_futures=True)
+            # Processos do motor de lote e memória compartilhada não sobrevivem à janela
+            if app.motor_lote is not None:
+                app.motor_lote.fechar()
             print("\n👋 Aplicação finalizada.")
             root.destroy()
         